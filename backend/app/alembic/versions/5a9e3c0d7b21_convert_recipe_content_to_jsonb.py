@@ -0,0 +1,109 @@
+"""Convert recipe content to JSONB
+
+Revision ID: 5a9e3c0d7b21
+Revises: c1f8a2d47e60
+Create Date: 2026-10-17 21:02:47.915337
+
+"""
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5a9e3c0d7b21'
+down_revision = 'c1f8a2d47e60'
+branch_labels = None
+depends_on = None
+
+CONTENT_COLUMNS = ('ingredients', 'ingredient_groups', 'instructions', 'nutrients')
+# Operator classes of the content columns filtered on by recipe lists:
+# ingredients by containment, nutrients by key, which only jsonb_ops indexes
+INDEX_OPS = {'ingredients': 'jsonb_path_ops', 'nutrients': None}
+# Rows converted per transaction
+BATCH_SIZE = 1000
+
+
+def _converted(column, row=''):
+    # None used to be stored as a JSON null, it is now SQL NULL
+    return f"nullif({row}{column}::jsonb, 'null')"
+
+
+def _convert_online(table):
+    """
+    Convert a table's content columns to JSONB without locking it for long.
+
+    ALTER COLUMN TYPE would rewrite the whole table under an exclusive
+    lock. Instead, JSONB copies of the columns are added, kept in sync by a
+    trigger while existing rows are copied in batches, and swapped in.
+    """
+    for column in CONTENT_COLUMNS:
+        op.add_column(table, sa.Column(f'{column}_jsonb', postgresql.JSONB(), nullable=True))
+    copies = '; '.join(
+        f'NEW.{column}_jsonb := {_converted(column, "NEW.")}' for column in CONTENT_COLUMNS
+    )
+    op.execute(
+        f'CREATE FUNCTION {table}_copy_jsonb() RETURNS trigger AS $$ '
+        f'BEGIN {copies}; RETURN NEW; END $$ LANGUAGE plpgsql'
+    )
+    op.execute(
+        f'CREATE TRIGGER {table}_copy_jsonb BEFORE INSERT OR UPDATE ON {table} '
+        f'FOR EACH ROW EXECUTE FUNCTION {table}_copy_jsonb()'
+    )
+
+    # Rows written from now on are copied by the trigger, so the rows that
+    # exist now are copied once each, in id order
+    with op.get_context().autocommit_block():
+        connection = op.get_bind()
+        sets = ', '.join(f'{column}_jsonb = {_converted(column)}' for column in CONTENT_COLUMNS)
+        batch = sa.text(
+            f'UPDATE {table} SET {sets} WHERE id IN ('
+            f'SELECT id FROM {table} WHERE id > :after ORDER BY id LIMIT :batch_size'
+            f') RETURNING id'
+        )
+        last = uuid.UUID(int=0)  # below any other id
+        while ids := connection.execute(batch, {'after': last, 'batch_size': BATCH_SIZE}).scalars().all():
+            last = max(ids)
+
+    # Swapping the columns only changes the catalog, the lock is brief
+    op.execute(f'LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE')
+    op.execute(f'DROP TRIGGER {table}_copy_jsonb ON {table}')
+    op.execute(f'DROP FUNCTION {table}_copy_jsonb()')
+    for column in CONTENT_COLUMNS:
+        op.drop_column(table, column)
+        op.alter_column(table, f'{column}_jsonb', new_column_name=column)
+
+
+def _create_indexes(table):
+    with op.get_context().autocommit_block():
+        for column, ops in INDEX_OPS.items():
+            op.create_index(f'ix_{table}_{column}', table, [column], unique=False, postgresql_using='gin', postgresql_ops={column: ops} if ops else {}, postgresql_concurrently=True)
+
+
+def upgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    # The recipe table predates these migrations and may not exist yet
+    tables = ['recipesource']
+    if sa.inspect(op.get_bind()).has_table('recipe'):
+        tables.append('recipe')
+    for table in tables:
+        _convert_online(table)
+    for table in tables:
+        _create_indexes(table)
+    # ### end Alembic commands ###
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    tables = ['recipesource']
+    if sa.inspect(op.get_bind()).has_table('recipe'):
+        tables.append('recipe')
+    for table in tables:
+        for column in INDEX_OPS:
+            op.drop_index(f'ix_{table}_{column}', table_name=table, postgresql_using='gin')
+        for column in CONTENT_COLUMNS:
+            op.alter_column(table, column, type_=sa.JSON(), postgresql_using=f'{column}::json')
+    # ### end Alembic commands ###
@@ -1,61 +1,184 @@
 """Recipe API endpoints for CRUD operations and web scraping."""
 
+import asyncio
+import shutil
+import tempfile
+import time
 import uuid
-from typing import Any
+from collections.abc import AsyncIterator, Iterator
+from typing import IO, Any, Literal
 
 import httpx
-from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
+from fastapi import APIRouter, HTTPException, Query, Response, UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import ColumnElement, cast
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.orm import load_only, raiseload
+from sqlmodel import Session, col, func, select
 
 from app import crud
 from app.api.deps import CurrentUser, SessionDep
-from app.lib.recipe_scraper import scrape_recipe_from_url
+from app.core.config import settings
+from app.core.db import engine
+from app.lib.archive_import import (
+    ArchiveError,
+    ArchivePage,
+    import_archive,
+    open_archive,
+)
+from app.lib.batch_scrape import scrape_concurrently
+from app.lib.host_scheduler import HostUnavailableError
+from app.lib.pagination import paginate
+from app.lib.parse_executor import ParseError
+from app.lib.recipe_parser import FIELD_PRESETS, resolve_fields
+from app.lib.recipe_scraper import (
+    PageRejectedError,
+    describe_scrape_error,
+    recipe_create_from_parsed,
+    scrape_recipe_from_url,
+)
+from app.lib.scrape_cache import normalize_url, scrape_cache
+from app.lib.scrape_trace import ScrapeTrace
+from app.lib.singleflight import SingleFlight, pg_advisory_lock
+from app.lib.sitemap_crawl import (
+    CrawlError,
+    SiteUrls,
+    crawl_import,
+    find_recipe_urls,
+)
 from app.models import (
     Message,
     ParseRecipeResponse,
     Recipe,
     RecipeCreate,
     RecipePublic,
+    RecipeSearchHit,
+    RecipeSearchResults,
+    RecipeSource,
     RecipesPublic,
+    RecipeSummariesPublic,
+    RecipeSummary,
     RecipeUpdate,
+    ScrapeBatchRequest,
+    ScrapeBatchResult,
+    ScrapeJob,
+    ScrapeJobPublic,
+    User,
 )
 
 router = APIRouter(prefix="/recipes", tags=["recipes"])
 
 
-@router.get("/", response_model=RecipesPublic)
+# Columns read for view=summary; the recipe's content is left in the table
+SUMMARY_COLUMNS = tuple(getattr(Recipe, field) for field in RecipeSummary.model_fields)
+
+
+@router.get("/", response_model=RecipesPublic | RecipeSummariesPublic)
 def read_recipes(
-    session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100
+    session: SessionDep,
+    current_user: CurrentUser,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    count: Literal["exact", "estimated", "none"] = "exact",
+    view: Literal["full", "summary"] = "full",
+    ingredient: list[str] = Query(default=[]),
+    nutrient: list[str] = Query(default=[]),
 ) -> Any:
     """
-    Retrieve recipes for the current user.
+    Retrieve recipes for the current user, newest first.
 
     Superusers can see all recipes, regular users see only their own.
+    Pass the next_cursor of a page as cursor to get the next one; unlike
+    skip, a cursor costs the same however deep the page.
+
+    The total is read from counters kept as recipes are saved and deleted.
+    count=none leaves it out, and count=estimated gives superusers the
+    planner's estimate of all recipes, a catalog lookup however large the
+    table.
+
+    view=summary returns RecipeSummary entries, without ingredients,
+    instructions or nutrients, which are then not read from the database.
+
+    ingredient keeps the recipes with that exact ingredient line, and
+    nutrient those whose nutrients include that name; both can be repeated
+    to require several. The filters are answered from indexes, and the
+    total of a filtered list is always counted exactly.
     """
-    if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Recipe)
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Recipe).order_by(Recipe.created_at.desc()).offset(skip).limit(limit)  # type: ignore
+    conditions: list[ColumnElement[bool]] = []
+    if ingredient:
+        conditions.append(crud.recipes_with_ingredients(ingredient))
+    conditions.extend(crud.recipes_with_nutrient(name) for name in nutrient)
+    owner_id = None
+    if not current_user.is_superuser:
+        owner_id = current_user.id
+        conditions.append(col(Recipe.owner_id) == owner_id)
+    statement = select(Recipe).where(*conditions)
+    if view == "summary":
+        # raiseload makes sure nothing else is loaded behind our back
+        statement = statement.options(
+            load_only(*SUMMARY_COLUMNS, raiseload=True), raiseload("*")
         )
-        recipes = session.exec(statement).all()
-    else:
-        count_statement = (
-            select(func.count())
-            .select_from(Recipe)
-            .where(Recipe.owner_id == current_user.id)
+    try:
+        recipes, next_cursor = paginate(
+            session, statement, Recipe, cursor=cursor, skip=skip, limit=limit
         )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Recipe)
-            .where(Recipe.owner_id == current_user.id)
-            .order_by(Recipe.created_at.desc())  # type: ignore
-            .offset(skip)
-            .limit(limit)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    total = None
+    if count != "none" and (ingredient or nutrient):
+        # The counters only count whole lists
+        counted = select(func.count()).select_from(Recipe).where(*conditions)
+        total = session.exec(counted).one()
+    elif count == "estimated" and owner_id is None:
+        total = crud.estimate_recipe_count(session=session)
+    if total is None and count != "none":
+        total = crud.get_recipe_count(session=session, owner_id=owner_id)
+    if view == "summary":
+        return RecipeSummariesPublic(
+            data=[RecipeSummary.model_validate(recipe) for recipe in recipes],
+            count=total,
+            next_cursor=next_cursor,
         )
-        recipes = session.exec(statement).all()
+    return RecipesPublic(data=recipes, count=total, next_cursor=next_cursor)
+
+
+@router.get("/search", response_model=RecipeSearchResults)
+def search_recipes(
+    session: SessionDep,
+    current_user: CurrentUser,
+    q: str = Query(min_length=1, max_length=255),
+    skip: int = 0,
+    limit: int = 20,
+) -> Any:
+    """
+    Full-text search of recipe titles, ingredients and instructions.
 
-    return RecipesPublic(data=recipes, count=count)
+    q takes web search syntax: words, "quoted phrases", or and -excluded
+    words. Hits are ranked, title matches first, then ingredients, then
+    instructions, and words are matched in the user's search language.
+    Superusers search all recipes, regular users only their own.
+    """
+    language = cast(current_user.search_language, REGCONFIG)
+    query = func.websearch_to_tsquery(language, q)
+    search_vector = col(Recipe.search_vector)
+    rank = func.ts_rank_cd(search_vector, query)
+    statement = (
+        select(*SUMMARY_COLUMNS)
+        .add_columns(rank.label("rank"))
+        .where(search_vector.bool_op("@@")(query))
+        .order_by(rank.desc(), col(Recipe.id))
+        .offset(skip)
+        .limit(limit)
+    )
+    if not current_user.is_superuser:
+        statement = statement.where(Recipe.owner_id == current_user.id)
+    hits = session.exec(statement).all()
+    return RecipeSearchResults(
+        data=[RecipeSearchHit.model_validate(hit._mapping) for hit in hits]
+    )
 
 
 @router.get("/{id}", response_model=RecipePublic)
@@ -126,71 +249,525 @@ def delete_recipe(
         raise HTTPException(status_code=404, detail="Recipe not found")
     if not current_user.is_superuser and (recipe.owner_id != current_user.id):
         raise HTTPException(status_code=403, detail="Not enough permissions")
-    session.delete(recipe)
-    session.commit()
+    crud.delete_recipe(session=session, db_recipe=recipe)
     return Message(message="Recipe deleted successfully")
 
 
-@router.post("/scrape", response_model=ParseRecipeResponse)
+scrape_flight: SingleFlight[tuple[dict[str, Any], str]] = SingleFlight()
+
+
+def _get_cached(
+    *, session: Session, url: str, fields: frozenset[str]
+) -> tuple[dict[str, Any], str] | None:
+    # The cache holds full results, which have every field but links
+    if not settings.SCRAPE_CACHE_ENABLED or not fields <= FIELD_PRESETS["full"]:
+        return None
+    cached = scrape_cache.get(session=session, url=url)
+    if cached is None:
+        return None
+    data, tier = cached
+    return {k: v for k, v in data.items() if k in fields}, tier
+
+
+async def _fetch_and_cache(
+    *,
+    session: Session,
+    url: str,
+    trace: ScrapeTrace | None,
+    fields: frozenset[str],
+) -> tuple[dict[str, Any], str]:
+    recipe_data = await scrape_recipe_from_url(url=url, trace=trace, fields=fields)
+    # Raises ValidationError before anything is cached, so bad output is not served again
+    parsed = ParseRecipeResponse.model_validate(recipe_data)
+    # A partial result could not answer later requests for other fields
+    if settings.SCRAPE_CACHE_ENABLED and fields >= FIELD_PRESETS["full"]:
+        scrape_cache.set(session=session, url=url, data=parsed)
+    return recipe_data, "miss"
+
+
+async def _scrape_and_store(
+    *,
+    url: str,
+    force_refresh: bool,
+    trace: ScrapeTrace | None,
+    fields: frozenset[str],
+) -> tuple[dict[str, Any], str]:
+    # Runs detached from the request that started it, so use its own session
+    with Session(engine) as session:
+        if not settings.SCRAPE_COALESCE_ACROSS_WORKERS:
+            return await _fetch_and_cache(
+                session=session, url=url, trace=trace, fields=fields
+            )
+        async with pg_advisory_lock(
+            normalize_url(url), timeout=settings.SCRAPE_COALESCE_LOCK_TIMEOUT
+        ):
+            # Another worker may have scraped the URL while we waited
+            if not force_refresh:
+                cached = _get_cached(session=session, url=url, fields=fields)
+                if cached is not None:
+                    return cached
+            return await _fetch_and_cache(
+                session=session, url=url, trace=trace, fields=fields
+            )
+
+
+def _source_data(source: RecipeSource) -> dict[str, Any]:
+    """Scraper output with the saved fields of a recipe source."""
+    return {
+        "title": source.title,
+        "image": source.image,
+        "site_name": source.site_name,
+        "ingredients": source.ingredients,
+        "ingredient_groups": source.ingredient_groups,
+        "instruction_list": source.instructions,
+        "nutrients": source.nutrients,
+    }
+
+
+async def _scrape_with_cache(
+    *,
+    session: Session,
+    url: str,
+    force_refresh: bool,
+    trace: ScrapeTrace | None = None,
+    fields: frozenset[str] = FIELD_PRESETS["full"],
+    from_source: bool = False,
+) -> tuple[dict[str, Any], str]:
+    """
+    Return scraper output for a URL, from the scrape cache when possible.
+
+    Concurrent misses for the same normalized URL and fields share one fetch
+    and parse, whose phases are recorded in the trace of the request that
+    started it. Only scrapes of every field are cached, but any request
+    without links can be answered from the cache. With from_source, a
+    cache miss for a URL whose recipe was already saved is answered with
+    the saved fields of its latest RecipeSource instead of a scrape.
+
+    Returns:
+        The scraped data and the cache status ("memory", "db", "source"
+        or "miss").
+    """
+    if not force_refresh and (settings.SCRAPE_CACHE_ENABLED or from_source):
+        started = time.perf_counter()
+        cached = None
+        if settings.SCRAPE_CACHE_ENABLED:
+            cached = _get_cached(session=session, url=url, fields=fields)
+        if cached is None and from_source:
+            source = crud.get_latest_recipe_source(session=session, url=url)
+            if source is not None:
+                cached = _source_data(source), "source"
+        if trace is not None:
+            trace.add("cache", time.perf_counter() - started)
+        if cached is not None:
+            return cached
+    key = normalize_url(url)
+    if fields != FIELD_PRESETS["full"]:
+        key += "#" + ",".join(sorted(fields))
+    return await scrape_flight.do(
+        key,
+        lambda: _scrape_and_store(
+            url=url, force_refresh=force_refresh, trace=trace, fields=fields
+        ),
+    )
+
+
+@router.post(
+    "/scrape",
+    response_model=ParseRecipeResponse,
+    responses={202: {"model": ScrapeJobPublic, "description": "Scrape job queued"}},
+)
 async def scrape_recipe(
     url: str,
     session: SessionDep,
     current_user: CurrentUser,
     save: bool = False,
-) -> ParseRecipeResponse:
+    force_refresh: bool = False,
+    background: bool = False,
+    fields: str | None = None,
+) -> Any:
     """
     Scrape recipe data from a URL.
 
     Asynchronously parses recipe data from a web page.
-    If save=true, the recipe is automatically saved to the database.
+    If save=true, the recipe is automatically saved to the database. Its
+    scraped content is stored once for all users who save the same page,
+    and a page saved before is not fetched again: unless it is in the
+    scrape cache, only the saved fields are returned then.
+    Results are served from the scrape cache when available; the
+    X-Cache (HIT/MISS) and X-Cache-Tier (memory/db/source) headers report it.
+    The Server-Timing header breaks the time taken down by phase.
+    If background=true, a scrape job is queued for the worker and returned
+    right away with status 202; follow it via /recipes/scrape/jobs/{id}.
+    Only the requested fields are computed and returned, the others are
+    null; per-field timings are exported as the recipe_field_seconds metric.
 
     Args:
         url: URL of the recipe to scrape
         save: Whether to save the scraped recipe to database
+        force_refresh: Bypass the scrape cache and fetch the page again
+        background: Queue the scrape as a job instead of waiting for it
+        fields: Comma-separated field names and presets (save, preview,
+            full); full, every field but links, by default. Background
+            jobs always scrape every field.
         session: Database session (injected)
         current_user: Current authenticated user (injected)
 
     Returns:
-        Parsed recipe data
+        Parsed recipe data, or the queued job if background=true
 
     Raises:
         HTTPException: If the URL cannot be fetched or parsed
     """
     try:
-        recipe_data = await scrape_recipe_from_url(url=url)
-        response = ParseRecipeResponse(**recipe_data)
+        requested = (
+            resolve_fields(fields.split(",")) if fields else FIELD_PRESETS["full"]
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if save:
+        requested |= FIELD_PRESETS["save"]
+
+    if background:
+        job = crud.create_scrape_job(
+            session=session,
+            url=url,
+            save=save,
+            owner_id=current_user.id,
+            max_attempts=settings.SCRAPE_JOB_MAX_ATTEMPTS,
+        )
+        return JSONResponse(
+            status_code=202,
+            content=ScrapeJobPublic.model_validate(job).model_dump(mode="json"),
+        )
+
+    trace = ScrapeTrace(url)
+    started = time.perf_counter()
+    try:
+        recipe_data, cache_status = await _scrape_with_cache(
+            session=session,
+            url=url,
+            force_refresh=force_refresh,
+            trace=trace,
+            fields=requested,
+            from_source=save,
+        )
+        headers = {"X-Cache": "MISS" if cache_status == "miss" else "HIT"}
+        if cache_status != "miss":
+            headers["X-Cache-Tier"] = cache_status
+        # The only validation of the recipe: the saved row is built from it
+        # as is and it is serialized once, instead of FastAPI validating it
+        # again against the response model
+        parsed = ParseRecipeResponse.model_validate(recipe_data)
 
         if save:
-            # Convert IngredientGroup objects to dicts for JSON storage
-            ingredient_groups_list = None
-            if response.ingredient_groups:
-                ingredient_groups_list = [
-                    g.model_dump() for g in response.ingredient_groups
-                ]
-
-            # Create RecipeCreate schema from ParseRecipeResponse
-            recipe_create = RecipeCreate(
-                title=response.title or "Untitled Recipe",
+            with trace.phase("db"):
+                crud.create_recipe(
+                    session=session,
+                    recipe_in=recipe_create_from_parsed(parsed, url),
+                    owner_id=current_user.id,
+                    scraped=True,
+                )
+            trace.record_phases()
+
+        headers["Server-Timing"] = trace.server_timing(
+            total=time.perf_counter() - started
+        )
+        return Response(
+            content=parsed.model_dump_json(),
+            media_type="application/json",
+            headers=headers,
+        )
+
+    except (
+        httpx.HTTPError,
+        HostUnavailableError,
+        PageRejectedError,
+        ParseError,
+        ValidationError,
+    ) as e:
+        status_code, detail = describe_scrape_error(e)
+        server_timing = trace.server_timing(total=time.perf_counter() - started)
+        raise HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Server-Timing": server_timing},
+        )
+
+
+def _get_own_scrape_job(
+    *, session: Session, current_user: User, job_id: uuid.UUID
+) -> ScrapeJob:
+    job = session.get(ScrapeJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Scrape job not found")
+    if not current_user.is_superuser and (job.owner_id != current_user.id):
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return job
+
+
+@router.get("/scrape/jobs/{job_id}", response_model=ScrapeJobPublic)
+def read_scrape_job(
+    session: SessionDep, current_user: CurrentUser, job_id: uuid.UUID
+) -> Any:
+    """
+    Get a background scrape job by ID.
+
+    Users can only access their own jobs unless they are superusers.
+    """
+    return _get_own_scrape_job(
+        session=session, current_user=current_user, job_id=job_id
+    )
+
+
+async def _stream_job_events(job_id: uuid.UUID) -> AsyncIterator[str]:
+    last_payload = None
+    while True:
+        # A fresh session per poll so we always see the worker's latest commit
+        with Session(engine) as session:
+            job = session.get(ScrapeJob, job_id)
+            if job is None:
+                return
+            payload = ScrapeJobPublic.model_validate(job).model_dump_json()
+            status = job.status
+        if payload != last_payload:
+            yield f"event: {status}\ndata: {payload}\n\n"
+            last_payload = payload
+        if status in ("succeeded", "failed"):
+            return
+        await asyncio.sleep(settings.SCRAPE_JOB_POLL_INTERVAL)
+
+
+@router.get(
+    "/scrape/jobs/{job_id}/events",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Server-sent events with the job state on every change",
+            "content": {"text/event-stream": {}},
+        }
+    },
+)
+def stream_scrape_job(
+    session: SessionDep, current_user: CurrentUser, job_id: uuid.UUID
+) -> StreamingResponse:
+    """
+    Subscribe to a background scrape job over server-sent events.
+
+    An event named after the job status is sent whenever the job changes;
+    the stream ends once the job has succeeded or failed.
+    """
+    _get_own_scrape_job(session=session, current_user=current_user, job_id=job_id)
+    return StreamingResponse(
+        _stream_job_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+async def _stream_batch(
+    *, batch_in: ScrapeBatchRequest, owner_id: uuid.UUID
+) -> AsyncIterator[str]:
+    # The request's session is closed before streaming starts, so open our own.
+    # expire_on_commit=False lets us read saved ids without a query per row.
+    with Session(engine, expire_on_commit=False) as session:
+
+        async def scrape(url: str) -> ParseRecipeResponse:
+            recipe_data, _ = await _scrape_with_cache(
+                session=session,
                 url=url,
-                image=response.image,
-                site_name=response.site_name,
-                ingredients=response.ingredients,
-                ingredient_groups=ingredient_groups_list,
-                instructions=response.instruction_list or [],
-                nutrients=response.nutrients,
+                force_refresh=False,
+                from_source=batch_in.save,
             )
+            return ParseRecipeResponse(**recipe_data)
+
+        groups = scrape_concurrently(
+            batch_in.urls,
+            scrape,
+            concurrency=settings.SCRAPE_BATCH_CONCURRENCY,
+            per_host_concurrency=settings.SCRAPE_BATCH_PER_HOST_CONCURRENCY,
+            max_group_size=settings.SCRAPE_BATCH_SAVE_SIZE,
+        )
+        async for group in groups:
+            results: list[ScrapeBatchResult] = []
+            to_save: list[tuple[ScrapeBatchResult, RecipeCreate]] = []
+            for outcome in group:
+                if outcome.result is None:
+                    assert outcome.error is not None
+                    status_code, detail = describe_scrape_error(outcome.error)
+                    results.append(
+                        ScrapeBatchResult(
+                            index=outcome.index,
+                            url=outcome.url,
+                            status_code=status_code,
+                            error=detail,
+                        )
+                    )
+                    continue
+                result = ScrapeBatchResult(
+                    index=outcome.index,
+                    url=outcome.url,
+                    status_code=200,
+                    recipe=outcome.result,
+                )
+                results.append(result)
+                if batch_in.save:
+                    recipe_in = recipe_create_from_parsed(outcome.result, outcome.url)
+                    to_save.append((result, recipe_in))
+
+            if to_save:
+                db_recipes = crud.create_recipes(
+                    session=session,
+                    recipes_in=[recipe_in for _, recipe_in in to_save],
+                    owner_id=owner_id,
+                    scraped=True,
+                )
+                for (result, _), db_recipe in zip(to_save, db_recipes, strict=True):
+                    result.recipe_id = db_recipe.id
+
+            for result in results:
+                yield result.model_dump_json() + "\n"
+
+
+@router.post(
+    "/scrape/batch",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "One ScrapeBatchResult JSON object per line, in completion order",
+            "content": {"application/x-ndjson": {}},
+        }
+    },
+)
+async def scrape_recipes_batch(
+    batch_in: ScrapeBatchRequest, current_user: CurrentUser
+) -> StreamingResponse:
+    """
+    Scrape many recipe URLs in one request.
 
-            crud.create_recipe(
-                session=session, recipe_in=recipe_create, owner_id=current_user.id
-            )
+    URLs are fetched concurrently, bounded globally and per host, and each
+    result (or per-URL error) is streamed back as an NDJSON line as soon as
+    it completes. If save=true, successful recipes are saved in batched
+    transactions and their ids are included in the streamed results.
+    """
+    return StreamingResponse(
+        _stream_batch(batch_in=batch_in, owner_id=current_user.id),
+        media_type="application/x-ndjson",
+    )
 
-        return response
 
-    except httpx.HTTPStatusError as e:
-        raise HTTPException(
-            status_code=e.response.status_code,
-            detail=f"Failed to fetch URL: {e.response.status_code}",
+async def _stream_import(
+    *, fileobj: IO[bytes], pages: Iterator[ArchivePage], owner_id: uuid.UUID
+) -> AsyncIterator[str]:
+    try:
+        with Session(engine, expire_on_commit=False) as session:
+            groups = import_archive(
+                pages,
+                session=session,
+                owner_id=owner_id,
+                concurrency=settings.ARCHIVE_IMPORT_CONCURRENCY,
+                batch_size=settings.ARCHIVE_IMPORT_BATCH_SIZE,
+            )
+            async for group in groups:
+                for result in group:
+                    yield result.model_dump_json() + "\n"
+    finally:
+        fileobj.close()
+
+
+@router.post(
+    "/import",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "One ArchiveImportResult JSON object per line, one saved batch at a time",
+            "content": {"application/x-ndjson": {}},
+        }
+    },
+)
+async def import_recipes_archive(
+    file: UploadFile, current_user: CurrentUser
+) -> StreamingResponse:
+    """
+    Import recipes from a zip or tar archive of saved HTML pages.
+
+    Pages are parsed in parallel and saved in batched transactions; each
+    page's result (or error) is streamed back as an NDJSON line once its
+    batch is saved. A page's source URL is read from a urls.json manifest
+    in the archive, or from the page itself. See app.lib.archive_import.
+    """
+    if file.size is not None and file.size > settings.ARCHIVE_IMPORT_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Archive is too large")
+    # The upload is closed once this handler returns, so keep our own copy
+    fileobj = tempfile.TemporaryFile()
+    await asyncio.to_thread(shutil.copyfileobj, file.file, fileobj)
+    try:
+        pages = await asyncio.to_thread(
+            open_archive,
+            fileobj,
+            max_pages=settings.ARCHIVE_IMPORT_MAX_PAGES,
+            max_page_bytes=settings.SCRAPER_MAX_PAGE_BYTES,
         )
-    except httpx.RequestError as e:
-        raise HTTPException(status_code=500, detail=f"Request failed: {str(e)}")
+    except ArchiveError as e:
+        fileobj.close()
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        _stream_import(fileobj=fileobj, pages=pages, owner_id=current_user.id),
+        media_type="application/x-ndjson",
+    )
+
+
+async def _stream_crawl(*, urls: SiteUrls, owner_id: uuid.UUID) -> AsyncIterator[str]:
+    try:
+        with Session(engine, expire_on_commit=False) as session:
+            groups = crawl_import(
+                iter(urls),
+                session=session,
+                owner_id=owner_id,
+                concurrency=settings.CRAWL_IMPORT_CONCURRENCY,
+                batch_size=settings.CRAWL_IMPORT_BATCH_SIZE,
+            )
+            async for group in groups:
+                for result in group:
+                    yield result.model_dump_json() + "\n"
+    finally:
+        urls.close()
+
+
+@router.post(
+    "/import/sitemap",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "One CrawlImportResult JSON object per line, one saved batch at a time",
+            "content": {"application/x-ndjson": {}},
+        }
+    },
+)
+async def import_recipes_sitemap(
+    url: str, session: SessionDep, current_user: CurrentUser
+) -> StreamingResponse:
+    """
+    Import the recipes of a whole site from its sitemaps.
 
+    url is the site's root, whose sitemaps are found through robots.txt or
+    at /sitemap.xml, or one of its sitemaps. Recipe-looking URLs the user
+    has not saved yet are scraped at the site's polite rate and saved in
+    batched transactions; each page's result (or error) is streamed back
+    as an NDJSON line once its batch is saved. See app.lib.sitemap_crawl.
+    """
+    try:
+        urls = await find_recipe_urls(
+            url,
+            session=session,
+            owner_id=current_user.id,
+            max_urls=settings.CRAWL_IMPORT_MAX_URLS,
+            max_sitemaps=settings.CRAWL_IMPORT_MAX_SITEMAPS,
+            max_sitemap_bytes=settings.CRAWL_IMPORT_MAX_SITEMAP_BYTES,
+            error_rate=settings.CRAWL_IMPORT_SEEN_ERROR_RATE,
+        )
+    except CrawlError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        _stream_crawl(urls=urls, owner_id=current_user.id),
+        media_type="application/x-ndjson",
+    )
@@ -12,8 +12,10 @@ from app.api.deps import (
 )
 from app.core.config import settings
 from app.core.security import get_password_hash, verify_password
+from app.lib.pagination import paginate
 from app.models import (
     Message,
+    Recipe,
     UpdatePassword,
     User,
     UserCreate,
@@ -33,18 +35,26 @@ router = APIRouter(prefix="/users", tags=["users"])
     dependencies=[Depends(get_current_active_superuser)],
     response_model=UsersPublic,
 )
-def read_users(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+def read_users(
+    session: SessionDep, skip: int = 0, limit: int = 100, cursor: str | None = None
+) -> Any:
     """
-    Retrieve users.
+    Retrieve users, newest first.
+
+    Pass the next_cursor of a page as cursor to get the next one.
     """
 
     count_statement = select(func.count()).select_from(User)
     count = session.exec(count_statement).one()
 
-    statement = select(User).order_by(User.created_at.desc()).offset(skip).limit(limit)
-    users = session.exec(statement).all()
+    try:
+        users, next_cursor = paginate(
+            session, select(User), User, cursor=cursor, skip=skip, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
-    return UsersPublic(data=users, count=count)
+    return UsersPublic(data=users, count=count, next_cursor=next_cursor)
 
 
 @router.post(
@@ -89,8 +99,15 @@ def update_user_me(
                 status_code=409, detail="User with this email already exists"
             )
     user_data = user_in.model_dump(exclude_unset=True)
+    if user_in.search_language is None:
+        user_data.pop("search_language", None)
     current_user.sqlmodel_update(user_data)
     session.add(current_user)
+    if "search_language" in user_data:
+        # The user's recipes are searched in their new language from now on
+        crud.update_search_vectors(
+            session=session, condition=Recipe.owner_id == current_user.id
+        )
     session.commit()
     session.refresh(current_user)
     return current_user
@@ -134,8 +151,7 @@ def delete_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
         raise HTTPException(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
-    session.delete(current_user)
-    session.commit()
+    crud.delete_user(session=session, db_user=current_user)
     return Message(message="User deleted successfully")
 
 
@@ -221,6 +237,5 @@ def delete_user(
         raise HTTPException(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
-    session.delete(user)
-    session.commit()
+    crud.delete_user(session=session, db_user=user)
     return Message(message="User deleted successfully")
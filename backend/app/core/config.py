@@ -50,6 +50,8 @@ class Settings(BaseSettings):
 
     PROJECT_NAME: str
     SENTRY_DSN: HttpUrl | None = None
+    # Bearer token required by /metrics; the endpoint is disabled when unset
+    METRICS_TOKEN: str | None = None
     POSTGRES_SERVER: str
     POSTGRES_PORT: int = 5432
     POSTGRES_USER: str
@@ -90,6 +92,117 @@ class Settings(BaseSettings):
     def emails_enabled(self) -> bool:
         return bool(self.SMTP_HOST and self.EMAILS_FROM_EMAIL)
 
+    # Outbound HTTP client shared by the recipe scraper (one per worker)
+    SCRAPER_HTTP2: bool = True
+    SCRAPER_MAX_CONNECTIONS: int = 100
+    SCRAPER_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    SCRAPER_KEEPALIVE_EXPIRY: float = 30.0
+    SCRAPER_CONNECT_TIMEOUT: float = 5.0
+    SCRAPER_READ_TIMEOUT: float = 15.0
+    SCRAPER_WRITE_TIMEOUT: float = 5.0
+    SCRAPER_POOL_TIMEOUT: float = 5.0
+    # Where scraper requests go: the network ("live"), the network with every
+    # response saved to SCRAPER_CASSETTE_DIR ("record"), the saved responses
+    # only ("replay") or the local mock site of benchmarks/mock_site.py
+    SCRAPER_TRANSPORT: Literal["live", "record", "replay", "mock_site"] = "live"
+    SCRAPER_CASSETTE_DIR: str = "/app/data/cassettes"
+    SCRAPER_MOCK_SITE_URL: str = "http://127.0.0.1:8900"
+
+    # Recipe pages are streamed and rejected past this size or content type
+    SCRAPER_MAX_PAGE_BYTES: int = 5 * 1024 * 1024
+    SCRAPER_ALLOWED_CONTENT_TYPES: list[str] = ["text/html", "application/xhtml+xml"]
+
+    # Per-host politeness: rate limit, robots.txt crawl delay and circuit breaker
+    SCRAPER_HOST_RATE: float = 2.0
+    SCRAPER_HOST_BURST: int = 5
+    SCRAPER_HOST_MAX_WAIT: float = 30.0
+    SCRAPER_RESPECT_ROBOTS_CRAWL_DELAY: bool = True
+    SCRAPER_ROBOTS_TTL_SECONDS: int = 60 * 60
+    SCRAPER_ROBOTS_MAX_CRAWL_DELAY: float = 30.0
+    SCRAPER_BREAKER_FAILURE_THRESHOLD: int = 5
+    SCRAPER_BREAKER_COOLDOWN: float = 60.0
+    # Retries of page fetches that failed to connect or got 502/503/504, or
+    # 429 with a Retry-After; a longer Retry-After than the max delay fails
+    SCRAPER_RETRY_MAX_ATTEMPTS: int = 3
+    SCRAPER_RETRY_BASE_DELAY: float = 0.25
+    SCRAPER_RETRY_MAX_DELAY: float = 5.0
+    # Hedged requests: a second request when the first has no response
+    # headers after the host's p95, once that is known from enough samples
+    SCRAPER_HEDGE_ENABLED: bool = False
+    SCRAPER_HEDGE_MIN_SAMPLES: int = 20
+    SCRAPER_HEDGE_LATENCY_WINDOW: int = 100
+    # Retries and hedges together stay below this fraction of requests,
+    # after an initial allowance of SCRAPER_RETRY_BUDGET_BURST
+    SCRAPER_RETRY_BUDGET_RATIO: float = 0.1
+    SCRAPER_RETRY_BUDGET_BURST: int = 10
+    # Hosts that get their own metric labels per process, the rest are "other"
+    SCRAPER_METRICS_MAX_HOSTS: int = 50
+
+    # CPU-bound HTML parsing runs off the event loop in this executor
+    SCRAPER_PARSE_EXECUTOR: Literal["process", "thread"] = "process"
+    SCRAPER_PARSE_WORKERS: int = 2
+    SCRAPER_PARSE_MAX_TASKS_PER_WORKER: int = 100
+    SCRAPER_PARSE_MAX_MEMORY_MB: int = 1024
+    SCRAPER_PARSE_TIMEOUT: float = 20.0
+
+    # Scrape result cache: per-worker LRU in front of a shared Postgres table
+    SCRAPE_CACHE_ENABLED: bool = True
+    SCRAPE_CACHE_TTL_SECONDS: int = 60 * 60 * 24 * 7
+    SCRAPE_CACHE_MEMORY_TTL_SECONDS: int = 60 * 15
+    SCRAPE_CACHE_MEMORY_MAX_ENTRIES: int = 1000
+    SCRAPE_CACHE_MEMORY_MAX_BYTES: int = 64 * 1024 * 1024
+    # How often the scrape worker deletes expired rows from the shared table
+    SCRAPE_CACHE_PURGE_INTERVAL_SECONDS: float = 60 * 60
+    # Coalesce concurrent scrapes of a URL across workers with an advisory lock
+    SCRAPE_COALESCE_ACROSS_WORKERS: bool = False
+    SCRAPE_COALESCE_LOCK_TIMEOUT: float = 30.0
+    SCRAPE_COALESCE_LOCK_POOL_SIZE: int = 5
+
+    # POST /recipes/scrape/batch fan-out limits and save transaction size
+    SCRAPE_BATCH_CONCURRENCY: int = 16
+    SCRAPE_BATCH_PER_HOST_CONCURRENCY: int = 2
+    SCRAPE_BATCH_SAVE_SIZE: int = 50
+
+    # Keep fetched page HTML for offline re-parsing (python -m app.reparse_recipes)
+    SCRAPER_HTML_STORE: Literal["off", "disk", "database"] = "off"
+    SCRAPER_HTML_STORE_DIR: str = "/app/data/html"
+    SCRAPER_HTML_COMPRESSION: Literal["zstd", "gzip"] = "zstd"
+    SCRAPER_HTML_ZSTD_LEVEL: int = 10
+    REPARSE_BATCH_SIZE: int = 500
+    REPARSE_CONCURRENCY: int = 8
+
+    # Revalidate the pages of saved recipes with conditional requests, a batch
+    # every interval, so each page is checked about once per max age
+    RECIPE_REFRESH_ENABLED: bool = False
+    RECIPE_REFRESH_MAX_AGE_SECONDS: int = 60 * 60 * 24
+    RECIPE_REFRESH_INTERVAL_SECONDS: float = 60.0
+    RECIPE_REFRESH_BATCH_SIZE: int = 50
+    RECIPE_REFRESH_CONCURRENCY: int = 4
+
+    # Bulk import of saved HTML archives (POST /recipes/import)
+    ARCHIVE_IMPORT_MAX_BYTES: int = 256 * 1024 * 1024
+    ARCHIVE_IMPORT_MAX_PAGES: int = 5000
+    ARCHIVE_IMPORT_CONCURRENCY: int = 8
+    ARCHIVE_IMPORT_BATCH_SIZE: int = 200
+
+    # Site crawl import from sitemaps (POST /recipes/import/sitemap). The
+    # seen-URL Bloom filter is sized for CRAWL_IMPORT_MAX_URLS
+    CRAWL_IMPORT_MAX_URLS: int = 50_000
+    CRAWL_IMPORT_MAX_SITEMAPS: int = 100
+    CRAWL_IMPORT_MAX_SITEMAP_BYTES: int = 50 * 1024 * 1024
+    CRAWL_IMPORT_SEEN_ERROR_RATE: float = 0.001
+    CRAWL_IMPORT_CONCURRENCY: int = 4
+    CRAWL_IMPORT_BATCH_SIZE: int = 50
+
+    # Background scrape jobs (python -m app.worker)
+    SCRAPE_JOB_MAX_ATTEMPTS: int = 3
+    SCRAPE_JOB_RETRY_BASE_DELAY: float = 5.0
+    SCRAPE_JOB_LOCK_TIMEOUT: float = 300.0
+    # Must stay below the lock timeout so a slow job is never claimed twice
+    SCRAPE_JOB_TIMEOUT: float = 240.0
+    SCRAPE_JOB_POLL_INTERVAL: float = 1.0
+    SCRAPE_WORKER_CONCURRENCY: int = 4
+
     EMAIL_TEST_USER: EmailStr = "test@example.com"
     FIRST_SUPERUSER: EmailStr
     FIRST_SUPERUSER_PASSWORD: str
@@ -115,5 +228,14 @@ class Settings(BaseSettings):
 
         return self
 
+    @model_validator(mode="after")
+    def _check_scrape_job_timeout(self) -> Self:
+        if self.SCRAPE_JOB_TIMEOUT >= self.SCRAPE_JOB_LOCK_TIMEOUT:
+            raise ValueError(
+                "SCRAPE_JOB_TIMEOUT must be lower than SCRAPE_JOB_LOCK_TIMEOUT, "
+                "or running jobs are claimed again by another worker"
+            )
+        return self
+
 
 settings = Settings()  # type: ignore
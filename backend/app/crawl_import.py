@@ -0,0 +1,117 @@
+"""Import every recipe of a site from its sitemaps.
+
+Run with ``python -m app.crawl_import URL --owner EMAIL``, where URL is the
+site's root or one of its sitemaps. This is the command line counterpart
+of POST /recipes/import/sitemap for sites too large to import over one
+request: recipe URLs are read from the sitemaps, scraped at the site's
+polite rate and saved in batched transactions for the given user, with
+progress logged after every batch.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.core.db import engine
+from app.lib.http_client import close_http_client, init_http_client
+from app.lib.parse_executor import close_parse_executor, init_parse_executor
+from app.lib.sitemap_crawl import CrawlError, crawl_import, find_recipe_urls
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def run(
+    url: str, owner_email: str, *, max_urls: int, batch_size: int, concurrency: int
+) -> int:
+    with Session(engine, expire_on_commit=False) as session:
+        owner = crud.get_user_by_email(session=session, email=owner_email)
+        if owner is None:
+            logger.error(f"No user with email {owner_email}")
+            return 1
+
+        await init_http_client()
+        init_parse_executor()
+        imported = failed = 0
+        try:
+            urls = await find_recipe_urls(
+                url,
+                session=session,
+                owner_id=owner.id,
+                max_urls=max_urls,
+                max_sitemaps=settings.CRAWL_IMPORT_MAX_SITEMAPS,
+                max_sitemap_bytes=settings.CRAWL_IMPORT_MAX_SITEMAP_BYTES,
+                error_rate=settings.CRAWL_IMPORT_SEEN_ERROR_RATE,
+            )
+            try:
+                groups = crawl_import(
+                    iter(urls),
+                    session=session,
+                    owner_id=owner.id,
+                    concurrency=concurrency,
+                    batch_size=batch_size,
+                )
+                async for group in groups:
+                    for result in group:
+                        if result.recipe_id is None:
+                            failed += 1
+                            logger.warning(f"{result.url}: {result.error}")
+                        else:
+                            imported += 1
+                    logger.info(
+                        f"Imported {imported} of {urls.count} recipes, {failed} failed"
+                    )
+            finally:
+                urls.close()
+        except CrawlError as e:
+            logger.error(f"Cannot import {url}: {e}")
+            return 1
+        finally:
+            close_parse_executor()
+            await close_http_client()
+    logger.info(f"Done: {imported} recipes imported for {owner_email}, {failed} failed")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("url", help="The site's root or one of its sitemaps")
+    parser.add_argument("--owner", required=True, help="Email of the owning user")
+    parser.add_argument(
+        "--max-urls",
+        type=int,
+        default=settings.CRAWL_IMPORT_MAX_URLS,
+        help="Recipe URLs imported at most",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.CRAWL_IMPORT_BATCH_SIZE,
+        help="Recipes saved per transaction",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.CRAWL_IMPORT_CONCURRENCY,
+        help="Pages scraped at a time",
+    )
+    args = parser.parse_args()
+    status = asyncio.run(
+        run(
+            args.url,
+            args.owner,
+            max_urls=args.max_urls,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+        )
+    )
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
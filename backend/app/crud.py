@@ -1,17 +1,39 @@
+import hashlib
+import json
+import random
 import uuid
+from collections.abc import Callable
+from datetime import timedelta
 from typing import Any
 
-from sqlmodel import Session, select
+from sqlalchemy import ColumnElement, any_, cast, literal_column, text, tuple_
+from sqlalchemy.dialects.postgresql import REGCONFIG, TSVECTOR, insert
+from sqlmodel import Session, and_, col, func, or_, select, update
 
 from app.core.security import get_password_hash, verify_password
+from app.lib.scrape_cache import normalize_url
 from app.models import (
     Recipe,
+    RecipeCount,
+    RecipeCountSlot,
     RecipeCreate,
+    RecipeSource,
     RecipeUpdate,
+    ScrapeJob,
+    StoredPage,
     User,
     UserCreate,
     UserUpdate,
 )
+from app.models.base import get_datetime_utc
+from app.models.recipe import SHARED_FIELDS
+
+# What a RecipeSource stores, and its content hash covers
+SOURCE_FIELDS = ("title", "image", "site_name", *SHARED_FIELDS)
+# Rows the count of all recipes is spread over, see RecipeCountSlot
+RECIPE_COUNT_SLOTS = 16
+# jsonb_to_tsvector filter indexing only the strings of a JSON value
+JSON_STRINGS: ColumnElement[Any] = literal_column("'\"string\"'::jsonb")
 
 
 def create_user(*, session: Session, user_create: UserCreate) -> User:
@@ -44,6 +66,20 @@ def get_user_by_email(*, session: Session, email: str) -> User | None:
     return session_user
 
 
+def delete_user(*, session: Session, db_user: User) -> None:
+    """Delete a user with their recipes, and take the recipes off the count."""
+    statement = (
+        select(RecipeCount.count)
+        .where(RecipeCount.owner_id == db_user.id)
+        .with_for_update()
+    )
+    owned = session.exec(statement).first()
+    if owned:
+        _add_to_recipe_count_slot(session=session, delta=-owned)
+    session.delete(db_user)
+    session.commit()
+
+
 # Dummy hash to use for timing attack prevention when user is not found
 # This is an Argon2 hash of a random password, used to ensure constant-time comparison
 DUMMY_HASH = "$argon2id$v=19$m=65536,t=3,p=4$MjQyZWE1MzBjYjJlZTI0Yw$YTU4NGM5ZTZmYjE2NzZlZjY0ZWY3ZGRkY2U2OWFjNjk"
@@ -67,8 +103,269 @@ def authenticate(*, session: Session, email: str, password: str) -> User | None:
     return db_user
 
 
+def recipe_content_hash(content: dict[str, Any]) -> str:
+    """SHA-256 of recipe content, the same for equal content in any key order."""
+    canonical = json.dumps(
+        content, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def get_or_create_recipe_sources(
+    *, session: Session, recipes_in: list[RecipeCreate]
+) -> list[RecipeSource | None]:
+    """
+    Find or add the shared sources of scraped recipes, in one round trip each.
+
+    Sources are looked up by the recipe's normalized URL and content hash,
+    so recipes with the same content share a source, and concurrent saves
+    of the same content end up with the same row. The caller commits.
+
+    Returns:
+        The source of each recipe, in input order, or None for recipes
+        without a URL.
+    """
+    keys: list[tuple[str, str] | None] = []
+    rows: dict[tuple[str, str], dict[str, Any]] = {}
+    for recipe_in in recipes_in:
+        if recipe_in.url is None:
+            keys.append(None)
+            continue
+        content = {field: getattr(recipe_in, field) for field in SOURCE_FIELDS}
+        key = (normalize_url(recipe_in.url), recipe_content_hash(content))
+        keys.append(key)
+        rows.setdefault(
+            key,
+            {
+                "id": uuid.uuid4(),
+                "url_key": key[0],
+                "content_hash": key[1],
+                "url": recipe_in.url,
+                "created_at": get_datetime_utc(),
+                **content,
+            },
+        )
+    if not rows:
+        return [None] * len(keys)
+    session.execute(
+        insert(RecipeSource)
+        .values(list(rows.values()))
+        .on_conflict_do_nothing(index_elements=["url_key", "content_hash"])
+    )
+    statement = select(RecipeSource).where(
+        tuple_(col(RecipeSource.url_key), col(RecipeSource.content_hash)).in_(
+            list(rows)
+        )
+    )
+    sources = {
+        (source.url_key, source.content_hash): source
+        for source in session.exec(statement)
+    }
+    return [None if key is None else sources[key] for key in keys]
+
+
+def get_latest_recipe_source(*, session: Session, url: str) -> RecipeSource | None:
+    """The most recently scraped content of a URL, if it was ever saved."""
+    statement = (
+        select(RecipeSource)
+        .where(RecipeSource.url_key == normalize_url(url))
+        .order_by(col(RecipeSource.created_at).desc())
+        .limit(1)
+    )
+    return session.exec(statement).first()
+
+
+def revise_recipe_source(
+    *, session: Session, source: RecipeSource, values: dict[str, Any]
+) -> RecipeSource:
+    """
+    The source of a page's new shared field values, after a re-parse or refresh.
+
+    Its other fields are those of ``source``. The caller commits.
+
+    Returns:
+        ``source`` itself if the values are unchanged, or else the source
+        with the new content, added if it does not exist yet.
+    """
+    if all(getattr(source, field) == values[field] for field in SHARED_FIELDS):
+        return source
+    content = {field: getattr(source, field) for field in SOURCE_FIELDS}
+    content.update({field: values[field] for field in SHARED_FIELDS})
+    recipe_in = RecipeCreate.model_construct(url=source.url, **content)
+    [revised] = get_or_create_recipe_sources(session=session, recipes_in=[recipe_in])
+    assert revised is not None
+    return revised
+
+
+def build_recipe(
+    *,
+    recipe_in: RecipeCreate,
+    owner_id: uuid.UUID,
+    source: RecipeSource | None = None,
+) -> Recipe:
+    """
+    Build an unsaved recipe row from a creation schema.
+
+    ``recipe_in`` was validated when it was built, whether from a request
+    body or by ``recipe_create_from_parsed``, so its fields are copied into
+    the row as they are instead of being validated again. With a source,
+    the shared fields are left to it instead.
+    """
+    values = dict(recipe_in)
+    if source is not None:
+        values.update(dict.fromkeys(SHARED_FIELDS))
+    # The defaults are passed in because constructing a table model calls
+    # its default factories through pydantic, which inspects their
+    # signatures every time
+    return Recipe(
+        **values,
+        owner_id=owner_id,
+        source_id=None if source is None else source.id,
+        source=source,
+        id=uuid.uuid4(),
+        created_at=get_datetime_utc(),
+    )
+
+
+def _add_to_recipe_count_slot(*, session: Session, delta: int) -> None:
+    statement = insert(RecipeCountSlot).values(
+        slot=random.randrange(RECIPE_COUNT_SLOTS), count=delta
+    )
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=["slot"],
+            set_={"count": RecipeCountSlot.count + statement.excluded.count},
+        )
+    )
+
+
+def add_to_recipe_count(*, session: Session, owner_id: uuid.UUID, delta: int) -> None:
+    """
+    Count recipes added (or removed, with a negative delta) for a user.
+
+    The caller commits, so the counts change in the same transaction as the
+    recipes. Concurrent changes for the same user wait for each other.
+    """
+    statement = insert(RecipeCount).values(owner_id=owner_id, count=delta)
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=["owner_id"],
+            set_={"count": RecipeCount.count + statement.excluded.count},
+        )
+    )
+    _add_to_recipe_count_slot(session=session, delta=delta)
+
+
+def get_recipe_count(*, session: Session, owner_id: uuid.UUID | None = None) -> int:
+    """Number of recipes of a user, or of all users, from the counters."""
+    if owner_id is not None:
+        owned = session.get(RecipeCount, owner_id)
+        return 0 if owned is None else owned.count
+    statement = select(func.coalesce(func.sum(RecipeCountSlot.count), 0))
+    return int(session.exec(statement).one())
+
+
+def estimate_recipe_count(*, session: Session) -> int | None:
+    """
+    Planner estimate of the number of all recipes, which costs nothing.
+
+    Returns:
+        The estimate as of the last VACUUM or ANALYZE of the recipe table,
+        or None if there was none yet.
+    """
+    statement = text("SELECT reltuples FROM pg_class WHERE oid = 'recipe'::regclass")
+    reltuples = session.execute(statement).scalar_one()
+    return None if reltuples < 0 else int(reltuples)
+
+
+def _weighted(vector: ColumnElement[Any], weight: str) -> ColumnElement[Any]:
+    # Missing content leaves its part of the vector empty, not all of it NULL
+    weighted = func.setweight(vector, literal_column(f"'{weight}'"))
+    return func.coalesce(weighted, cast("", TSVECTOR))
+
+
+def recipe_search_vector() -> ColumnElement[Any]:
+    """
+    SQL expression of a recipe row's full-text search vector.
+
+    The title weighs most, then the ingredients, then the instructions,
+    and all of them are stemmed in the owner's search language. Content
+    the recipe inherits from its source is indexed as its own.
+    """
+    language = (
+        select(cast(col(User.search_language), REGCONFIG))
+        .where(User.id == Recipe.owner_id)
+        .scalar_subquery()
+    )
+
+    def shared_strings(field: str) -> ColumnElement[Any]:
+        inherited = (
+            select(getattr(RecipeSource, field))
+            .where(RecipeSource.id == Recipe.source_id)
+            .scalar_subquery()
+        )
+        document = func.coalesce(getattr(Recipe, field), inherited)
+        return func.jsonb_to_tsvector(language, document, JSON_STRINGS)
+
+    title = _weighted(func.to_tsvector(language, Recipe.title), "A")
+    ingredients = _weighted(shared_strings("ingredients"), "B")
+    instructions = _weighted(shared_strings("instructions"), "C")
+    return title.op("||")(ingredients).op("||")(instructions)
+
+
+def _content_condition(
+    field: str, predicate: Callable[[Any], ColumnElement[bool]]
+) -> ColumnElement[bool]:
+    """
+    Condition on a content field of recipes, inherited values included.
+
+    A recipe matches if its own value does, or if it has none and its
+    source's value does. Both halves are answered from the GIN index of
+    the field, on recipe and on recipesource.
+    """
+    own = getattr(Recipe, field)
+    sources = select(RecipeSource.id).where(predicate(getattr(RecipeSource, field)))
+    # "= ANY(ARRAY(...))" rather than "IN (...)" lets the source half use
+    # the source_id index
+    inherited = col(Recipe.source_id) == any_(func.array(sources.scalar_subquery()))
+    return or_(predicate(own), and_(own.is_(None), inherited))
+
+
+def recipes_with_ingredients(ingredients: list[str]) -> ColumnElement[bool]:
+    """Condition on recipes whose ingredient list has all of ``ingredients``."""
+    return _content_condition("ingredients", lambda field: field.contains(ingredients))
+
+
+def recipes_with_nutrient(name: str) -> ColumnElement[bool]:
+    """Condition on recipes whose nutrients include ``name``, whatever its value."""
+    return _content_condition("nutrients", lambda field: field.has_key(name))
+
+
+def update_search_vectors(*, session: Session, condition: Any) -> None:
+    """
+    Recompute the search vectors of the recipes matching a condition.
+
+    Called after anything a vector depends on changed: a recipe's title or
+    content, the source it inherits from or its owner's search language.
+    Pending changes are flushed first. The caller commits.
+    """
+    session.flush()
+    statement = (
+        update(Recipe)
+        .where(condition)
+        .values(search_vector=recipe_search_vector())
+        # Loaded recipes have the vector deferred, there is nothing to sync
+        .execution_options(synchronize_session=False)
+    )
+    session.exec(statement)
+
+
 def create_recipe(
-    *, session: Session, recipe_in: RecipeCreate, owner_id: uuid.UUID
+    *,
+    session: Session,
+    recipe_in: RecipeCreate,
+    owner_id: uuid.UUID,
+    scraped: bool = False,
 ) -> Recipe:
     """
     Create a new recipe in the database.
@@ -77,23 +374,74 @@ def create_recipe(
         session: Database session
         recipe_in: Recipe creation schema
         owner_id: UUID of the recipe owner
+        scraped: Whether recipe_in is scraper output, whose content is then
+            stored once in a RecipeSource shared with other users
 
     Returns:
         Created recipe database model
     """
-    db_recipe = Recipe.model_validate(recipe_in, update={"owner_id": owner_id})
+    source = None
+    if scraped:
+        [source] = get_or_create_recipe_sources(session=session, recipes_in=[recipe_in])
+    db_recipe = build_recipe(recipe_in=recipe_in, owner_id=owner_id, source=source)
     session.add(db_recipe)
+    add_to_recipe_count(session=session, owner_id=owner_id, delta=1)
+    update_search_vectors(session=session, condition=Recipe.id == db_recipe.id)
     session.commit()
     session.refresh(db_recipe)
     return db_recipe
 
 
+def create_recipes(
+    *,
+    session: Session,
+    recipes_in: list[RecipeCreate],
+    owner_id: uuid.UUID,
+    scraped: bool = False,
+) -> list[Recipe]:
+    """
+    Create several recipes in a single transaction.
+
+    Rows are not refreshed after the commit; use a session with
+    expire_on_commit=False to read them back without a query per row.
+
+    Args:
+        session: Database session
+        recipes_in: Recipe creation schemas
+        owner_id: UUID of the recipes' owner
+        scraped: Whether recipes_in are scraper output, see create_recipe
+
+    Returns:
+        Created recipe database models, in input order
+    """
+    sources: list[RecipeSource | None] = [None] * len(recipes_in)
+    if scraped:
+        sources = get_or_create_recipe_sources(session=session, recipes_in=recipes_in)
+    db_recipes = [
+        build_recipe(recipe_in=recipe_in, owner_id=owner_id, source=source)
+        for recipe_in, source in zip(recipes_in, sources, strict=True)
+    ]
+    session.add_all(db_recipes)
+    if db_recipes:
+        add_to_recipe_count(session=session, owner_id=owner_id, delta=len(db_recipes))
+        ids = [db_recipe.id for db_recipe in db_recipes]
+        update_search_vectors(session=session, condition=col(Recipe.id).in_(ids))
+    session.commit()
+    return db_recipes
+
+
 def update_recipe(
     *, session: Session, db_recipe: Recipe, recipe_in: RecipeUpdate
 ) -> Recipe:
     """
     Update an existing recipe in the database.
 
+    A recipe saved from a shared source is copied on write: only the shared
+    fields set to something else than the source's value are stored in its
+    row. A shared field set to None is stored empty, since None in the row
+    means the source's value. Moving the recipe to another URL detaches it
+    from its source, with a copy of the content it had.
+
     Args:
         session: Database session
         db_recipe: Existing recipe database model
@@ -103,9 +451,147 @@ def update_recipe(
         Updated recipe database model
     """
     recipe_data = recipe_in.model_dump(exclude_unset=True)
+    source = db_recipe.source
+    if source is not None:
+        url = recipe_data.get("url", db_recipe.url)
+        if url is None or normalize_url(url) != source.url_key:
+            db_recipe.sqlmodel_update(db_recipe.shared_values())
+            db_recipe.source = None
+        else:
+            for field in SHARED_FIELDS:
+                if field not in recipe_data:
+                    continue
+                value = recipe_data[field]
+                if value == getattr(source, field):
+                    recipe_data[field] = None
+                elif value is None:
+                    recipe_data[field] = {} if field == "nutrients" else []
     db_recipe.sqlmodel_update(recipe_data)
     session.add(db_recipe)
+    update_search_vectors(session=session, condition=Recipe.id == db_recipe.id)
     session.commit()
     session.refresh(db_recipe)
     return db_recipe
 
+
+def delete_recipe(*, session: Session, db_recipe: Recipe) -> None:
+    """Delete a recipe and take it off the counts."""
+    owner_id = db_recipe.owner_id
+    session.delete(db_recipe)
+    add_to_recipe_count(session=session, owner_id=owner_id, delta=-1)
+    session.commit()
+
+
+def create_scrape_job(
+    *, session: Session, url: str, save: bool, owner_id: uuid.UUID, max_attempts: int
+) -> ScrapeJob:
+    """
+    Queue a background scrape job.
+
+    Args:
+        session: Database session
+        url: URL of the recipe to scrape
+        save: Whether to save the recipe once scraped
+        owner_id: UUID of the user the job belongs to
+        max_attempts: Attempts before the job is marked as failed
+
+    Returns:
+        Created scrape job database model
+    """
+    db_job = ScrapeJob(url=url, save=save, owner_id=owner_id, max_attempts=max_attempts)
+    session.add(db_job)
+    session.commit()
+    session.refresh(db_job)
+    return db_job
+
+
+def claim_scrape_job(*, session: Session, lock_timeout: float) -> ScrapeJob | None:
+    """
+    Claim the next runnable scrape job for this worker.
+
+    Uses FOR UPDATE SKIP LOCKED so concurrent workers never claim the same
+    row. Jobs left "running" for longer than lock_timeout (a worker died
+    mid-job) are claimed again if they have attempts left, and marked
+    "failed" otherwise.
+
+    Args:
+        session: Database session
+        lock_timeout: Seconds after which a running job is considered stale
+
+    Returns:
+        The claimed job, now "running", or None if nothing is runnable
+    """
+    now = get_datetime_utc()
+    stale = and_(
+        ScrapeJob.status == "running",
+        col(ScrapeJob.locked_at) < now - timedelta(seconds=lock_timeout),
+    )
+    session.exec(
+        update(ScrapeJob)
+        .where(stale, col(ScrapeJob.attempts) >= col(ScrapeJob.max_attempts))
+        .values(
+            status="failed",
+            error="Worker stopped before the job finished",
+            locked_at=None,
+            updated_at=now,
+        )
+    )
+    statement = (
+        select(ScrapeJob)
+        .where(
+            or_(
+                and_(ScrapeJob.status == "queued", ScrapeJob.run_after <= now),
+                and_(stale, col(ScrapeJob.attempts) < col(ScrapeJob.max_attempts)),
+            )
+        )
+        .order_by(col(ScrapeJob.run_after))
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    db_job = session.exec(statement).first()
+    if db_job is None:
+        session.commit()
+        return None
+    db_job.status = "running"
+    db_job.attempts += 1
+    db_job.locked_at = now
+    db_job.updated_at = now
+    session.add(db_job)
+    session.commit()
+    session.refresh(db_job)
+    return db_job
+
+
+def claim_pages_to_refresh(
+    *, session: Session, limit: int, max_age: float
+) -> list[StoredPage]:
+    """
+    Claim the saved recipe pages due for a freshness check.
+
+    Picks the pages of saved recipes checked longest ago, at least max_age
+    seconds ago, and marks them checked now. FOR UPDATE SKIP LOCKED keeps
+    concurrent workers from claiming the same pages.
+
+    Args:
+        session: Database session
+        limit: Maximum number of pages to claim
+        max_age: Seconds after which a page is due again
+
+    Returns:
+        The claimed pages, oldest check first
+    """
+    now = get_datetime_utc()
+    saved = select(Recipe.id).where(col(Recipe.url) == StoredPage.url).exists()
+    statement = (
+        select(StoredPage)
+        .where(col(StoredPage.checked_at) < now - timedelta(seconds=max_age), saved)
+        .order_by(col(StoredPage.checked_at))
+        .limit(limit)
+        .with_for_update(skip_locked=True, of=StoredPage)
+    )
+    pages = list(session.exec(statement).all())
+    for page in pages:
+        page.checked_at = now
+        session.add(page)
+    session.commit()
+    return pages
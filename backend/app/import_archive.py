@@ -0,0 +1,98 @@
+"""Import recipes from an archive of saved HTML pages.
+
+Run with ``python -m app.import_archive ARCHIVE --owner EMAIL``. This is
+the command line counterpart of POST /recipes/import for archives too
+large to upload: pages are parsed on a process pool and saved in batched
+transactions for the given user, with progress logged after every batch.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.core.db import engine
+from app.lib.archive_import import ArchiveError, import_archive, open_archive
+from app.lib.parse_executor import close_parse_executor, init_parse_executor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def run(
+    path: Path, owner_email: str, *, batch_size: int, concurrency: int
+) -> int:
+    with Session(engine, expire_on_commit=False) as session:
+        owner = crud.get_user_by_email(session=session, email=owner_email)
+        if owner is None:
+            logger.error(f"No user with email {owner_email}")
+            return 1
+
+        init_parse_executor()
+        imported = failed = 0
+        try:
+            with path.open("rb") as fileobj:
+                pages = open_archive(
+                    fileobj,
+                    max_pages=settings.ARCHIVE_IMPORT_MAX_PAGES,
+                    max_page_bytes=settings.SCRAPER_MAX_PAGE_BYTES,
+                )
+                groups = import_archive(
+                    pages,
+                    session=session,
+                    owner_id=owner.id,
+                    concurrency=concurrency,
+                    batch_size=batch_size,
+                )
+                async for group in groups:
+                    for result in group:
+                        if result.recipe_id is None:
+                            failed += 1
+                            logger.warning(f"{result.name}: {result.error}")
+                        else:
+                            imported += 1
+                    logger.info(f"Imported {imported} recipes, {failed} failed")
+        except ArchiveError as e:
+            logger.error(f"Cannot import {path}: {e}")
+            return 1
+        finally:
+            close_parse_executor()
+    logger.info(f"Done: {imported} recipes imported for {owner_email}, {failed} failed")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("archive", type=Path, help="Zip or tar archive of pages")
+    parser.add_argument("--owner", required=True, help="Email of the owning user")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.ARCHIVE_IMPORT_BATCH_SIZE,
+        help="Recipes saved per transaction",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.ARCHIVE_IMPORT_CONCURRENCY,
+        help="Pages parsed at a time",
+    )
+    args = parser.parse_args()
+    status = asyncio.run(
+        run(
+            args.archive,
+            args.owner,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+        )
+    )
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
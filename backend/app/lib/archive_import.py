@@ -0,0 +1,313 @@
+"""Bulk import of recipe pages saved to disk.
+
+Used by ``POST /recipes/import`` and ``python -m app.import_archive``. A zip
+or tar archive of saved HTML pages is read one entry at a time, so only the
+pages being parsed are held in memory. Pages are parsed on the worker's
+parse executor, several at a time, and the resulting recipes are inserted
+in batched transactions, with each batch's results handed back as it is
+saved.
+
+The URL a page was saved from picks the site scraper. It is taken from a
+``urls.json`` entry mapping archive member names to URLs (in a tar archive
+it must come before the pages it names), then from the ``saved from url``
+comment browsers add when saving a page, then from the page's canonical
+link or ``og:url``.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import tarfile
+import uuid
+import zipfile
+from collections.abc import AsyncIterator, Iterator
+from typing import IO
+
+from sqlmodel import Session
+
+from app import crud
+from app.lib.recipe_scraper import (
+    describe_scrape_error,
+    parse_saved_html,
+    recipe_create_from_parsed,
+)
+from app.models import ArchiveImportResult, ParseRecipeResponse
+
+logger = logging.getLogger(__name__)
+
+HTML_SUFFIXES = (".html", ".htm", ".xhtml")
+MANIFEST_NAME = "urls.json"
+
+SAVED_FROM_RE = re.compile(r"<!--\s*saved from url=\(\d+\)(\S+?)\s*-->", re.IGNORECASE)
+CANONICAL_RE = re.compile(
+    r"<link[^>]+rel=[\"']canonical[\"'][^>]*href=[\"']([^\"']+)", re.IGNORECASE
+)
+OG_URL_RE = re.compile(
+    r"<meta[^>]+property=[\"']og:url[\"'][^>]*content=[\"']([^\"']+)", re.IGNORECASE
+)
+
+
+class ArchiveError(Exception):
+    """Raised when an upload is not a readable zip or tar archive."""
+
+
+class ArchivePage:
+    """A saved page read from an archive, or the reason it could not be read."""
+
+    __slots__ = ("index", "name", "html", "url", "error")
+
+    def __init__(
+        self,
+        index: int,
+        name: str,
+        html: str | None,
+        url: str | None,
+        error: str | None = None,
+    ) -> None:
+        self.index = index
+        self.name = name
+        self.html = html
+        self.url = url
+        self.error = error
+
+
+ParseOutcome = ParseRecipeResponse | ArchiveImportResult
+
+
+def page_url(name: str, html: str, manifest: dict[str, str]) -> str | None:
+    """Find the URL a saved page came from, see the module docstring."""
+    if url := manifest.get(name):
+        return url
+    for pattern in (SAVED_FROM_RE, CANONICAL_RE, OG_URL_RE):
+        if match := pattern.search(html):
+            url = match.group(1)
+            if url.startswith(("http://", "https://")):
+                return url
+    return None
+
+
+def _read_manifest(data: bytes) -> dict[str, str]:
+    try:
+        manifest = json.loads(data)
+    except ValueError:
+        logger.warning(f"Ignoring unreadable {MANIFEST_NAME}")
+        return {}
+    if not isinstance(manifest, dict):
+        return {}
+    return {str(name): str(url) for name, url in manifest.items()}
+
+
+def _page(index: int, name: str, data: bytes, manifest: dict[str, str]) -> ArchivePage:
+    html = data.decode("utf-8", errors="replace")
+    return ArchivePage(index, name, html, page_url(name, html, manifest))
+
+
+def _iter_zip(
+    archive: zipfile.ZipFile, max_page_bytes: int
+) -> Iterator[tuple[str, bytes | None]]:
+    for info in archive.infolist():
+        if info.is_dir():
+            continue
+        if info.file_size > max_page_bytes:
+            yield info.filename, None
+            continue
+        with archive.open(info) as member:
+            # file_size comes from the archive itself, so do not trust it
+            data = member.read(max_page_bytes + 1)
+        yield info.filename, data if len(data) <= max_page_bytes else None
+
+
+def _iter_tar(
+    archive: tarfile.TarFile, max_page_bytes: int
+) -> Iterator[tuple[str, bytes | None]]:
+    for member in archive:
+        if not member.isfile():
+            continue
+        if member.size > max_page_bytes:
+            yield member.name, None
+            continue
+        extracted = archive.extractfile(member)
+        yield member.name, extracted.read() if extracted is not None else None
+
+
+def open_archive(
+    fileobj: IO[bytes], *, max_pages: int, max_page_bytes: int
+) -> Iterator[ArchivePage]:
+    """
+    Open a zip or tar archive and read its saved pages one at a time.
+
+    Members that are not HTML pages are skipped. Pages over max_page_bytes
+    and pages past max_pages are returned with an error instead of HTML.
+
+    Raises:
+        ArchiveError: If the file is neither a zip nor a tar archive. Errors
+            in the middle of a corrupt archive are raised while iterating.
+    """
+    manifest: dict[str, str] = {}
+    members: Iterator[tuple[str, bytes | None]]
+    try:
+        if zipfile.is_zipfile(fileobj):
+            fileobj.seek(0)
+            zip_archive = zipfile.ZipFile(fileobj)
+            # Zip archives have a central directory, so the manifest can come first
+            if MANIFEST_NAME in zip_archive.namelist():
+                manifest = _read_manifest(zip_archive.read(MANIFEST_NAME))
+            members = _iter_zip(zip_archive, max_page_bytes)
+        else:
+            fileobj.seek(0)
+            # Stream mode reads members in order without seeking back
+            tar_archive = tarfile.open(fileobj=fileobj, mode="r|*")
+            members = _iter_tar(tar_archive, max_page_bytes)
+    except (tarfile.TarError, zipfile.BadZipFile) as e:
+        raise ArchiveError("Upload is not a zip or tar archive") from e
+    return _iter_pages(members, manifest, max_pages, max_page_bytes)
+
+
+def _iter_pages(
+    members: Iterator[tuple[str, bytes | None]],
+    manifest: dict[str, str],
+    max_pages: int,
+    max_page_bytes: int,
+) -> Iterator[ArchivePage]:
+    index = 0
+    try:
+        for name, data in members:
+            base_name = name.rsplit("/", 1)[-1]
+            if base_name == MANIFEST_NAME:
+                if data is not None:
+                    manifest.update(_read_manifest(data))
+                continue
+            if not base_name.lower().endswith(HTML_SUFFIXES):
+                continue
+            if index >= max_pages:
+                yield ArchivePage(
+                    index, name, None, None, f"Archive has more than {max_pages} pages"
+                )
+                return
+            if data is None:
+                error = f"Page is larger than {max_page_bytes} bytes"
+                yield ArchivePage(index, name, None, None, error)
+            else:
+                yield _page(index, name, data, manifest)
+            index += 1
+    except (tarfile.TarError, zipfile.BadZipFile, EOFError) as e:
+        raise ArchiveError(f"Archive is corrupt: {e}") from e
+
+
+def _failure(page: ArchivePage, status_code: int, error: str) -> ArchiveImportResult:
+    return ArchiveImportResult(
+        index=page.index,
+        name=page.name,
+        url=page.url,
+        status_code=status_code,
+        error=error[:2048],
+    )
+
+
+async def _parse_one(page: ArchivePage) -> tuple[ArchivePage, ParseOutcome]:
+    if page.html is None:
+        return page, _failure(page, 413, page.error or "Page could not be read")
+    try:
+        data = await parse_saved_html(page.html, page.url or "")
+        return page, ParseRecipeResponse.model_validate(data)
+    except Exception as e:
+        # recipe_scrapers raises many exception types for pages it cannot read
+        status_code, detail = describe_scrape_error(e)
+        return page, _failure(page, status_code, detail)
+
+
+async def import_archive(
+    pages: Iterator[ArchivePage],
+    *,
+    session: Session,
+    owner_id: uuid.UUID,
+    concurrency: int,
+    batch_size: int,
+) -> AsyncIterator[list[ArchiveImportResult]]:
+    """
+    Import the saved pages of an opened archive as recipes for a user.
+
+    Archive entries are read in a thread and parsed concurrently, at most
+    ``concurrency`` at a time. Parsed recipes are saved ``batch_size`` per
+    transaction and the results of each saved batch, failures included,
+    are yielded in the order the pages finished parsing.
+
+    Raises:
+        ArchiveError: If the archive turns out to be corrupt part way.
+    """
+    queue: asyncio.Queue[tuple[ArchivePage, ParseOutcome] | None] = asyncio.Queue()
+    slots = asyncio.Semaphore(concurrency)
+
+    async def parse(page: ArchivePage) -> None:
+        try:
+            queue.put_nowait(await _parse_one(page))
+        finally:
+            slots.release()
+
+    async def produce() -> None:
+        tasks = []
+        try:
+            while (page := await asyncio.to_thread(next, pages, None)) is not None:
+                await slots.acquire()
+                tasks.append(asyncio.create_task(parse(page)))
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            queue.put_nowait(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        finished = False
+        while not finished:
+            group: list[tuple[ArchivePage, ParseOutcome]] = []
+            while len(group) < batch_size:
+                item = await queue.get()
+                if item is None:
+                    finished = True
+                    break
+                group.append(item)
+            if group:
+                yield _save_group(session=session, owner_id=owner_id, group=group)
+        # Surface errors reading the archive
+        await producer
+    finally:
+        producer.cancel()
+
+
+def _save_group(
+    *,
+    session: Session,
+    owner_id: uuid.UUID,
+    group: list[tuple[ArchivePage, ParseOutcome]],
+) -> list[ArchiveImportResult]:
+    results: list[ArchiveImportResult] = []
+    to_save: list[tuple[ArchiveImportResult, ParseRecipeResponse]] = []
+    for page, outcome in group:
+        if isinstance(outcome, ArchiveImportResult):
+            results.append(outcome)
+            continue
+        result = ArchiveImportResult(
+            index=page.index,
+            name=page.name,
+            url=page.url,
+            status_code=200,
+            title=outcome.title,
+        )
+        results.append(result)
+        to_save.append((result, outcome))
+    if to_save:
+        # Not scraped=True: an uploaded page may not be what its site serves,
+        # so its content is not shared with other users
+        db_recipes = crud.create_recipes(
+            session=session,
+            recipes_in=[
+                recipe_create_from_parsed(parsed, result.url)
+                for result, parsed in to_save
+            ],
+            owner_id=owner_id,
+        )
+        for (result, _), db_recipe in zip(to_save, db_recipes, strict=True):
+            result.recipe_id = db_recipe.id
+    return results
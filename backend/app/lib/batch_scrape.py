@@ -0,0 +1,86 @@
+"""Bounded fan-out for scraping many recipe URLs at once.
+
+Used by ``POST /recipes/scrape/batch``. URLs are scraped concurrently under
+a global limit and a per-host limit, and results are handed back in small
+groups as soon as they are ready so the caller can stream them and batch
+its database writes.
+"""
+
+import asyncio
+from collections import defaultdict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Generic, TypeVar
+from urllib.parse import urlsplit
+
+T = TypeVar("T")
+
+
+class ScrapeOutcome(Generic[T]):
+    """Result of scraping one URL: either ``result`` or ``error`` is set."""
+
+    __slots__ = ("index", "url", "result", "error")
+
+    def __init__(
+        self,
+        index: int,
+        url: str,
+        result: T | None = None,
+        error: Exception | None = None,
+    ) -> None:
+        self.index = index
+        self.url = url
+        self.result = result
+        self.error = error
+
+
+async def scrape_concurrently(
+    urls: list[str],
+    scrape: Callable[[str], Awaitable[T]],
+    *,
+    concurrency: int,
+    per_host_concurrency: int,
+    max_group_size: int = 50,
+) -> AsyncIterator[list[ScrapeOutcome[T]]]:
+    """
+    Scrape URLs concurrently and yield outcomes in completion order.
+
+    Each yielded group holds every outcome that was ready at that moment,
+    up to ``max_group_size``, so callers can write them in one transaction
+    without waiting for stragglers.
+
+    Args:
+        urls: URLs to scrape.
+        scrape: Coroutine function scraping a single URL.
+        concurrency: Maximum scrapes in flight overall.
+        per_host_concurrency: Maximum scrapes in flight per host.
+        max_group_size: Maximum outcomes per yielded group.
+    """
+    queue: asyncio.Queue[ScrapeOutcome[T]] = asyncio.Queue()
+    global_slots = asyncio.Semaphore(concurrency)
+    host_slots: defaultdict[str, asyncio.Semaphore] = defaultdict(
+        lambda: asyncio.Semaphore(per_host_concurrency)
+    )
+
+    async def worker(index: int, url: str) -> None:
+        host = (urlsplit(url).hostname or "").lower()
+        outcome: ScrapeOutcome[T]
+        # Wait for the host slot first so a slow host cannot hog global slots
+        async with host_slots[host], global_slots:
+            try:
+                outcome = ScrapeOutcome(index, url, result=await scrape(url))
+            except Exception as e:
+                outcome = ScrapeOutcome(index, url, error=e)
+        queue.put_nowait(outcome)
+
+    tasks = [asyncio.create_task(worker(i, url)) for i, url in enumerate(urls)]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            group = [await queue.get()]
+            while len(group) < max_group_size and not queue.empty():
+                group.append(queue.get_nowait())
+            remaining -= len(group)
+            yield group
+    finally:
+        for task in tasks:
+            task.cancel()
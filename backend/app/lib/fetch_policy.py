@@ -0,0 +1,270 @@
+"""Retries and hedged requests for recipe page fetches.
+
+A single slow TCP connect or an overloaded origin should not turn a scrape
+into a multi-second stall or an error, so page fetches are:
+
+- retried with exponential backoff and jitter when they could not connect
+  or got a 502, 503 or 504, or a 429 or 503 with a ``Retry-After`` short
+  enough to wait for
+- hedged, when enabled: if a request has no response headers after the
+  host's 95th percentile time to headers, a second one is sent and
+  whichever answers first is used
+
+Every attempt goes through ``host_scheduler.slot`` and a hedge only goes
+out if the host's rate limit has a token free, so retries and hedges count
+against the per-host rate limit and circuit breaker. A ``RetryBudget``
+shared by all hosts also keeps them to a fraction of all requests, so a
+failing site sees a few percent more load rather than a multiple of it.
+
+Failures while reading the body are not retried.
+"""
+
+import asyncio
+import random
+import time
+from collections.abc import Collection, Sequence
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from app.core.config import settings
+from app.lib.host_scheduler import host_scheduler
+from app.lib.metrics import (
+    SCRAPER_HEDGES,
+    SCRAPER_RETRIES,
+    SCRAPER_RETRY_BUDGET_EXHAUSTED,
+)
+
+# Statuses that say the origin or a gateway is overloaded, not the page
+RETRY_STATUSES = {502, 503, 504}
+# Statuses retried only when they say when to come back
+RETRY_AFTER_STATUSES = {429, 503}
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Seconds to wait from a ``Retry-After`` header.
+
+    Returns:
+        The delay, which is 0 for a date in the past, or None if the header
+        is missing or malformed.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryBudget:
+    """
+    Token bucket filled by requests and drained by retries and hedges.
+
+    Each request adds ``ratio`` of a token, up to ``burst`` tokens, and
+    each retry or hedge takes a whole one. Extra requests therefore stay
+    below ``ratio`` of all requests once the initial ``burst`` is used up.
+    """
+
+    def __init__(self, *, ratio: float, burst: int) -> None:
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = float(burst)
+
+    def deposit(self) -> None:
+        self.tokens = min(float(self.burst), self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Take a token for a retry or hedge, if there is one."""
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def reset(self) -> None:
+        self.tokens = float(self.burst)
+
+
+class FetchPolicy:
+    """
+    When to retry a page fetch, and sending requests with hedging.
+
+    Args:
+        max_attempts: Attempts per fetch, the first one included.
+        base_delay: Backoff before the second attempt, doubled after that.
+        max_delay: Longest wait before an attempt; a longer Retry-After
+            is not waited for.
+        budget: Budget shared by retries and hedges.
+        hedge: Whether to send hedged requests.
+        hedge_min_samples: Header latencies a host needs before hedging.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_attempts: int,
+        base_delay: float,
+        max_delay: float,
+        budget: RetryBudget,
+        hedge: bool,
+        hedge_min_samples: int,
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+
+    @classmethod
+    def from_settings(cls) -> "FetchPolicy":
+        return cls(
+            max_attempts=settings.SCRAPER_RETRY_MAX_ATTEMPTS,
+            base_delay=settings.SCRAPER_RETRY_BASE_DELAY,
+            max_delay=settings.SCRAPER_RETRY_MAX_DELAY,
+            budget=RetryBudget(
+                ratio=settings.SCRAPER_RETRY_BUDGET_RATIO,
+                burst=settings.SCRAPER_RETRY_BUDGET_BURST,
+            ),
+            hedge=settings.SCRAPER_HEDGE_ENABLED,
+            hedge_min_samples=settings.SCRAPER_HEDGE_MIN_SAMPLES,
+        )
+
+    def retry_delay(self, e: Exception, attempt: int) -> float | None:
+        """
+        Seconds to wait before attempting a failed fetch again.
+
+        Args:
+            e: Error of the failed attempt.
+            attempt: Number of the failed attempt, from 1.
+
+        Returns:
+            The delay, or None if the fetch should fail with ``e``.
+        """
+        if attempt >= self.max_attempts:
+            return None
+        if isinstance(e, httpx.HTTPStatusError):
+            status = e.response.status_code
+            retry_after = None
+            if status in RETRY_AFTER_STATUSES:
+                retry_after = parse_retry_after(e.response.headers.get("Retry-After"))
+            if retry_after is None and status not in RETRY_STATUSES:
+                return None
+            if retry_after is not None and retry_after > self.max_delay:
+                return None
+            reason = str(status)
+        elif isinstance(e, httpx.ConnectError | httpx.ConnectTimeout):
+            # Nothing reached the server, so trying again is always safe
+            retry_after = None
+            reason = "connect"
+        else:
+            return None
+        if not self.budget.withdraw():
+            SCRAPER_RETRY_BUDGET_EXHAUSTED.labels(kind="retry").inc()
+            return None
+        SCRAPER_RETRIES.labels(reason=reason).inc()
+        if retry_after is not None:
+            return retry_after
+        backoff = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return float(backoff * random.uniform(0.5, 1.0))
+
+    async def send(
+        self, client: httpx.AsyncClient, request: httpx.Request
+    ) -> httpx.Response:
+        """
+        Send a request and return its response once the headers arrived.
+
+        The body is not read yet; the caller must close the response. The
+        time to headers is recorded for the host's hedging delay.
+        """
+        self.budget.deposit()
+        url = str(request.url)
+        hedge_after = None
+        if self.hedge:
+            hedge_after = host_scheduler.hedge_delay(url, self.hedge_min_samples)
+        started = time.perf_counter()
+        primary = asyncio.ensure_future(client.send(request, stream=True))
+        tasks = [primary]
+        if hedge_after is not None:
+            try:
+                done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+            except BaseException:
+                await _discard(tasks)
+                raise
+            if not done and self._may_hedge(url):
+                # The hedge gets no trace, it would mix its timings with the
+                # first request's
+                hedge = client.build_request(
+                    request.method, request.url, headers=request.headers
+                )
+                tasks.append(asyncio.ensure_future(client.send(hedge, stream=True)))
+        response, winner = await _first_response(tasks)
+        host_scheduler.record_header_latency(url, time.perf_counter() - started)
+        if len(tasks) > 1:
+            SCRAPER_HEDGES.labels(winner="primary" if winner == 0 else "hedge").inc()
+        return response
+
+    def _may_hedge(self, url: str) -> bool:
+        if not self.budget.withdraw():
+            SCRAPER_RETRY_BUDGET_EXHAUSTED.labels(kind="hedge").inc()
+            return False
+        return host_scheduler.try_reserve(url)
+
+    def reset(self) -> None:
+        self.budget.reset()
+
+
+async def _first_response(
+    tasks: Sequence["asyncio.Future[httpx.Response]"],
+) -> tuple[httpx.Response, int]:
+    """
+    Wait for the first of several requests to succeed.
+
+    The others are cancelled, or closed if they answered as well.
+
+    Returns:
+        The response and the index of its request.
+
+    Raises:
+        The first error, if every request failed.
+    """
+    pending = set(tasks)
+    error: BaseException | None = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in tasks:
+                if task not in done:
+                    continue
+                if task.exception() is None:
+                    # Only one task finishes per wait in practice; should two,
+                    # the first one listed wins and the loser is closed below
+                    done.discard(task)
+                    pending |= done
+                    return task.result(), tasks.index(task)
+                error = error or task.exception()
+    finally:
+        await _discard(pending)
+    assert error is not None
+    raise error
+
+
+async def _discard(tasks: Collection["asyncio.Future[httpx.Response]"]) -> None:
+    """Cancel requests, closing any response that arrived anyway."""
+    for task in tasks:
+        task.cancel()
+    for result in await asyncio.gather(*tasks, return_exceptions=True):
+        if isinstance(result, httpx.Response):
+            await result.aclose()
+
+
+fetch_policy = FetchPolicy.from_settings()
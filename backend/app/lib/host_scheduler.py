@@ -0,0 +1,441 @@
+"""Per-host politeness for outbound scrapes.
+
+Every scrape goes through ``HostScheduler.slot`` before it touches the
+network:
+
+- a token bucket per host limits the request rate, slowed down further when
+  the host's robots.txt asks for a ``Crawl-delay``
+- robots.txt is fetched once per host and cached for a while
+- a circuit breaker per host fails scrapes fast after repeated errors or
+  timeouts, and lets a single probe through after a cool-down
+- recent response header latencies per host give the delay after which a
+  request is hedged (see ``app.lib.fetch_policy``)
+
+State lives in the worker process, so limits apply per worker.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Literal
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import httpx
+
+from app.core.config import settings
+from app.lib.http_client import DEFAULT_HEADERS
+from app.lib.metrics import (
+    SCRAPER_CIRCUITS,
+    SCRAPER_HOST_QUEUE_DEPTH,
+    SCRAPER_HOST_REJECTIONS,
+)
+from app.lib.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+CircuitState = Literal["closed", "half_open", "open"]
+
+# robots.txt is read up to this size, like crawlers that ignore the rest
+ROBOTS_MAX_BYTES = 64 * 1024
+ROBOTS_CONTENT_TYPES = ("text/plain", "")
+
+
+class HostUnavailableError(Exception):
+    """Raised when a host's circuit is open or its queue is too long."""
+
+    def __init__(self, host: str, detail: str) -> None:
+        super().__init__(detail)
+        self.host = host
+        self.detail = detail
+
+
+def is_host_failure(e: BaseException) -> bool:
+    """Whether an error says something about the health of the host."""
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code == 429 or e.response.status_code >= 500
+    return isinstance(e, httpx.TransportError)
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations in arrival order.
+
+    Tokens may go negative: each caller takes a token immediately and sleeps
+    off the debt, so waiting callers are served first come, first served.
+    """
+
+    def __init__(self, *, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.waiting = 0
+
+    def configure(self, *, rate: float, burst: int) -> None:
+        self._refill()
+        self.rate = rate
+        self.burst = burst
+        self.tokens = min(self.tokens, float(burst))
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, max_wait: float | None = None) -> float | None:
+        """
+        Take a token.
+
+        Returns:
+            Seconds to wait before using it, or None if that would exceed
+            ``max_wait`` (no token is taken then).
+        """
+        self._refill()
+        wait = max(0.0, (1 - self.tokens) / self.rate)
+        if max_wait is not None and wait > max_wait:
+            return None
+        self.tokens -= 1
+        return wait
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one host.
+
+    After ``failure_threshold`` failures in a row the circuit opens and
+    every call fails fast. Once ``cooldown`` seconds have passed one call is
+    let through as a probe: success closes the circuit, failure opens it
+    again for another cool-down.
+    """
+
+    def __init__(self, *, failure_threshold: int, cooldown: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state: CircuitState = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now; claims the probe when half-open."""
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self.probing:
+                return False
+            self.probing = True
+        return True
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self.probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.probing = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Give up a claimed probe without an outcome, e.g. on cancellation."""
+        self.probing = False
+
+
+class RobotsCache:
+    """
+    Cache of robots.txt ``Crawl-delay`` values per host.
+
+    Hosts without robots.txt, or whose robots.txt cannot be fetched, are
+    cached as having no delay. Concurrent lookups for one host share a
+    single fetch. Only the first ``ROBOTS_MAX_BYTES`` are read and the whole
+    fetch must finish within ``timeout`` seconds, so a hostile robots.txt
+    cannot stall scrapes.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl: float,
+        timeout: float,
+        max_delay: float,
+        max_entries: int = 10_000,
+    ) -> None:
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_delay = max_delay
+        self.max_entries = max_entries
+        self._delays: OrderedDict[str, tuple[float, float | None]] = OrderedDict()
+        self._flight: SingleFlight[float | None] = SingleFlight()
+
+    async def crawl_delay(self, client: httpx.AsyncClient, url: str) -> float | None:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}".lower()
+        cached = self._delays.get(origin)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        delay = await self._flight.do(origin, lambda: self._fetch(client, origin))
+        self._delays[origin] = (time.monotonic() + self.ttl, delay)
+        self._delays.move_to_end(origin)
+        while len(self._delays) > self.max_entries:
+            self._delays.popitem(last=False)
+        return delay
+
+    async def _fetch(self, client: httpx.AsyncClient, origin: str) -> float | None:
+        parser = await read_robots_txt(client, origin, timeout=self.timeout)
+        if parser is None:
+            return None
+        delay = parser.crawl_delay(DEFAULT_HEADERS["User-Agent"])
+        if delay is None:
+            return None
+        return min(float(delay), self.max_delay)
+
+    def clear(self) -> None:
+        self._delays.clear()
+
+
+async def read_robots_txt(
+    client: httpx.AsyncClient, origin: str, *, timeout: float
+) -> RobotFileParser | None:
+    """
+    Fetch and parse the robots.txt of an origin such as ``https://host``.
+
+    Returns:
+        The parsed file, or None if the host has none or it cannot be read
+        within ``timeout`` seconds.
+    """
+    try:
+        body = await asyncio.wait_for(
+            _read_robots(client, f"{origin}/robots.txt", timeout), timeout=timeout
+        )
+    except (httpx.HTTPError, asyncio.TimeoutError) as e:
+        logger.debug(f"Could not fetch robots.txt for {origin}: {e!r}")
+        return None
+    if body is None:
+        return None
+    parser = RobotFileParser()
+    parser.parse(body.decode("utf-8", errors="replace").splitlines())
+    return parser
+
+
+async def _read_robots(
+    client: httpx.AsyncClient, url: str, timeout: float
+) -> bytes | None:
+    async with client.stream("GET", url, timeout=timeout) as response:
+        content_type = response.headers.get("Content-Type", "")
+        mime_type = content_type.split(";")[0].strip().lower()
+        if response.status_code != 200 or mime_type not in ROBOTS_CONTENT_TYPES:
+            return None
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body += chunk
+            if len(body) >= ROBOTS_MAX_BYTES:
+                break
+    # Drop the last, possibly cut, line along with anything past the cap
+    if len(body) >= ROBOTS_MAX_BYTES:
+        del body[body.rfind(b"\n", 0, ROBOTS_MAX_BYTES) + 1 :]
+    return bytes(body)
+
+
+class HostState:
+    """Rate limit, circuit breaker and recent header latencies of one host."""
+
+    __slots__ = ("bucket", "breaker", "latencies")
+
+    def __init__(
+        self, bucket: TokenBucket, breaker: CircuitBreaker, latency_window: int
+    ) -> None:
+        self.bucket = bucket
+        self.breaker = breaker
+        self.latencies: deque[float] = deque(maxlen=latency_window)
+
+
+class HostScheduler:
+    """
+    Per-host rate limiting, robots.txt crawl delays and circuit breaking.
+
+    Args:
+        rate: Requests per second allowed to one host.
+        burst: Requests allowed back to back before the rate applies.
+        max_wait: Seconds a scrape may wait for its turn before failing.
+        failure_threshold: Consecutive failures that open a host's circuit.
+        cooldown: Seconds an open circuit waits before probing the host.
+        robots: Crawl-delay cache, or None to ignore robots.txt.
+        max_hosts: Hosts tracked at once; the least recently used are dropped.
+        latency_window: Header latencies kept per host for ``hedge_delay``.
+    """
+
+    def __init__(
+        self,
+        *,
+        rate: float,
+        burst: int,
+        max_wait: float,
+        failure_threshold: int,
+        cooldown: float,
+        robots: RobotsCache | None = None,
+        max_hosts: int = 10_000,
+        latency_window: int = 100,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.robots = robots
+        self.max_hosts = max_hosts
+        self.latency_window = latency_window
+        self._hosts: OrderedDict[str, HostState] = OrderedDict()
+        # Hosts whose circuit is not closed, for the aggregate gauge
+        self._tripped: set[str] = set()
+
+    @classmethod
+    def from_settings(cls) -> "HostScheduler":
+        robots = None
+        if settings.SCRAPER_RESPECT_ROBOTS_CRAWL_DELAY:
+            robots = RobotsCache(
+                ttl=settings.SCRAPER_ROBOTS_TTL_SECONDS,
+                timeout=settings.SCRAPER_CONNECT_TIMEOUT,
+                max_delay=settings.SCRAPER_ROBOTS_MAX_CRAWL_DELAY,
+            )
+        return cls(
+            rate=settings.SCRAPER_HOST_RATE,
+            burst=settings.SCRAPER_HOST_BURST,
+            max_wait=settings.SCRAPER_HOST_MAX_WAIT,
+            failure_threshold=settings.SCRAPER_BREAKER_FAILURE_THRESHOLD,
+            cooldown=settings.SCRAPER_BREAKER_COOLDOWN,
+            robots=robots,
+            latency_window=settings.SCRAPER_HEDGE_LATENCY_WINDOW,
+        )
+
+    def _state(self, host: str) -> HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = HostState(
+                TokenBucket(rate=self.rate, burst=self.burst),
+                CircuitBreaker(
+                    failure_threshold=self.failure_threshold, cooldown=self.cooldown
+                ),
+                self.latency_window,
+            )
+            self._hosts[host] = state
+            while len(self._hosts) > self.max_hosts:
+                evicted, _ = self._hosts.popitem(last=False)
+                self._tripped.discard(evicted)
+        self._hosts.move_to_end(host)
+        return state
+
+    def circuit_state(self, host: str) -> CircuitState:
+        state = self._hosts.get(host)
+        return state.breaker.state if state else "closed"
+
+    def record_header_latency(self, url: str, seconds: float) -> None:
+        """Record how long a host took to send response headers."""
+        self._state(_host(url)).latencies.append(seconds)
+
+    def hedge_delay(self, url: str, min_samples: int) -> float | None:
+        """
+        The host's 95th percentile time to response headers.
+
+        Returns:
+            The percentile, or None with fewer than ``min_samples`` samples.
+        """
+        state = self._hosts.get(_host(url))
+        if state is None or len(state.latencies) < max(1, min_samples):
+            return None
+        ordered = sorted(state.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def try_reserve(self, url: str) -> bool:
+        """Take a rate limit token for an extra request if one is free now."""
+        state = self._state(_host(url))
+        if state.breaker.state != "closed":
+            return False
+        return state.bucket.reserve(max_wait=0.0) is not None
+
+    @asynccontextmanager
+    async def slot(self, client: httpx.AsyncClient, url: str) -> AsyncIterator[None]:
+        """
+        Wait for a host's turn, then run the body and record its outcome.
+
+        Raises:
+            HostUnavailableError: If the host's circuit is open or the wait
+                for its rate limit would exceed ``max_wait``.
+        """
+        host = _host(url)
+        state = self._state(host)
+        breaker = state.breaker
+        if not breaker.allow():
+            SCRAPER_HOST_REJECTIONS.labels(reason="circuit_open").inc()
+            raise HostUnavailableError(host, f"{host} is failing, try again later")
+
+        try:
+            await self._wait_turn(client, url, host, state)
+            yield
+        except BaseException as e:
+            if is_host_failure(e):
+                breaker.record_failure()
+                if breaker.state == "open":
+                    logger.warning(f"Circuit for {host} opened after failures")
+            else:
+                # Cancelled, rejected or failed for a reason unrelated to the host
+                breaker.release()
+            raise
+        else:
+            breaker.record_success()
+        finally:
+            self._track_circuit(host, breaker)
+
+    def _track_circuit(self, host: str, breaker: CircuitBreaker) -> None:
+        if breaker.state == "closed":
+            self._tripped.discard(host)
+        else:
+            self._tripped.add(host)
+        states = [
+            self._hosts[h].breaker.state for h in self._tripped if h in self._hosts
+        ]
+        SCRAPER_CIRCUITS.labels(state="open").set(states.count("open"))
+        SCRAPER_CIRCUITS.labels(state="half_open").set(states.count("half_open"))
+
+    async def _wait_turn(
+        self, client: httpx.AsyncClient, url: str, host: str, state: HostState
+    ) -> None:
+        if self.robots is not None:
+            delay = await self.robots.crawl_delay(client, url)
+            if delay:
+                state.bucket.configure(rate=min(self.rate, 1 / delay), burst=1)
+        wait = state.bucket.reserve(self.max_wait)
+        if wait is None:
+            SCRAPER_HOST_REJECTIONS.labels(reason="queue_full").inc()
+            raise HostUnavailableError(host, f"Too many scrapes queued for {host}")
+        if wait > 0:
+            state.bucket.waiting += 1
+            SCRAPER_HOST_QUEUE_DEPTH.inc()
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                state.bucket.waiting -= 1
+                SCRAPER_HOST_QUEUE_DEPTH.dec()
+
+    def reset(self) -> None:
+        """Forget every host's state and cached robots.txt."""
+        self._hosts.clear()
+        self._tripped.clear()
+        SCRAPER_CIRCUITS.labels(state="open").set(0)
+        SCRAPER_CIRCUITS.labels(state="half_open").set(0)
+        if self.robots is not None:
+            self.robots.clear()
+
+
+def _host(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+host_scheduler = HostScheduler.from_settings()
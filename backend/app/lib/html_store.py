@@ -0,0 +1,244 @@
+"""Content-addressed store of fetched recipe page HTML.
+
+When ``SCRAPER_HTML_STORE`` is enabled the scraper keeps the HTML of every
+page it downloads, so saved recipes can be re-parsed offline when
+``recipe-scrapers`` improves (see ``app.lib.recipe_reparse``) instead of
+fetching every page again.
+
+Pages are addressed by the SHA-256 of their bytes and compressed with
+zstd or gzip, so a page scraped many times, or reached through several
+URLs, is stored once. Two backends are available:
+
+- ``disk``: one file per page under ``SCRAPER_HTML_STORE_DIR``
+- ``database``: rows of the ``HtmlBlob`` table
+
+Either way a ``StoredPage`` row, written by ``record_page`` after every
+download, maps each normalized URL to the digest of the page last fetched
+from it, along with the response's ETag and Last-Modified validators.
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+from functools import cache
+from pathlib import Path
+from typing import Literal
+
+import zstandard
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine
+from app.lib.scrape_cache import normalize_url
+from app.models import HtmlBlob, StoredPage
+from app.models.base import get_datetime_utc
+
+logger = logging.getLogger(__name__)
+
+Codec = Literal["zstd", "gzip"]
+SUFFIXES: dict[Codec, str] = {"zstd": ".zst", "gzip": ".gz"}
+
+
+def content_digest(content: bytes | bytearray) -> str:
+    """SHA-256 hex digest addressing a page in the store."""
+    return hashlib.sha256(content).hexdigest()
+
+
+def compress(content: bytes | bytearray, codec: Codec) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(
+            level=settings.SCRAPER_HTML_ZSTD_LEVEL
+        ).compress(content)
+    return gzip.compress(content)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        # Frames written by compress() record their size, so no max is needed
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class HtmlStore:
+    """
+    Base class of the HTML store backends.
+
+    Args:
+        codec: Compression used for new pages. Pages already stored with
+            the other codec can still be read.
+    """
+
+    def __init__(self, *, codec: Codec) -> None:
+        self.codec = codec
+
+    def put(self, *, session: Session, content: bytes | bytearray) -> str:
+        """Store a page unless it is already stored, and return its digest."""
+        raise NotImplementedError
+
+    def get(self, *, session: Session, digest: str) -> bytes | None:
+        """Return the uncompressed page with a digest, or None if missing."""
+        raise NotImplementedError
+
+
+class DiskHtmlStore(HtmlStore):
+    """
+    Pages stored as compressed files, fanned out by digest prefix.
+
+    Args:
+        root: Directory holding the store, created when needed.
+        codec: Compression used for new pages.
+    """
+
+    def __init__(self, *, root: Path, codec: Codec) -> None:
+        super().__init__(codec=codec)
+        self.root = root
+
+    def path(self, digest: str, codec: Codec) -> Path:
+        return self.root / digest[:2] / digest[2:4] / (digest + SUFFIXES[codec])
+
+    def put(self, *, session: Session, content: bytes | bytearray) -> str:
+        digest = content_digest(content)
+        if any(self.path(digest, codec).exists() for codec in SUFFIXES):
+            return digest
+        path = self.path(digest, self.codec)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial page
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(compress(content, self.codec))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return digest
+
+    def get(self, *, session: Session, digest: str) -> bytes | None:
+        for codec in SUFFIXES:
+            path = self.path(digest, codec)
+            if path.exists():
+                return decompress(path.read_bytes(), codec)
+        return None
+
+
+class DatabaseHtmlStore(HtmlStore):
+    """Pages stored as compressed ``HtmlBlob`` rows in Postgres."""
+
+    def put(self, *, session: Session, content: bytes | bytearray) -> str:
+        digest = content_digest(content)
+        if session.get(HtmlBlob, digest) is not None:
+            return digest
+        statement = insert(HtmlBlob).values(
+            digest=digest,
+            codec=self.codec,
+            size=len(content),
+            data=compress(content, self.codec),
+            created_at=get_datetime_utc(),
+        )
+        # Another worker may store the same page at the same time
+        session.execute(statement.on_conflict_do_nothing(index_elements=["digest"]))
+        return digest
+
+    def get(self, *, session: Session, digest: str) -> bytes | None:
+        blob = session.get(HtmlBlob, digest)
+        if blob is None:
+            return None
+        return decompress(blob.data, blob.codec)
+
+
+@cache
+def _build_html_store(backend: str, directory: str, codec: Codec) -> HtmlStore:
+    if backend == "disk":
+        return DiskHtmlStore(root=Path(directory), codec=codec)
+    return DatabaseHtmlStore(codec=codec)
+
+
+def get_html_store() -> HtmlStore | None:
+    """The HTML store configured in the settings, or None when it is off."""
+    if settings.SCRAPER_HTML_STORE == "off":
+        return None
+    return _build_html_store(
+        settings.SCRAPER_HTML_STORE,
+        settings.SCRAPER_HTML_STORE_DIR,
+        settings.SCRAPER_HTML_COMPRESSION,
+    )
+
+
+def record_page(
+    *,
+    session: Session,
+    url: str,
+    content: bytes | bytearray | None,
+    encoding: str,
+    etag: str | None = None,
+    last_modified: str | None = None,
+) -> str | None:
+    """
+    Record the latest fetch of a URL in its ``StoredPage`` row.
+
+    Args:
+        content: The whole page, or None if only part of it was read. It
+            is kept in the HTML store when one is configured.
+        etag: ETag response header, for conditional refreshes.
+        last_modified: Last-Modified response header, likewise.
+
+    Returns:
+        The page's digest, or None if only part of it was read.
+    """
+    digest = None
+    if content is not None:
+        store = get_html_store()
+        if store is None:
+            digest = content_digest(content)
+        else:
+            digest = store.put(session=session, content=content)
+    now = get_datetime_utc()
+    values = {
+        "url_key": normalize_url(url),
+        "url": url,
+        "digest": digest,
+        "encoding": encoding,
+        "etag": etag,
+        "last_modified": last_modified,
+        "fetched_at": now,
+        "checked_at": now,
+    }
+    statement = insert(StoredPage).values(**values)
+    statement = statement.on_conflict_do_update(
+        index_elements=["url_key"],
+        set_={k: v for k, v in values.items() if k != "url_key"},
+    )
+    session.execute(statement)
+    session.commit()
+    return digest
+
+
+def record_fetched_page(
+    url: str,
+    content: bytes | bytearray | None,
+    encoding: str,
+    etag: str | None,
+    last_modified: str | None,
+) -> str | None:
+    """
+    ``record_page`` in its own session, for the scraper to run in a thread.
+
+    A failure is logged and does not fail the scrape.
+    """
+    try:
+        with Session(engine) as session:
+            return record_page(
+                session=session,
+                url=url,
+                content=content,
+                encoding=encoding,
+                etag=etag,
+                last_modified=last_modified,
+            )
+    except (OSError, SQLAlchemyError, zstandard.ZstdError) as e:
+        logger.warning(f"Could not record the fetch of {url}: {e}")
+        return None
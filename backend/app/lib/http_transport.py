@@ -0,0 +1,268 @@
+"""Pluggable transports for the scraper's HTTP client.
+
+``SCRAPER_TRANSPORT`` picks where the requests of ``build_http_client``
+go, so the scraping path can be tested and load-tested without depending
+on real recipe sites:
+
+- ``live``: the network
+- ``record``: the network, saving every response to a cassette directory
+- ``replay``: the cassette directory only, failing requests it has no
+  response for
+- ``mock_site``: a local mock recipe site (``benchmarks/mock_site.py``);
+  every request is sent to it with its original Host header, so it can
+  serve each site's pages with realistic latency and errors while the
+  scraper still sees the real URLs
+
+A cassette is a ``<key>.json`` file with the request URL, status code and
+headers, next to a ``<key>.body`` file with the body as it was received,
+still content-encoded. The key is a digest of the method and URL.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections.abc import AsyncIterator, Iterator
+from pathlib import Path
+from typing import NamedTuple
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Hop-by-hop and length headers that no longer describe a replayed body
+DROPPED_HEADERS = {"connection", "content-length", "keep-alive", "transfer-encoding"}
+
+
+class CassetteMissError(httpx.TransportError):
+    """Raised when replaying a request that was never recorded."""
+
+
+class Cassette(NamedTuple):
+    """A recorded response."""
+
+    method: str
+    url: str
+    status_code: int
+    headers: list[tuple[str, str]]
+    body: bytes
+
+
+class CassetteStore:
+    """Directory of recorded responses, one pair of files per request."""
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+
+    @staticmethod
+    def key(method: str, url: str) -> str:
+        return hashlib.sha256(f"{method.upper()} {url}".encode()).hexdigest()
+
+    def load(self, method: str, url: str) -> Cassette | None:
+        return self._read(self.directory / self.key(method, url))
+
+    def save(self, cassette: Cassette) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / self.key(cassette.method, cassette.url)
+        meta = {
+            "method": cassette.method,
+            "url": cassette.url,
+            "status_code": cassette.status_code,
+            "headers": cassette.headers,
+        }
+        # Write the body first so a metadata file always has its body
+        _write_atomic(path.with_suffix(".body"), cassette.body)
+        _write_atomic(path.with_suffix(".json"), json.dumps(meta, indent=1).encode())
+
+    def __iter__(self) -> Iterator[Cassette]:
+        for meta_path in sorted(self.directory.glob("*.json")):
+            cassette = self._read(meta_path.with_suffix(""))
+            if cassette is not None:
+                yield cassette
+
+    @staticmethod
+    def _read(path: Path) -> Cassette | None:
+        try:
+            meta = json.loads(path.with_suffix(".json").read_bytes())
+            body = path.with_suffix(".body").read_bytes()
+        except FileNotFoundError:
+            return None
+        return Cassette(
+            method=meta["method"],
+            url=meta["url"],
+            status_code=meta["status_code"],
+            headers=[(name, value) for name, value in meta["headers"]],
+            body=body,
+        )
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+class _RecordingStream(httpx.AsyncByteStream):
+    """
+    Pass a response body through while keeping a copy of it.
+
+    The scraper often stops reading at the JSON-LD recipe, so on close the
+    rest of the body is read too and the whole of it recorded. Bodies past
+    ``max_bytes`` are passed through but not recorded.
+    """
+
+    def __init__(
+        self,
+        response: httpx.Response,
+        store: CassetteStore,
+        request: httpx.Request,
+        max_bytes: int,
+    ) -> None:
+        self.response = response
+        self.store = store
+        self.request = request
+        self.max_bytes = max_bytes
+        self.body: bytearray | None = bytearray()
+        assert isinstance(response.stream, httpx.AsyncByteStream)
+        self._chunks = aiter(response.stream)
+        self._done = False
+
+    def _keep(self, chunk: bytes) -> None:
+        if self.body is None:
+            return
+        self.body += chunk
+        if len(self.body) > self.max_bytes:
+            logger.warning(f"Not recording {self.request.url}, body is too large")
+            self.body = None
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in self._chunks:
+                self._keep(chunk)
+                yield chunk
+        except Exception:
+            # A cut body must not be completed by aclose and recorded
+            self.body = None
+            raise
+        self._done = True
+
+    async def aclose(self) -> None:
+        try:
+            if not self._done and self.body is not None:
+                async for chunk in self._chunks:
+                    self._keep(chunk)
+                    if self.body is None:
+                        break
+                else:
+                    self._done = True
+        except httpx.HTTPError as e:
+            logger.warning(f"Not recording {self.request.url}: {e!r}")
+            self.body = None
+        finally:
+            await self.response.aclose()
+        if self._done and self.body is not None:
+            cassette = Cassette(
+                method=self.request.method,
+                url=str(self.request.url),
+                status_code=self.response.status_code,
+                headers=[
+                    (name, value)
+                    for name, value in self.response.headers.multi_items()
+                    if name.lower() not in DROPPED_HEADERS
+                ],
+                body=bytes(self.body),
+            )
+            await asyncio.to_thread(self.store.save, cassette)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Send requests through another transport and record the responses."""
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        store: CassetteStore,
+        *,
+        max_bytes: int,
+    ) -> None:
+        self.transport = transport
+        self.store = store
+        self.max_bytes = max_bytes
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.transport.handle_async_request(request)
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_RecordingStream(response, self.store, request, self.max_bytes),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Answer requests from recorded responses only."""
+
+    def __init__(self, store: CassetteStore) -> None:
+        self.store = store
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        cassette = await asyncio.to_thread(
+            self.store.load, request.method, str(request.url)
+        )
+        if cassette is None:
+            raise CassetteMissError(
+                f"No recorded response for {request.method} {request.url}",
+                request=request,
+            )
+        return httpx.Response(
+            status_code=cassette.status_code,
+            headers=cassette.headers,
+            stream=httpx.ByteStream(cassette.body),
+            extensions={"http_version": b"HTTP/1.1"},
+        )
+
+
+class MockSiteTransport(httpx.AsyncBaseTransport):
+    """Send every request to one local server, keeping its Host header."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, base_url: str) -> None:
+        self.transport = transport
+        self.base_url = httpx.URL(base_url)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # The Host header was set from the original URL and is left as is
+        request.url = request.url.copy_with(
+            scheme=self.base_url.scheme,
+            host=self.base_url.host,
+            port=self.base_url.port,
+        )
+        return await self.transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def build_transport(transport: httpx.AsyncBaseTransport) -> httpx.AsyncBaseTransport:
+    """
+    Wrap the network transport as configured by ``SCRAPER_TRANSPORT``.
+
+    Args:
+        transport: The transport that talks to the network.
+    """
+    mode = settings.SCRAPER_TRANSPORT
+    if mode == "record":
+        store = CassetteStore(settings.SCRAPER_CASSETTE_DIR)
+        return RecordingTransport(
+            transport, store, max_bytes=settings.SCRAPER_MAX_PAGE_BYTES
+        )
+    if mode == "replay":
+        return ReplayTransport(CassetteStore(settings.SCRAPER_CASSETTE_DIR))
+    if mode == "mock_site":
+        return MockSiteTransport(transport, settings.SCRAPER_MOCK_SITE_URL)
+    return transport
@@ -0,0 +1,145 @@
+"""Prometheus metrics for the recipe scraper.
+
+Metrics are served at ``/metrics`` (see ``app.main``) to scrapers that send
+``METRICS_TOKEN`` as a bearer token. The API runs several worker processes,
+so when ``PROMETHEUS_MULTIPROC_DIR`` is set the endpoint aggregates the
+samples every worker writes to that directory; without it each worker
+reports only its own samples.
+"""
+
+import os
+import secrets
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    make_asgi_app,
+    multiprocess,
+)
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+PHASE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+RECIPE_PARSE_SECONDS = Histogram(
+    "recipe_parse_seconds",
+    "Time spent turning a fetched recipe page into recipe data",
+    ["path"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+# Host-level scheduler state is aggregated so the series count stays bounded
+SCRAPER_HOST_QUEUE_DEPTH = Gauge(
+    "scraper_host_queue_depth",
+    "Scrapes waiting for a host's rate limit",
+    multiprocess_mode="livesum",
+)
+SCRAPER_CIRCUITS = Gauge(
+    "scraper_circuits",
+    "Hosts whose circuit breaker is not closed, by state",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+SCRAPER_HOST_REJECTIONS = Counter(
+    "scraper_host_rejections_total",
+    "Scrapes failed fast by the host scheduler",
+    ["reason"],
+)
+SCRAPER_RETRIES = Counter(
+    "scraper_retries_total",
+    "Page fetches attempted again, by the reason of the failure",
+    ["reason"],
+)
+SCRAPER_HEDGES = Counter(
+    "scraper_hedged_requests_total",
+    "Hedged page requests by the request that answered first",
+    ["winner"],
+)
+SCRAPER_RETRY_BUDGET_EXHAUSTED = Counter(
+    "scraper_retry_budget_exhausted_total",
+    "Retries and hedged requests not sent for lack of retry budget",
+    ["kind"],
+)
+
+# Per-host scrape metrics, hosts are labelled through host_label()
+SCRAPE_PHASE_SECONDS = Histogram(
+    "scrape_phase_seconds",
+    "Time spent in each phase of a recipe scrape",
+    ["phase", "host"],
+    buckets=PHASE_BUCKETS,
+)
+RECIPE_FIELD_SECONDS = Histogram(
+    "recipe_field_seconds",
+    "Time the full scraper spent computing each recipe field",
+    ["field", "host"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+SCRAPE_RESPONSE_BYTES = Histogram(
+    "scrape_response_bytes",
+    "Bytes of recipe page downloaded per scrape",
+    ["host"],
+    buckets=(16e3, 64e3, 128e3, 256e3, 512e3, 1e6, 2e6, 5e6),
+)
+SCRAPES = Counter(
+    "scrapes_total",
+    "Recipe scrapes by host, parse path and outcome",
+    ["host", "path", "outcome"],
+)
+RECIPE_REFRESHES = Counter(
+    "recipe_refreshes_total",
+    "Conditional refreshes of saved recipe pages by outcome",
+    ["outcome"],
+)
+
+_labelled_hosts: set[str] = set()
+
+
+def host_label(host: str) -> str:
+    """
+    Metric label for a host.
+
+    The first ``SCRAPER_METRICS_MAX_HOSTS`` hosts a process sees keep their
+    name and later ones are reported as "other", so arbitrary user-supplied
+    URLs cannot grow the number of series without bound.
+    """
+    if not host:
+        return "unknown"
+    if host in _labelled_hosts:
+        return host
+    if len(_labelled_hosts) < settings.SCRAPER_METRICS_MAX_HOSTS:
+        _labelled_hosts.add(host)
+        return host
+    return "other"
+
+
+def make_metrics_app() -> ASGIApp:
+    """Build the token-protected ASGI app serving every worker's metrics."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)  # type: ignore[no-untyped-call]
+        metrics_app = make_asgi_app(registry=registry)
+    else:
+        metrics_app = make_asgi_app(registry=REGISTRY)
+
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        token = settings.METRICS_TOKEN
+        if not token:
+            response = PlainTextResponse("Not Found", status_code=404)
+            return await response(scope, receive, send)
+        headers = dict(scope.get("headers", []))
+        authorization = headers.get(b"authorization", b"").decode("latin-1")
+        if not secrets.compare_digest(authorization, f"Bearer {token}"):
+            response = PlainTextResponse(
+                "Unauthorized",
+                status_code=401,
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+            return await response(scope, receive, send)
+        await metrics_app(scope, receive, send)
+
+    return app
@@ -0,0 +1,105 @@
+"""Keyset pagination of listings ordered by creation time.
+
+``OFFSET`` makes the database read and discard every row before the page,
+so deep pages get slower the larger the table. A keyset page instead
+starts right after the last row of the previous page: rows are ordered
+by ``(created_at, id)``, newest first, and the next page is everything
+below the last row's key, which a composite index on those columns finds
+directly. Page 500 then costs the same as page 1.
+
+The key of the last row is handed to clients as an opaque cursor, and
+skip/limit paging keeps working for older clients.
+"""
+
+import base64
+import binascii
+import json
+import uuid
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any, TypeVar
+
+from sqlalchemy import and_, or_, tuple_
+from sqlmodel import Session, col
+from sqlmodel.sql.expression import SelectOfScalar
+
+T = TypeVar("T")
+
+
+def encode_cursor(created_at: datetime | None, id: uuid.UUID) -> str:
+    """Opaque cursor pointing after a row."""
+    key = [None if created_at is None else created_at.isoformat(), str(id)]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime | None, uuid.UUID]:
+    """
+    The row key a cursor points after.
+
+    Raises:
+        ValueError: If the cursor was not made by encode_cursor.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, id = json.loads(raw)
+        return (
+            None if created_at is None else datetime.fromisoformat(created_at),
+            uuid.UUID(id),
+        )
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def paginate(
+    session: Session,
+    statement: SelectOfScalar[T],
+    model: Any,
+    *,
+    cursor: str | None,
+    skip: int,
+    limit: int,
+) -> tuple[Sequence[T], str | None]:
+    """
+    Read one page of a select, newest first.
+
+    Args:
+        session: Database session.
+        statement: Select of ``model`` rows, with any filters.
+        model: Table model with ``created_at`` and ``id`` columns.
+        cursor: Cursor of the previous page, which replaces ``skip``.
+        skip: Rows to skip, when there is no cursor.
+        limit: Rows per page.
+
+    Returns:
+        The page's rows, and the cursor of the next page, or None if this
+        is the last one.
+
+    Raises:
+        ValueError: If the cursor is invalid.
+    """
+    created_at, id = col(model.created_at), col(model.id)
+    # Descending order puts rows without a creation time first, as the
+    # backward scan of the index does
+    statement = statement.order_by(created_at.desc().nulls_first(), id.desc())
+    if cursor is not None:
+        after_created_at, after_id = decode_cursor(cursor)
+        if after_created_at is None:
+            statement = statement.where(
+                or_(
+                    and_(created_at.is_(None), id < after_id),
+                    created_at.is_not(None),
+                )
+            )
+        else:
+            statement = statement.where(
+                tuple_(created_at, id) < tuple_(after_created_at, after_id)
+            )
+    elif skip:
+        statement = statement.offset(skip)
+    # One row more than asked tells whether there is a next page
+    rows = session.exec(statement.limit(limit + 1)).all()
+    if len(rows) <= limit or limit <= 0:
+        return rows[:limit], None
+    rows = rows[:limit]
+    last: Any = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
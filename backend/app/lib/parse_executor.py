@@ -0,0 +1,220 @@
+"""Executor that keeps recipe parsing off the event loop.
+
+BeautifulSoup parsing of a large recipe page takes hundreds of milliseconds
+of pure CPU. Running it on the event loop stalls every other request served
+by the worker, so ``scrape_recipe_from_url`` hands the raw HTML to a
+``ParseExecutor`` instead. A process pool spreads parsing over other cores;
+a thread pool is available where processes are not an option.
+
+Workers are recycled after a configurable number of tasks, process workers
+run under an address-space limit, and every task has a deadline after which
+the pool is torn down and replaced. At most ``max_workers`` tasks are handed
+to the pool at a time, so the deadline covers running time rather than time
+spent queued, and tasks that were killed only because they shared the pool
+with a timed-out task are re-run once on the new pool.
+
+Thread pools cannot enforce either limit: a thread cannot be stopped, so a
+timed-out parse keeps running in the background, and the address-space cap
+is process-wide. Use them only where processes are not an option.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import weakref
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Literal, TypeVar
+
+from app.core.config import settings
+from app.lib.recipe_parser import limit_worker_memory, parse_recipe_html
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+ExecutorKind = Literal["process", "thread"]
+
+
+class ParseError(Exception):
+    """Raised when a parse worker crashes or runs out of memory."""
+
+
+class ParseTimeoutError(ParseError):
+    """Raised when parsing a page takes longer than the configured deadline."""
+
+
+class _PoolKilled(Exception):
+    """A task's pool was torn down because of another task's timeout."""
+
+
+class ParseExecutor:
+    """
+    Pool of parse workers with task-count recycling and per-task limits.
+
+    Args:
+        kind: "process" for a process pool, "thread" for a thread pool.
+        max_workers: Number of workers in the pool.
+        max_tasks_per_worker: Replace the pool after this many tasks per worker.
+        max_memory_mb: Address-space cap per process worker (process pools only).
+        timeout: Seconds a single parse may take before it is abandoned.
+    """
+
+    def __init__(
+        self,
+        *,
+        kind: ExecutorKind = "process",
+        max_workers: int = 2,
+        max_tasks_per_worker: int = 100,
+        max_memory_mb: int | None = None,
+        timeout: float | None = None,
+    ) -> None:
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.max_memory_mb = max_memory_mb
+        self.timeout = timeout
+        self._pool: Executor | None = None
+        self._tasks_in_pool = 0
+        self._slots = asyncio.Semaphore(max_workers)
+        # Pools torn down because one of their tasks timed out
+        self._killed_pools: weakref.WeakSet[Executor] = weakref.WeakSet()
+        if kind == "thread" and (max_memory_mb or timeout):
+            logger.warning(
+                "Thread parse executor cannot stop timed-out parses or cap their memory"
+            )
+
+    @classmethod
+    def from_settings(cls) -> "ParseExecutor":
+        return cls(
+            kind=settings.SCRAPER_PARSE_EXECUTOR,
+            max_workers=settings.SCRAPER_PARSE_WORKERS,
+            max_tasks_per_worker=settings.SCRAPER_PARSE_MAX_TASKS_PER_WORKER,
+            max_memory_mb=settings.SCRAPER_PARSE_MAX_MEMORY_MB,
+            timeout=settings.SCRAPER_PARSE_TIMEOUT,
+        )
+
+    def _new_pool(self) -> Executor:
+        if self.kind == "thread":
+            return ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="recipe-parse"
+            )
+        # spawn avoids forking a process that already runs an event loop and threads
+        context = multiprocessing.get_context("spawn")
+        initializer = None
+        initargs: tuple[Any, ...] = ()
+        if self.max_memory_mb:
+            initializer = limit_worker_memory
+            initargs = (self.max_memory_mb,)
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            initializer=initializer,
+            initargs=initargs,
+        )
+
+    def _get_pool(self) -> Executor:
+        if (
+            self._pool is not None
+            and self._tasks_in_pool >= self.max_tasks_per_worker * self.max_workers
+        ):
+            # Let in-flight tasks finish on the old pool, new work goes to a fresh one
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        if self._pool is None:
+            self._pool = self._new_pool()
+            self._tasks_in_pool = 0
+        self._tasks_in_pool += 1
+        return self._pool
+
+    def _kill_pool(self, pool: Executor) -> None:
+        if self._pool is pool:
+            self._pool = None
+        self._killed_pools.add(pool)
+        if isinstance(pool, ProcessPoolExecutor):
+            # ProcessPoolExecutor has no public API to stop a running task.
+            # _processes is None once the pool has already been shut down.
+            processes = getattr(pool, "_processes", None) or {}
+            for process in list(processes.values()):
+                process.terminate()
+        # Tasks still on the pool fail with BrokenProcessPool rather than
+        # being cancelled, so run() can tell them apart and re-run them
+        pool.shutdown(wait=False)
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Run ``fn(*args)`` on the pool, enforcing the per-task deadline.
+
+        Raises:
+            ParseTimeoutError: If the task exceeds the deadline.
+            ParseError: If the worker crashed or ran out of memory.
+        """
+        async with self._slots:
+            try:
+                return await self._run_once(fn, *args)
+            except _PoolKilled:
+                logger.info("Parse task lost to a recycled pool, running it again")
+            try:
+                return await self._run_once(fn, *args)
+            except _PoolKilled:
+                raise ParseError("Parse worker crashed")
+
+    async def _run_once(self, fn: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        future = loop.run_in_executor(pool, partial(fn, *args))
+        try:
+            return await asyncio.wait_for(future, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Parse task exceeded {self.timeout}s, recycling {self.kind} pool"
+            )
+            self._kill_pool(pool)
+            raise ParseTimeoutError(f"Parsing took longer than {self.timeout}s")
+        except BrokenProcessPool as e:
+            if pool in self._killed_pools:
+                # Another task's timeout took this pool down, not this task
+                raise _PoolKilled from e
+            logger.error(f"Parse worker died: {e}")
+            self._kill_pool(pool)
+            raise ParseError("Parse worker crashed")
+        except MemoryError:
+            logger.error("Parse worker ran out of memory")
+            raise ParseError("Parsing exceeded the memory limit")
+
+    async def parse(self, html: str, url: str) -> dict[str, Any]:
+        """Parse recipe HTML on the pool and return the scraper's JSON dict."""
+        return await self.run(parse_recipe_html, html, url)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+_executor: ParseExecutor | None = None
+
+
+def init_parse_executor() -> ParseExecutor:
+    """Create the worker's parse executor if it does not exist yet."""
+    global _executor
+    if _executor is None:
+        _executor = ParseExecutor.from_settings()
+        logger.info(f"Recipe parse executor started ({_executor.kind})")
+    return _executor
+
+
+def close_parse_executor() -> None:
+    """Shut down the parse executor and its workers."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+        logger.info("Recipe parse executor stopped")
+
+
+def get_parse_executor() -> ParseExecutor | None:
+    """Return the parse executor, or None outside of the application lifespan."""
+    return _executor
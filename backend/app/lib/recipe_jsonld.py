@@ -0,0 +1,283 @@
+"""Fast path for recipe pages that embed schema.org JSON-LD.
+
+Most recipe sites publish the recipe as a schema.org ``Recipe`` object in a
+``<script type="application/ld+json">`` block. Finding those blocks with a
+regular expression over the raw bytes and decoding them with ``json`` is a
+small fraction of the cost of building the full DOM that
+``recipe_scrapers.scrape_html`` needs, so the scraper tries this first and
+only runs the full scraper when no complete recipe is found.
+``JsonLdRecipeScanner`` does the search incrementally while the page is
+still downloading, so the download can stop as soon as the recipe is in.
+
+Field normalization reuses the helpers ``recipe_scrapers`` applies to the
+same schema.org data, so both paths produce the same values.
+"""
+
+import json
+import re
+from itertools import chain
+from typing import Any
+from urllib.parse import urlsplit
+
+from recipe_scrapers._utils import get_minutes, get_yields, normalize_string
+
+JSONLD_SCRIPT_RE = re.compile(
+    rb"<script[^>]*?type\s*=\s*[\"']?application/ld\+json[\"']?[^>]*>(.*?)</script\s*>",
+    re.IGNORECASE | re.DOTALL,
+)
+JSONLD_OPEN_RE = re.compile(
+    rb"<script[^>]*?type\s*=\s*[\"']?application/ld\+json", re.IGNORECASE
+)
+
+# Fields a recipe needs before the fast path result is trusted
+REQUIRED_FIELDS = ("title", "ingredients", "instruction_list")
+
+
+def _is_type(node: dict[str, Any], schema_type: str) -> bool:
+    types = node.get("@type", "")
+    if not isinstance(types, list):
+        types = [types]
+    return any(isinstance(t, str) and t.lower() == schema_type for t in types)
+
+
+def find_node(data: Any, schema_type: str) -> dict[str, Any] | None:
+    """Find the first node of a schema.org type in decoded JSON-LD."""
+    if isinstance(data, list):
+        for item in data:
+            if node := find_node(item, schema_type):
+                return node
+        return None
+    if not isinstance(data, dict):
+        return None
+    if _is_type(data, schema_type.lower()):
+        return data
+    for key in ("@graph", "mainEntity"):
+        if node := find_node(data.get(key), schema_type):
+            return node
+    return None
+
+
+def _first(value: Any) -> Any:
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def _text(value: Any) -> str | None:
+    value = _first(value)
+    if isinstance(value, dict):
+        value = value.get("name")
+    if value is None or isinstance(value, dict | list):
+        return None
+    return normalize_string(str(value)) or None
+
+
+def _minutes(value: Any) -> int | None:
+    if isinstance(value, dict):
+        value = value.get("maxValue")
+    if not value:
+        return None
+    try:
+        minutes = get_minutes(value)  # type: ignore[no-untyped-call]
+    except Exception:
+        return None
+    return int(minutes) if minutes is not None else None
+
+
+def _image(value: Any) -> str | None:
+    value = _first(value)
+    if isinstance(value, dict):
+        value = value.get("url")
+    if isinstance(value, str) and value.startswith(("http://", "https://")):
+        return value
+    return None
+
+
+def _ingredients(value: Any) -> list[str]:
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        return []
+    if value and all(isinstance(item, list) for item in value):
+        value = list(chain(*value))
+    ingredients = []
+    for item in value:
+        if isinstance(item, dict):
+            parts = [item.get("value"), item.get("unitText"), item.get("name")]
+            item = " ".join(str(p) for p in parts if p)
+        if item and (text := normalize_string(str(item))):
+            ingredients.append(text)
+    return ingredients
+
+
+def _instructions(value: Any) -> list[str]:
+    if isinstance(value, str):
+        return [line for line in map(normalize_string, value.splitlines()) if line]
+    if isinstance(value, dict):
+        if _is_type(value, "howtosection"):
+            return _instructions(value.get("itemListElement"))
+        value = value.get("itemListElement", value.get("text"))
+        return _instructions(value) if not isinstance(value, dict) else []
+    if not isinstance(value, list):
+        return []
+    steps = []
+    for item in value:
+        if isinstance(item, dict) and not _is_type(item, "howtosection"):
+            item = item.get("text") or item.get("name")
+        steps.extend(_instructions(item))
+    return steps
+
+
+def _keywords(value: Any) -> list[str] | None:
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list):
+        return None
+    return [k for k in (normalize_string(str(v)) for v in value) if k] or None
+
+
+def _joined(value: Any) -> str | None:
+    if isinstance(value, list):
+        return ",".join(normalize_string(str(v)) for v in value) or None
+    return _text(value)
+
+
+def _nutrients(value: Any) -> dict[str, str] | None:
+    if not isinstance(value, dict):
+        return None
+    nutrients = {
+        normalize_string(key): normalize_string(str(val))
+        for key, val in value.items()
+        if key and val and not key.startswith("@") and key != "type"
+    }
+    return nutrients or None
+
+
+def _rating(value: Any, key: str) -> float | None:
+    if not isinstance(value, dict):
+        return None
+    if key == "ratingCount":
+        raw = value.get("ratingCount") or value.get("reviewCount")
+    else:
+        raw = value.get(key)
+    try:
+        return round(float(raw), 2) if raw else None
+    except (TypeError, ValueError):
+        return None
+
+
+def recipe_from_jsonld(node: dict[str, Any], url: str) -> dict[str, Any]:
+    """Map a schema.org Recipe node onto the ParseRecipeResponse fields."""
+    ingredients = _ingredients(node.get("recipeIngredient") or node.get("ingredients"))
+    instruction_list = _instructions(node.get("recipeInstructions"))
+    prep_time = _minutes(node.get("prepTime"))
+    cook_time = _minutes(node.get("cookTime"))
+    total_time = _minutes(node.get("totalTime"))
+    if not total_time and (prep_time or cook_time):
+        total_time = (prep_time or 0) + (cook_time or 0)
+    recipe_yield = node.get("recipeYield") or node.get("yield")
+    rating = node.get("aggregateRating")
+
+    data: dict[str, Any] = {
+        "title": _text(node.get("name")),
+        "author": _text(node.get("author")),
+        "description": _text(node.get("description")),
+        "image": _image(node.get("image")),
+        "site_name": _text(node.get("publisher")),
+        "host": urlsplit(url).hostname,
+        "canonical_url": _first(node.get("url")) or url,
+        "language": _text(node.get("inLanguage")),
+        "ingredients": ingredients,
+        "ingredient_groups": [{"ingredients": ingredients, "purpose": None}],
+        "instructions": "\n".join(instruction_list),
+        "instruction_list": instruction_list,
+        "prep_time": prep_time,
+        "cook_time": cook_time,
+        "total_time": total_time,
+        "yields": get_yields(recipe_yield) if recipe_yield else None,  # type: ignore[no-untyped-call]
+        "ratings": _rating(rating, "ratingValue"),
+        "ratings_count": _rating(rating, "ratingCount"),
+        "category": _joined(node.get("recipeCategory")),
+        "cuisine": _joined(node.get("recipeCuisine")),
+        "cooking_method": _text(node.get("cookingMethod")),
+        "nutrients": _nutrients(node.get("nutrition")),
+        "keywords": _keywords(node.get("keywords")),
+    }
+    return {key: value for key, value in data.items() if value is not None}
+
+
+def recipe_from_blocks(blocks: list[Any], url: str) -> dict[str, Any] | None:
+    """
+    Build a recipe from decoded JSON-LD blocks.
+
+    Returns:
+        The recipe mapped onto ParseRecipeResponse fields, or None when the
+        blocks hold no recipe or it lacks a title, ingredients or steps.
+    """
+    node = find_node(blocks, "Recipe")
+    if node is None:
+        return None
+    try:
+        data = recipe_from_jsonld(node, url)
+    except Exception:
+        # Malformed structured data, let the full scraper deal with it
+        return None
+    if not all(data.get(field) for field in REQUIRED_FIELDS):
+        return None
+    if "site_name" not in data and (website := find_node(blocks, "WebSite")):
+        if site_name := _text(website.get("name")):
+            data["site_name"] = site_name
+    return data
+
+
+class JsonLdRecipeScanner:
+    """
+    Look for a complete JSON-LD recipe in a page while it downloads.
+
+    ``feed`` is called with the whole buffer received so far after every
+    chunk. Only the part after the last complete block is searched again,
+    so scanning a page costs about the same as scanning it once.
+    """
+
+    # Longest tail that can hold the start of a script tag cut by a chunk
+    TAG_MARGIN = 256
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.recipe: dict[str, Any] | None = None
+        self._blocks: list[Any] = []
+        self._pos = 0
+
+    def feed(self, buffer: bytes | bytearray) -> dict[str, Any] | None:
+        """Scan newly received data, returning the recipe once it is complete."""
+        for match in JSONLD_SCRIPT_RE.finditer(buffer, self._pos):
+            self._pos = match.end()
+            try:
+                self._blocks.append(json.loads(match.group(1)))
+            except ValueError:
+                continue
+            self.recipe = recipe_from_blocks(self._blocks, self.url)
+            if self.recipe is not None:
+                return self.recipe
+        # Resume at an unterminated block, or just before the end of the buffer
+        opening = JSONLD_OPEN_RE.search(buffer, self._pos)
+        if opening is not None:
+            self._pos = opening.start()
+        else:
+            self._pos = max(self._pos, len(buffer) - self.TAG_MARGIN)
+        return None
+
+
+def extract_jsonld_recipe(html: bytes | bytearray, url: str) -> dict[str, Any] | None:
+    """
+    Extract a recipe from the JSON-LD blocks of a page.
+
+    Args:
+        html: Raw bytes of the recipe page.
+        url: URL the page was fetched from.
+
+    Returns:
+        The recipe mapped onto ParseRecipeResponse fields, or None when the
+        page has no complete JSON-LD recipe.
+    """
+    return JsonLdRecipeScanner(url).feed(html)
@@ -0,0 +1,186 @@
+"""CPU-bound recipe parsing.
+
+Functions here only depend on ``recipe_scrapers`` and
+``app.lib.recipe_jsonld`` so they can be shipped to worker processes by
+``app.lib.parse_executor`` without importing the rest of the application.
+"""
+
+import time
+from collections.abc import Collection, Iterable
+from typing import Any
+
+from recipe_scrapers import scrape_html
+
+from app.lib.recipe_jsonld import extract_jsonld_recipe
+
+# Fields of ParseRecipeResponse, each computed by the scraper method of the
+# same name
+RECIPE_FIELDS = (
+    "title",
+    "author",
+    "description",
+    "image",
+    "site_name",
+    "host",
+    "canonical_url",
+    "language",
+    "ingredients",
+    "ingredient_groups",
+    "instructions",
+    "instruction_list",
+    "prep_time",
+    "cook_time",
+    "total_time",
+    "yields",
+    "ratings",
+    "ratings_count",
+    "category",
+    "cuisine",
+    "cooking_method",
+    "dietary_restrictions",
+    "nutrients",
+    "equipment",
+    "keywords",
+    "links",
+)
+# The scraper calls it instructions_list, ParseRecipeResponse instruction_list
+SCRAPER_METHODS = {"instruction_list": "instructions_list"}
+
+FIELD_PRESETS: dict[str, frozenset[str]] = {
+    # What recipe_create_from_parsed saves
+    "save": frozenset(
+        {
+            "title",
+            "image",
+            "site_name",
+            "ingredients",
+            "ingredient_groups",
+            "instruction_list",
+            "nutrients",
+        }
+    ),
+    # Enough to show a recipe card before saving
+    "preview": frozenset(
+        {
+            "title",
+            "author",
+            "description",
+            "image",
+            "site_name",
+            "host",
+            "total_time",
+            "yields",
+        }
+    ),
+    # Everything but links, which walks the whole page and must be asked for
+    "full": frozenset(RECIPE_FIELDS) - {"links"},
+}
+
+
+def resolve_fields(names: Iterable[str]) -> frozenset[str]:
+    """
+    Expand a mix of field names and preset names into a set of fields.
+
+    Raises:
+        ValueError: If a name is neither a field nor a preset.
+    """
+    fields: set[str] = set()
+    for name in names:
+        name = name.strip()
+        if name in FIELD_PRESETS:
+            fields |= FIELD_PRESETS[name]
+        elif name in RECIPE_FIELDS:
+            fields.add(name)
+        else:
+            raise ValueError(f"Unknown recipe field or preset: {name!r}")
+    return frozenset(fields)
+
+
+def parse_recipe_fields(
+    html: str, url: str, fields: Collection[str]
+) -> tuple[dict[str, Any], dict[str, float]]:
+    """
+    Parse raw recipe HTML, computing only the requested fields.
+
+    Args:
+        html: Raw HTML of the recipe page.
+        url: URL the HTML was fetched from, used to pick the site scraper.
+        fields: Names from ``RECIPE_FIELDS`` to compute.
+
+    Returns:
+        The parsed recipe data, and the seconds spent on each field. As with
+        the scraper's ``to_json``, a field the page does not have is left out
+        of the data.
+    """
+    scraper = scrape_html(html, url)
+    data: dict[str, Any] = {}
+    seconds: dict[str, float] = {}
+    for field in RECIPE_FIELDS:
+        if field not in fields:
+            continue
+        started = time.perf_counter()
+        try:
+            value = getattr(scraper, SCRAPER_METHODS.get(field, field))()
+            if field == "ingredient_groups":
+                value = [group.__dict__ for group in value]
+            data[field] = value
+        except Exception:
+            # Site scrapers raise many exception types for missing fields
+            pass
+        seconds[field] = time.perf_counter() - started
+    return data, seconds
+
+
+def parse_recipe_html(
+    html: str, url: str, fields: Collection[str] | None = None
+) -> dict[str, Any]:
+    """
+    Parse raw recipe HTML into the scraper's JSON dictionary.
+
+    Args:
+        html: Raw HTML of the recipe page.
+        url: URL the HTML was fetched from, used to pick the site scraper.
+        fields: Fields to compute, the ``full`` preset by default.
+
+    Returns:
+        A dictionary containing the parsed recipe data.
+    """
+    data, _ = parse_recipe_fields(html, url, fields or FIELD_PRESETS["full"])
+    return data
+
+
+def parse_saved_page(html: str, url: str) -> dict[str, Any]:
+    """
+    Parse a recipe page saved to disk.
+
+    The page's JSON-LD recipe is used when it has a complete one, as for a
+    live scrape, otherwise the full scraper runs.
+
+    Args:
+        html: HTML of the saved page.
+        url: URL the page was saved from, may be empty if unknown.
+
+    Returns:
+        A dictionary containing the parsed recipe data.
+    """
+    recipe = extract_jsonld_recipe(html.encode(), url)
+    if recipe is not None:
+        return recipe
+    if not url:
+        raise ValueError("No source URL and no JSON-LD recipe in the page")
+    return parse_recipe_html(html, url)
+
+
+def limit_worker_memory(max_memory_mb: int) -> None:
+    """
+    Cap the address space of the current worker process.
+
+    Used as a process pool initializer. A page that needs more memory raises
+    MemoryError inside the worker instead of exhausting the host.
+    """
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - not available on Windows
+        return
+    limit = max_memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
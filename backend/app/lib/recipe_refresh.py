@@ -0,0 +1,133 @@
+"""Freshness refresh of saved recipes with conditional requests.
+
+The scraper records each page's digest and ETag/Last-Modified validators
+(see ``app.lib.html_store.record_page``). The scrape worker periodically
+claims the pages of saved recipes that have not been checked for
+``RECIPE_REFRESH_MAX_AGE_SECONDS`` and sends If-None-Match and
+If-Modified-Since requests for them:
+
+- ``304 Not Modified`` costs a round trip and nothing else
+- a full response whose SHA-256 matches the last fetch is not parsed
+- only a changed page is parsed, and the recipes saved from its URL get
+  its new ingredients, ingredient groups, instructions and nutrients: a new
+  ``RecipeSource`` with them is added and the recipes of the URL's older
+  sources are moved to it, keeping their users' edits
+
+Claiming a batch of the oldest pages every ``RECIPE_REFRESH_INTERVAL_SECONDS``
+spreads the checks evenly over the day.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Literal
+
+import httpx
+from sqlmodel import Session, and_, col, or_, select, update
+
+from app import crud
+from app.lib.html_store import content_digest, record_fetched_page
+from app.lib.metrics import RECIPE_REFRESHES
+from app.lib.recipe_reparse import reparsed_fields
+from app.lib.recipe_scraper import fetch_if_modified, parse_fetched_page
+from app.lib.scrape_cache import normalize_url, scrape_cache
+from app.lib.scrape_trace import ScrapeTrace
+from app.models import ParseRecipeResponse, Recipe, RecipeSource, StoredPage
+
+logger = logging.getLogger(__name__)
+
+RefreshOutcome = Literal["not_modified", "unchanged", "updated", "failed"]
+
+
+async def refresh_page(
+    *, session: Session, page: StoredPage, client: httpx.AsyncClient | None = None
+) -> RefreshOutcome:
+    """
+    Revalidate one stored page and update its recipes if it changed.
+
+    Args:
+        client: HTTP client to use, the shared one by default.
+    """
+    url, previous_digest = page.url, page.digest
+    trace = ScrapeTrace(url)
+    try:
+        fetched = await fetch_if_modified(
+            url,
+            etag=page.etag,
+            last_modified=page.last_modified,
+            client=client,
+            trace=trace,
+        )
+        if fetched is None:
+            return "not_modified"
+        digest = content_digest(fetched.content)
+        with trace.phase("store"):
+            await asyncio.to_thread(
+                record_fetched_page,
+                url,
+                fetched.content,
+                fetched.encoding,
+                fetched.etag,
+                fetched.last_modified,
+            )
+        if digest == previous_digest:
+            return "unchanged"
+        data = await parse_fetched_page(fetched, url, trace)
+        fields = reparsed_fields(data, url)
+    except Exception as e:
+        # Fetch, parse and validation errors alike, the page is retried next time
+        logger.warning(f"Refreshing {url} failed: {e!r}")
+        return "failed"
+    finally:
+        trace.record_phases()
+
+    # Recipes saved before shared sources have their own copy
+    updated = and_(col(Recipe.url) == url, col(Recipe.source_id).is_(None))
+    session.exec(update(Recipe).where(updated).values(**fields))
+    latest = crud.get_latest_recipe_source(session=session, url=url)
+    if latest is not None:
+        source = crud.revise_recipe_source(
+            session=session, source=latest, values=fields
+        )
+        url_sources = select(RecipeSource.id).where(
+            RecipeSource.url_key == normalize_url(url)
+        )
+        session.exec(
+            update(Recipe)
+            .where(col(Recipe.source_id).in_(url_sources))
+            .values(source_id=source.id)
+        )
+        updated = or_(updated, col(Recipe.source_id) == source.id)
+    crud.update_search_vectors(session=session, condition=updated)
+    session.commit()
+    # Later scrapes of the URL should not be served the old recipe
+    scrape_cache.set(
+        session=session, url=url, data=ParseRecipeResponse.model_validate(data)
+    )
+    return "updated"
+
+
+async def refresh_due_pages(
+    *,
+    session: Session,
+    limit: int,
+    max_age: float,
+    concurrency: int,
+    client: httpx.AsyncClient | None = None,
+) -> Counter[RefreshOutcome]:
+    """
+    Claim up to ``limit`` pages due for a check and refresh them.
+
+    Returns:
+        How many pages had each outcome.
+    """
+    pages = crud.claim_pages_to_refresh(session=session, limit=limit, max_age=max_age)
+    slots = asyncio.Semaphore(concurrency)
+
+    async def refresh(page: StoredPage) -> RefreshOutcome:
+        async with slots:
+            outcome = await refresh_page(session=session, page=page, client=client)
+        RECIPE_REFRESHES.labels(outcome=outcome).inc()
+        return outcome
+
+    return Counter(await asyncio.gather(*(refresh(page) for page in pages)))
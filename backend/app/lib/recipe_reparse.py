@@ -0,0 +1,165 @@
+"""Offline re-parse of saved recipes from the HTML store.
+
+When ``recipe-scrapers`` gets better at a site, recipes saved from it keep
+the fields extracted by the old version. ``reparse_recipes`` regenerates
+their ingredients, ingredient groups, instructions and nutrients from the
+HTML kept by ``app.lib.html_store``, without any network access.
+
+Recipes are read in primary key order, ``batch_size`` at a time. A batch's
+pages are parsed on the parse executor, each distinct page once however
+many recipes were saved from it, and the changed rows are written back in
+one transaction per batch. A recipe with a shared ``RecipeSource`` is moved
+to a source with the new content, keeping its user's edits, while older
+recipes with their own copy of the content are updated in place. Recipes
+whose page is not in the store are left alone.
+"""
+
+import asyncio
+import logging
+import uuid
+from collections.abc import AsyncIterator
+from typing import Any, NamedTuple
+
+from sqlmodel import Session, col, select
+
+from app import crud
+from app.lib.html_store import HtmlStore
+from app.lib.recipe_scraper import parse_saved_html, recipe_create_from_parsed
+from app.lib.scrape_cache import normalize_url
+from app.models import ParseRecipeResponse, Recipe, RecipeSource, StoredPage
+from app.models.recipe import SHARED_FIELDS
+
+logger = logging.getLogger(__name__)
+
+
+class ReparseProgress(NamedTuple):
+    """Running totals of a re-parse, reported after every batch."""
+
+    scanned: int
+    updated: int
+    missing: int
+    failed: int
+
+
+def reparsed_fields(data: dict[str, Any], url: str) -> dict[str, Any]:
+    """
+    The fields of a saved recipe that re-parsing replaces, from scraper output.
+
+    Raises:
+        ValidationError: If the scraper output is not a valid recipe.
+    """
+    parsed = ParseRecipeResponse.model_validate(data)
+    recipe_in = recipe_create_from_parsed(parsed, url)
+    return recipe_in.model_dump(include=set(SHARED_FIELDS))
+
+
+async def _parse_stored(
+    html: str, url: str, slots: asyncio.Semaphore
+) -> dict[str, Any] | None:
+    async with slots:
+        try:
+            return reparsed_fields(await parse_saved_html(html, url), url)
+        except Exception as e:
+            # recipe_scrapers raises many exception types for pages it cannot read
+            logger.warning(f"Could not re-parse {url}: {e!r}")
+            return None
+
+
+async def _reparse_pages(
+    *,
+    session: Session,
+    store: HtmlStore,
+    pages: dict[str, StoredPage],
+    concurrency: int,
+) -> dict[str, dict[str, Any] | None]:
+    """Parse each distinct stored page once, keyed by digest."""
+    by_digest = {page.digest: page for page in pages.values() if page.digest}
+    slots = asyncio.Semaphore(concurrency)
+    tasks = {}
+    for digest, page in by_digest.items():
+        content = store.get(session=session, digest=digest)
+        if content is None:
+            continue
+        html = content.decode(page.encoding, errors="replace")
+        tasks[digest] = asyncio.ensure_future(_parse_stored(html, page.url, slots))
+    await asyncio.gather(*tasks.values())
+    return {digest: task.result() for digest, task in tasks.items()}
+
+
+async def reparse_recipes(
+    *,
+    session: Session,
+    store: HtmlStore,
+    batch_size: int,
+    concurrency: int,
+) -> AsyncIterator[ReparseProgress]:
+    """
+    Re-parse every saved recipe that has a stored page.
+
+    Yields:
+        A ReparseProgress after each batch is committed.
+    """
+    scanned = updated = missing = failed = 0
+    last_id: uuid.UUID | None = None
+    while True:
+        statement = (
+            select(Recipe)
+            .where(col(Recipe.url).is_not(None))
+            .order_by(col(Recipe.id))
+            .limit(batch_size)
+        )
+        if last_id is not None:
+            statement = statement.where(col(Recipe.id) > last_id)
+        recipes = session.exec(statement).all()
+        if not recipes:
+            return
+        last_id = recipes[-1].id
+        scanned += len(recipes)
+
+        keys = {normalize_url(recipe.url) for recipe in recipes if recipe.url}
+        pages = {
+            page.url_key: page
+            for page in session.exec(
+                select(StoredPage).where(col(StoredPage.url_key).in_(keys))
+            )
+        }
+        results = await _reparse_pages(
+            session=session, store=store, pages=pages, concurrency=concurrency
+        )
+
+        # Each source of the batch is revised once, however many recipes use it
+        revised: dict[uuid.UUID, RecipeSource] = {}
+        changed: list[uuid.UUID] = []
+        for recipe in recipes:
+            page = pages.get(normalize_url(recipe.url or ""))
+            if page is None or page.digest not in results:
+                missing += 1
+                continue
+            fields = results[page.digest]
+            if fields is None:
+                failed += 1
+                continue
+            source = recipe.source
+            if source is not None:
+                if source.id not in revised:
+                    revised[source.id] = crud.revise_recipe_source(
+                        session=session, source=source, values=fields
+                    )
+                if revised[source.id] is not source:
+                    recipe.source = revised[source.id]
+                    session.add(recipe)
+                    changed.append(recipe.id)
+            elif any(getattr(recipe, f) != fields[f] for f in SHARED_FIELDS):
+                recipe.sqlmodel_update(fields)
+                session.add(recipe)
+                changed.append(recipe.id)
+        updated += len(changed)
+        if changed:
+            crud.update_search_vectors(
+                session=session, condition=col(Recipe.id).in_(changed)
+            )
+        # The changed rows of the batch are flushed together in one transaction
+        session.commit()
+        yield ReparseProgress(
+            scanned=scanned, updated=updated, missing=missing, failed=failed
+        )
@@ -0,0 +1,418 @@
+import asyncio
+import logging
+import time
+from collections.abc import Collection
+from typing import Any, Literal, NamedTuple
+
+import httpx
+
+from app.core.config import settings
+from app.lib.fetch_policy import fetch_policy
+from app.lib.host_scheduler import HostUnavailableError, host_scheduler
+from app.lib.html_store import get_html_store, record_fetched_page
+from app.lib.http_client import build_http_client, get_http_client
+from app.lib.metrics import RECIPE_PARSE_SECONDS
+from app.lib.parse_executor import ParseError, ParseTimeoutError, get_parse_executor
+from app.lib.recipe_jsonld import JsonLdRecipeScanner
+from app.lib.recipe_parser import (
+    FIELD_PRESETS,
+    parse_recipe_fields,
+    parse_saved_page,
+)
+from app.lib.scrape_trace import ScrapeTrace
+from app.models import ParseRecipeResponse, RecipeCreate
+
+logger = logging.getLogger(__name__)
+
+ParsePath = Literal["jsonld", "full"]
+
+
+class PageRejectedError(Exception):
+    """Raised when a recipe page is too large or is not an HTML document."""
+
+    def __init__(self, status_code: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class PageNotModifiedError(Exception):
+    """Raised when a conditional request is answered with 304 Not Modified."""
+
+
+class FetchedPage(NamedTuple):
+    """A downloaded recipe page, possibly cut short once its recipe was found."""
+
+    content: bytearray
+    encoding: str
+    # JSON-LD recipe found while downloading, if any
+    recipe: dict[str, Any] | None
+    scan_seconds: float
+    # False if the download stopped at the JSON-LD recipe
+    complete: bool
+    etag: str | None
+    last_modified: str | None
+
+
+async def scrape_recipe_from_url(
+    url: str,
+    client: httpx.AsyncClient | None = None,
+    trace: ScrapeTrace | None = None,
+    fields: Collection[str] | None = None,
+) -> dict[str, Any]:
+    """
+    Asynchronously fetch and parse recipe data from a URL.
+
+    The worker's shared HTTP client is used so connections to recipe sites
+    are kept alive between scrapes. The page is streamed under a size cap
+    and searched for a complete schema.org JSON-LD recipe as it arrives;
+    once one is found the rest of the page is not downloaded. Other pages
+    go through the full scraper on the worker's parse executor so the event
+    loop stays free. Outside of the application lifespan a short-lived
+    client is used and parsing happens inline. Requests are paced and
+    circuit-broken per host by ``host_scheduler``; fetches that could not
+    connect or met an overloaded server are retried with backoff, and slow
+    ones may be hedged (see ``app.lib.fetch_policy``). Phase timings, page
+    size and outcome are exported as metrics through a ``ScrapeTrace``. The
+    page's digest and ETag/Last-Modified validators are recorded for
+    conditional refreshes; when the HTML store is enabled the whole page is
+    downloaded and kept there for offline re-parsing.
+
+    The full scraper only computes the requested ``fields``, and times each
+    one. The JSON-LD path maps the page's recipe node in one go and returns
+    the requested fields it has. Asking for ``links``, which JSON-LD does not
+    have, always runs the full scraper on the whole page.
+
+    Args:
+        url: The URL of the recipe to scrape.
+        client: Optional client to use instead of the shared one.
+        trace: Trace to collect phase timings in, e.g. for a response header.
+        fields: Recipe fields to compute, the ``full`` preset of
+            ``app.lib.recipe_parser.FIELD_PRESETS`` by default.
+
+    Returns:
+        A dictionary containing the parsed recipe data.
+
+    Raises:
+        httpx.HTTPStatusError: If the HTTP request fails.
+        httpx.RequestError: If the request encounters an error.
+        HostUnavailableError: If the host is failing or too busy.
+        PageRejectedError: If the page is too large or not HTML.
+        ParseError: If the parse worker crashed or exceeded its limits.
+    """
+    trace = trace or ScrapeTrace(url)
+    try:
+        recipe_data = await _scrape(url, client, trace, fields)
+    except Exception as e:
+        trace.record(scrape_outcome(e))
+        raise
+    trace.record("ok")
+    return recipe_data
+
+
+def scrape_outcome(e: Exception) -> str:
+    """Short name of a scrape failure for the scrapes_total metric."""
+    if isinstance(e, httpx.HTTPStatusError):
+        return "http_error"
+    if isinstance(e, httpx.RequestError):
+        return "request_error"
+    if isinstance(e, PageRejectedError):
+        return "rejected"
+    if isinstance(e, HostUnavailableError):
+        return "host_unavailable"
+    if isinstance(e, ParseTimeoutError):
+        return "parse_timeout"
+    if isinstance(e, ParseError):
+        return "parse_error"
+    return "error"
+
+
+async def _scrape(
+    url: str,
+    client: httpx.AsyncClient | None,
+    trace: ScrapeTrace,
+    fields: Collection[str] | None,
+) -> dict[str, Any]:
+    fields = fields or FIELD_PRESETS["full"]
+    # A stored page must be complete, and links need the full scraper, so
+    # keep reading past a JSON-LD recipe
+    read_all = get_html_store() is not None or "links" in fields
+    client = client or get_http_client()
+    if client is None:
+        async with build_http_client() as temp_client:
+            page = await _fetch_page(temp_client, url, trace, read_all)
+    else:
+        page = await _fetch_page(client, url, trace, read_all)
+    with trace.phase("store"):
+        await asyncio.to_thread(
+            record_fetched_page,
+            url,
+            page.content if page.complete else None,
+            page.encoding,
+            page.etag,
+            page.last_modified,
+        )
+    return await parse_fetched_page(page, url, trace, fields)
+
+
+async def parse_fetched_page(
+    page: FetchedPage,
+    url: str,
+    trace: ScrapeTrace,
+    fields: Collection[str] | None = None,
+) -> dict[str, Any]:
+    """Parse a downloaded page, using the JSON-LD recipe found in it if any."""
+    fields = fields or FIELD_PRESETS["full"]
+    recipe_data = page.recipe
+    if recipe_data is not None and "links" in fields:
+        recipe_data = None
+    path: ParsePath = "jsonld" if recipe_data is not None else "full"
+    trace.path = path
+    trace.add("parse", page.scan_seconds)
+    if recipe_data is None:
+        with trace.phase("parse"):
+            html = page.content.decode(page.encoding, errors="replace")
+            # The decoded copy is all the parser needs, release the raw bytes
+            page.content.clear()
+            recipe_data, trace.fields = await _parse_full(html, url, fields)
+    else:
+        recipe_data = {k: v for k, v in recipe_data.items() if k in fields}
+    elapsed = trace.phases["parse"]
+    RECIPE_PARSE_SECONDS.labels(path=path).observe(elapsed)
+    logger.debug(f"Parsed {url} via {path} path in {elapsed * 1000:.1f}ms")
+    return recipe_data
+
+
+async def fetch_if_modified(
+    url: str,
+    *,
+    etag: str | None,
+    last_modified: str | None,
+    client: httpx.AsyncClient | None = None,
+    trace: ScrapeTrace | None = None,
+) -> FetchedPage | None:
+    """
+    Download a whole page unless it changed since it was last fetched.
+
+    Sends If-None-Match and If-Modified-Since with the validators of the
+    last fetch, under the same host pacing, size and content type limits
+    as a scrape.
+
+    Returns:
+        The page, or None if the server answered 304 Not Modified.
+
+    Raises:
+        The same fetch errors as ``scrape_recipe_from_url``.
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    trace = trace or ScrapeTrace(url)
+    client = client or get_http_client()
+    try:
+        if client is None:
+            async with build_http_client() as temp_client:
+                return await _fetch_page(temp_client, url, trace, True, headers)
+        return await _fetch_page(client, url, trace, True, headers)
+    except PageNotModifiedError:
+        return None
+
+
+async def _parse_full(
+    html: str, url: str, fields: Collection[str]
+) -> tuple[dict[str, Any], dict[str, float]]:
+    executor = get_parse_executor()
+    if executor is None:
+        return parse_recipe_fields(html, url, fields)
+    # Sent to a worker process, so pass a picklable set whatever the caller gave
+    return await executor.run(parse_recipe_fields, html, url, frozenset(fields))
+
+
+async def parse_saved_html(html: str, url: str) -> dict[str, Any]:
+    """
+    Parse a page that was saved earlier, without any network access.
+
+    Runs ``parse_saved_page`` on the worker's parse executor, or in a thread
+    outside of the application lifespan.
+    """
+    executor = get_parse_executor()
+    if executor is None:
+        return await asyncio.to_thread(parse_saved_page, html, url)
+    return await executor.run(parse_saved_page, html, url)
+
+
+async def _fetch_page(
+    client: httpx.AsyncClient,
+    url: str,
+    trace: ScrapeTrace,
+    read_all: bool,
+    headers: dict[str, str] | None = None,
+) -> FetchedPage:
+    attempt = 1
+    while True:
+        try:
+            return await _fetch_attempt(client, url, trace, read_all, headers)
+        except Exception as e:
+            delay = fetch_policy.retry_delay(e, attempt)
+            if delay is None:
+                _log_fetch_error(url, e)
+                raise
+            logger.info(
+                f"Fetch {attempt} of {url} failed, retrying in {delay:.2f}s: {e!r}"
+            )
+        trace.add("retry", delay)
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+async def _fetch_attempt(
+    client: httpx.AsyncClient,
+    url: str,
+    trace: ScrapeTrace,
+    read_all: bool,
+    headers: dict[str, str] | None,
+) -> FetchedPage:
+    queued = time.perf_counter()
+    async with host_scheduler.slot(client, url):
+        trace.add("queue", time.perf_counter() - queued)
+        request = client.build_request(
+            "GET", url, headers=headers, extensions={"trace": trace.on_http_event}
+        )
+        response = await fetch_policy.send(client, request)
+        try:
+            logger.debug(
+                f"URL: {url}, Status: {response.status_code}, HTTP version: {response.http_version}, Headers: {dict(response.headers)}"
+            )
+
+            if response.status_code == 304 and headers:
+                raise PageNotModifiedError(url)
+            response.raise_for_status()
+            return await _read_page(response, url, trace, read_all)
+        finally:
+            await response.aclose()
+
+
+def _log_fetch_error(url: str, e: Exception) -> None:
+    if isinstance(e, httpx.HTTPStatusError):
+        logger.error(
+            f"HTTP Error for {url}: {e.response.status_code}, Headers: {dict(e.response.headers)}"
+        )
+    elif isinstance(e, httpx.RequestError):
+        logger.error(f"Request Error for {url}: {str(e)}")
+    elif isinstance(e, HostUnavailableError | PageRejectedError):
+        logger.warning(f"Rejected page {url}: {e.detail}")
+
+
+async def _read_page(
+    response: httpx.Response, url: str, trace: ScrapeTrace, read_all: bool
+) -> FetchedPage:
+    content_type = response.headers.get("Content-Type", "")
+    mime_type = content_type.split(";")[0].strip().lower()
+    if mime_type and mime_type not in settings.SCRAPER_ALLOWED_CONTENT_TYPES:
+        raise PageRejectedError(415, f"Unsupported content type: {mime_type}")
+
+    max_bytes = settings.SCRAPER_MAX_PAGE_BYTES
+    too_large = PageRejectedError(413, f"Page is larger than {max_bytes} bytes")
+    content_length = response.headers.get("Content-Length", "")
+    if content_length.isdigit() and int(content_length) > max_bytes:
+        raise too_large
+
+    scanner = JsonLdRecipeScanner(url)
+    content = bytearray()
+    scan_seconds = 0.0
+    complete = True
+    download_started = time.perf_counter()
+    try:
+        async for chunk in response.aiter_bytes():
+            content += chunk
+            if len(content) > max_bytes:
+                raise too_large
+            if scanner.recipe is not None:
+                continue
+            started = time.perf_counter()
+            recipe = scanner.feed(content)
+            scan_seconds += time.perf_counter() - started
+            if recipe is not None:
+                logger.debug(
+                    f"Found JSON-LD recipe in {url} after {len(content)} bytes"
+                )
+                if not read_all:
+                    complete = False
+                    break
+    finally:
+        trace.response_bytes = len(content)
+        # Scanning happens between chunks and is reported as parse time
+        trace.add("download", time.perf_counter() - download_started - scan_seconds)
+    return FetchedPage(
+        content=content,
+        encoding=response.charset_encoding or "utf-8",
+        recipe=scanner.recipe,
+        scan_seconds=scan_seconds,
+        complete=complete,
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+    )
+
+
+# Length limits of the saved fields, the only constraints of RecipeCreate
+# that a validated ParseRecipeResponse does not already meet
+_SAVED_MAX_LENGTHS = {
+    name: max_length
+    for name, field in RecipeCreate.model_fields.items()
+    for constraint in field.metadata
+    if (max_length := getattr(constraint, "max_length", None)) is not None
+}
+
+
+def recipe_create_from_parsed(
+    parsed: ParseRecipeResponse, url: str | None
+) -> RecipeCreate:
+    """
+    Build the schema used to save a scraped recipe for a user.
+
+    ``parsed`` is validated already, so only the length limits are checked
+    and the schema is built without validating every field again. A value
+    over its limit raises the same ValidationError as validation would.
+    """
+    # Convert IngredientGroup objects to dicts for JSON storage, in one
+    # serializer call rather than one per group
+    ingredient_groups_list = None
+    if parsed.ingredient_groups:
+        ingredient_groups_list = parsed.model_dump(include={"ingredient_groups"})[
+            "ingredient_groups"
+        ]
+
+    values: dict[str, Any] = {
+        "title": parsed.title or "Untitled Recipe",
+        "url": url,
+        "image": parsed.image,
+        "site_name": parsed.site_name,
+        "ingredients": parsed.ingredients,
+        "ingredient_groups": ingredient_groups_list,
+        "instructions": parsed.instruction_list or [],
+        "nutrients": parsed.nutrients,
+    }
+    for name, max_length in _SAVED_MAX_LENGTHS.items():
+        value = values[name]
+        if value is not None and len(value) > max_length:
+            return RecipeCreate.model_validate(values)
+    return RecipeCreate.model_construct(**values)
+
+
+def describe_scrape_error(e: Exception) -> tuple[int, str]:
+    """Map a scrape failure onto an HTTP status code and error detail."""
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code, f"Failed to fetch URL: {e.response.status_code}"
+    if isinstance(e, httpx.RequestError):
+        return 500, f"Request failed: {str(e)}"
+    if isinstance(e, PageRejectedError):
+        return e.status_code, e.detail
+    if isinstance(e, HostUnavailableError):
+        return 503, e.detail
+    if isinstance(e, ParseTimeoutError):
+        return 504, "Timed out parsing recipe"
+    if isinstance(e, TimeoutError):
+        return 504, "Timed out scraping recipe"
+    return 422, f"Failed to parse recipe: {e}"
@@ -0,0 +1,229 @@
+"""Two-tier cache for scraped recipe data.
+
+Popular recipe URLs are scraped over and over by different users. Results
+are cached under a normalized form of the URL in two tiers:
+
+- an in-process LRU per worker, bounded by entry count and total size, with
+  a short TTL, which answers hot URLs without touching the database
+- a Postgres table (``ScrapeCacheEntry``) shared by all workers that
+  survives restarts, with a longer TTL
+
+Only output that validates as a ``ParseRecipeResponse`` is cached. Expired
+rows are deleted in batches by ``purge_expired``, which the scrape worker
+runs periodically.
+"""
+
+import json
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Literal
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, col, delete, select
+
+from app.core.config import settings
+from app.models import ParseRecipeResponse, ScrapeCacheEntry
+from app.models.base import get_datetime_utc
+
+CacheTier = Literal["memory", "db"]
+
+# Query parameters that only identify the referrer and never change the page
+TRACKING_PARAMS = frozenset(
+    {
+        "fbclid",
+        "gclid",
+        "dclid",
+        "msclkid",
+        "mc_cid",
+        "mc_eid",
+        "igshid",
+        "yclid",
+        "_ga",
+        "ref",
+        "ref_src",
+    }
+)
+TRACKING_PARAM_PREFIXES = ("utm_",)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a recipe URL for use as a cache key.
+
+    Lowercases the scheme and host, drops default ports, fragments and
+    tracking parameters, and sorts the remaining query parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS
+        and not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+    ]
+    query.sort()
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+class LRUCache:
+    """
+    In-process LRU cache with a TTL and entry-count and byte-size bounds.
+
+    Sizes are measured on the JSON encoding of each value, which is a good
+    enough proxy for the memory held by a scraped recipe dict.
+    """
+
+    def __init__(self, *, max_entries: int, max_bytes: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.total_bytes = 0
+        self._entries: OrderedDict[str, tuple[float, int, dict[str, Any]]] = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self.delete(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: dict[str, Any]) -> None:
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        self.delete(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, value)
+        self.total_bytes += size
+        while (
+            len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes
+        ):
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+
+    def delete(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.total_bytes = 0
+
+
+class ScrapeCache:
+    """
+    Scrape result cache backed by a per-worker LRU and a Postgres table.
+
+    Args:
+        memory: The in-process tier.
+        db_ttl: Seconds a row in the persistent tier stays valid.
+    """
+
+    def __init__(self, *, memory: LRUCache, db_ttl: float) -> None:
+        self.memory = memory
+        self.db_ttl = db_ttl
+
+    @classmethod
+    def from_settings(cls) -> "ScrapeCache":
+        return cls(
+            memory=LRUCache(
+                max_entries=settings.SCRAPE_CACHE_MEMORY_MAX_ENTRIES,
+                max_bytes=settings.SCRAPE_CACHE_MEMORY_MAX_BYTES,
+                ttl=settings.SCRAPE_CACHE_MEMORY_TTL_SECONDS,
+            ),
+            db_ttl=settings.SCRAPE_CACHE_TTL_SECONDS,
+        )
+
+    def get(
+        self, *, session: Session, url: str
+    ) -> tuple[dict[str, Any], CacheTier] | None:
+        """
+        Look up cached scraper output for a URL.
+
+        Returns:
+            The cached data and the tier that answered, or None on a miss.
+        """
+        key = normalize_url(url)
+        data = self.memory.get(key)
+        if data is not None:
+            return data, "memory"
+
+        entry = session.get(ScrapeCacheEntry, key)
+        if entry is None or entry.expires_at <= get_datetime_utc():
+            return None
+        # Promote to the memory tier so the next hit skips the database
+        self.memory.set(key, entry.data)
+        return entry.data, "db"
+
+    def set(self, *, session: Session, url: str, data: ParseRecipeResponse) -> None:
+        """Store validated scraper output for a URL in both tiers."""
+        key = normalize_url(url)
+        value = data.model_dump(mode="json", exclude_none=True)
+        self.memory.set(key, value)
+
+        now = get_datetime_utc()
+        values = {
+            "url_key": key,
+            "url": url,
+            "data": value,
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=self.db_ttl),
+        }
+        statement = insert(ScrapeCacheEntry).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=["url_key"],
+            set_={k: v for k, v in values.items() if k != "url_key"},
+        )
+        session.execute(statement)
+        session.commit()
+
+    def purge_expired(self, *, session: Session, batch_size: int = 1000) -> int:
+        """
+        Delete expired rows from the persistent tier.
+
+        Rows are deleted in batches of ``batch_size`` so a large backlog does
+        not hold locks on the table for long.
+
+        Returns:
+            The number of rows deleted.
+        """
+        purged = 0
+        while True:
+            expired = (
+                select(ScrapeCacheEntry.url_key)
+                .where(ScrapeCacheEntry.expires_at <= get_datetime_utc())
+                .limit(batch_size)
+            )
+            deleted = session.execute(
+                delete(ScrapeCacheEntry)
+                .where(col(ScrapeCacheEntry.url_key).in_(expired))
+                .returning(col(ScrapeCacheEntry.url_key))
+            ).all()
+            session.commit()
+            purged += len(deleted)
+            if len(deleted) < batch_size:
+                return purged
+
+    def clear(self, *, session: Session) -> None:
+        """Empty both tiers."""
+        self.memory.clear()
+        session.execute(delete(ScrapeCacheEntry))
+        session.commit()
+
+
+scrape_cache = ScrapeCache.from_settings()
@@ -0,0 +1,119 @@
+"""Per-phase timing of a single recipe scrape.
+
+A ``ScrapeTrace`` follows one scrape through the host scheduler queue, the
+connection (DNS and TCP connect, then TLS), time to first byte, the
+download, parsing and, when the recipe is saved, the database insert.
+Connection phases come from the httpx ``trace`` request extension, which
+reports connection and HTTP events as they happen; a reused keep-alive
+connection has no connect or TLS phase.
+
+Phases are exported as per-host Prometheus histograms (see
+``app.lib.metrics``) and returned to API clients in a ``Server-Timing``
+header. When the full scraper runs, the time it spent on each recipe field
+is exported too, to show which extractors are slow on which sites.
+"""
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+from urllib.parse import urlsplit
+
+from app.lib.metrics import (
+    RECIPE_FIELD_SECONDS,
+    SCRAPE_PHASE_SECONDS,
+    SCRAPE_RESPONSE_BYTES,
+    SCRAPES,
+    host_label,
+)
+
+# httpcore events that open and close a phase, by step name
+CONNECTION_PHASES = {"connect_tcp": "connect", "start_tls": "tls"}
+
+
+class ScrapeTrace:
+    """
+    Timings and outcome of one scrape.
+
+    Args:
+        url: URL being scraped, its host labels the metrics.
+    """
+
+    def __init__(self, url: str) -> None:
+        self.host = (urlsplit(url).hostname or "").lower()
+        self.phases: dict[str, float] = {}
+        self.fields: dict[str, float] = {}
+        self.response_bytes = 0
+        self.path: str | None = None
+        self._started: dict[str, float] = {}
+        self._recorded: set[str] = set()
+        self._recorded_fields: set[str] = set()
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Add time to a phase; a phase entered twice accumulates."""
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the body of a ``with`` block as a phase."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    async def on_http_event(self, event_name: str, _info: dict[str, Any]) -> None:
+        """
+        Receive connection and HTTP events from httpx.
+
+        Passed as the ``trace`` request extension. Event names look like
+        ``connection.connect_tcp.started`` or
+        ``http2.receive_response_headers.complete``.
+        """
+        now = time.perf_counter()
+        name, _, state = event_name.rpartition(".")
+        step = name.rpartition(".")[2]
+        if state == "started" and (
+            step in CONNECTION_PHASES or step == "send_request_headers"
+        ):
+            self._started[step] = now
+        elif state == "complete":
+            if step in CONNECTION_PHASES and step in self._started:
+                self.add(CONNECTION_PHASES[step], now - self._started.pop(step))
+            elif (
+                step == "receive_response_headers"
+                and "send_request_headers" in self._started
+            ):
+                self.add("ttfb", now - self._started.pop("send_request_headers"))
+
+    def record_phases(self) -> None:
+        """Export phases and field timings not exported yet to their histograms."""
+        host = host_label(self.host)
+        for phase, seconds in self.phases.items():
+            if phase not in self._recorded:
+                SCRAPE_PHASE_SECONDS.labels(phase=phase, host=host).observe(seconds)
+                self._recorded.add(phase)
+        for field, seconds in self.fields.items():
+            if field not in self._recorded_fields:
+                RECIPE_FIELD_SECONDS.labels(field=field, host=host).observe(seconds)
+                self._recorded_fields.add(field)
+
+    def record(self, outcome: str) -> None:
+        """Export the phases, page size and outcome of a finished scrape."""
+        self.record_phases()
+        host = host_label(self.host)
+        if self.response_bytes:
+            SCRAPE_RESPONSE_BYTES.labels(host=host).observe(self.response_bytes)
+        SCRAPES.labels(host=host, path=self.path or "none", outcome=outcome).inc()
+
+    def server_timing(self, total: float | None = None) -> str:
+        """Format the phases as a ``Server-Timing`` header value in milliseconds."""
+        metrics = []
+        for phase, seconds in self.phases.items():
+            metric = f"{phase};dur={seconds * 1000:.1f}"
+            if phase == "parse" and self.path:
+                metric += f';desc="{self.path}"'
+            metrics.append(metric)
+        if total is not None:
+            metrics.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(metrics)
@@ -0,0 +1,135 @@
+"""Request coalescing for concurrent scrapes of the same URL.
+
+When a recipe goes viral many users scrape the same URL within seconds.
+``SingleFlight`` makes concurrent callers for the same key within a worker
+await a single in-flight call and share its result or error.
+``pg_advisory_lock`` extends this across workers and pods: the worker that
+takes the lock scrapes, the others wait and then find the result in the
+shared scrape cache. Lock connections come from a small pool of their own,
+so URLs waiting on each other cannot exhaust the pool requests use.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import Generic, TypeVar
+
+from sqlalchemy import Connection, Engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlmodel import create_engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    De-duplicate concurrent async calls that share a key.
+
+    The first caller for a key starts the call as a task; callers arriving
+    while it runs await the same task. The call keeps running if the caller
+    that started it is cancelled, so the others still get a result.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[str, asyncio.Task[T]] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task[T]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the error as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+
+def advisory_lock_id(key: str) -> int:
+    """Map a key onto the signed 64-bit id space of Postgres advisory locks."""
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+_lock_engine: Engine | None = None
+
+
+def get_lock_engine() -> Engine:
+    """Return the engine whose bounded pool holds advisory lock connections."""
+    global _lock_engine
+    if _lock_engine is None:
+        _lock_engine = create_engine(
+            str(settings.SQLALCHEMY_DATABASE_URI),
+            pool_size=settings.SCRAPE_COALESCE_LOCK_POOL_SIZE,
+            max_overflow=0,
+            pool_timeout=settings.SCRAPE_COALESCE_LOCK_TIMEOUT,
+        )
+    return _lock_engine
+
+
+def _try_lock(conn: Connection, lock_id: int) -> bool:
+    acquired = conn.execute(
+        text("SELECT pg_try_advisory_lock(:lock_id)"), {"lock_id": lock_id}
+    ).scalar_one()
+    conn.commit()
+    return bool(acquired)
+
+
+def _release(conn: Connection) -> None:
+    try:
+        # Also drops a lock taken by a poll whose caller was cancelled
+        conn.execute(text("SELECT pg_advisory_unlock_all()"))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+@asynccontextmanager
+async def pg_advisory_lock(
+    key: str, *, timeout: float, poll_interval: float = 0.1
+) -> AsyncIterator[bool]:
+    """
+    Hold a session-level Postgres advisory lock for a key.
+
+    The lock is polled with ``pg_try_advisory_lock`` and every database call
+    runs in a thread, so waiting never blocks the event loop. It lives on a
+    connection from ``get_lock_engine``, because session-level locks must
+    be released on the connection that took them.
+
+    Yields:
+        True if the lock was acquired, False if the timeout expired first
+        or no lock connection was free in time.
+    """
+    lock_id = advisory_lock_id(key)
+    deadline = time.monotonic() + timeout
+    try:
+        conn = await asyncio.to_thread(get_lock_engine().connect)
+    except PoolTimeoutError:
+        logger.warning(f"No advisory lock connection free for {key}")
+        yield False
+        return
+    try:
+        while True:
+            acquired = await asyncio.to_thread(_try_lock, conn, lock_id)
+            if acquired or time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(poll_interval)
+        if not acquired:
+            logger.warning(f"Timed out waiting for advisory lock on {key}")
+        yield acquired
+    finally:
+        await asyncio.shield(asyncio.to_thread(_release, conn))
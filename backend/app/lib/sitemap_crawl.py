@@ -0,0 +1,469 @@
+"""Import of a whole recipe site from its sitemaps.
+
+Used by ``POST /recipes/import/sitemap`` and ``python -m app.crawl_import``.
+A crawl has two stages:
+
+1. ``find_recipe_urls`` reads the site's sitemaps, named by its robots.txt
+   or at ``/sitemap.xml``, following sitemap indexes. Each sitemap is
+   stream-parsed as it downloads, gzipped or not, and its entries are
+   dropped as soon as they are read. URLs that do not look like recipes,
+   that robots.txt disallows, that the user already saved or that were
+   seen before are skipped; the rest are spooled to a temporary file.
+   URLs are de-duplicated with a ``BloomFilter`` sized for the crawl's URL
+   limit instead of a set, so memory stays flat for sitemaps of any size.
+2. ``crawl_import`` scrapes the spooled URLs with a fixed number of
+   workers, through the same host scheduler as any scrape, so the site's
+   rate limit and robots.txt ``Crawl-delay`` are honoured. Recipes are
+   saved in batched transactions and each batch's results are handed back
+   as it is saved.
+
+Sitemaps are read in full before scraping starts, so the slow stage never
+holds a sitemap download open. When the site starts failing, its circuit
+breaker opens and the crawl stops rather than failing every remaining URL.
+"""
+
+import asyncio
+import logging
+import re
+import tempfile
+import uuid
+import zlib
+from collections import deque
+from collections.abc import AsyncGenerator, AsyncIterator, Iterator
+from contextlib import aclosing
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+from xml.etree import ElementTree
+
+import httpx
+from sqlmodel import Session, col, select
+
+from app import crud
+from app.core.config import settings
+from app.lib.bloom_filter import BloomFilter
+from app.lib.host_scheduler import (
+    HostUnavailableError,
+    host_scheduler,
+    read_robots_txt,
+)
+from app.lib.http_client import DEFAULT_HEADERS, build_http_client, get_http_client
+from app.lib.recipe_parser import FIELD_PRESETS
+from app.lib.recipe_scraper import (
+    describe_scrape_error,
+    recipe_create_from_parsed,
+    scrape_recipe_from_url,
+)
+from app.lib.scrape_cache import normalize_url, scrape_cache
+from app.models import CrawlImportResult, ParseRecipeResponse, Recipe
+
+logger = logging.getLogger(__name__)
+
+GZIP_MAGIC = b"\x1f\x8b"
+# Words for "recipe" in sitemap file names, e.g. wprm_recipe-sitemap.xml
+RECIPE_NAME_RE = re.compile(r"recipe|recept|recette|rezept|receta|ricetta|gerecht")
+# Sitemaps of listing and media pages, e.g. category-sitemap.xml
+SKIPPED_SITEMAP_RE = re.compile(r"categor|tag|author|image|video|news|page-sitemap")
+# Path segments of listing and site pages that are never a single recipe
+SKIPPED_SEGMENTS = frozenset(
+    {
+        "about",
+        "author",
+        "cart",
+        "categories",
+        "category",
+        "contact",
+        "feed",
+        "page",
+        "privacy-policy",
+        "search",
+        "shop",
+        "tag",
+        "tags",
+        "wp-content",
+        "wp-json",
+    }
+)
+NON_PAGE_SUFFIXES = (
+    ".gif",
+    ".jpeg",
+    ".jpg",
+    ".mp4",
+    ".pdf",
+    ".png",
+    ".svg",
+    ".webp",
+    ".xml",
+    ".xml.gz",
+)
+
+ParseOutcome = ParseRecipeResponse | CrawlImportResult
+
+
+class CrawlError(Exception):
+    """Raised when none of a site's sitemaps can be read."""
+
+
+class SitemapError(Exception):
+    """Raised when a sitemap is too large."""
+
+
+def _site(host: str | None) -> str:
+    return (host or "").lower().removeprefix("www.")
+
+
+def is_sitemap_url(url: str) -> bool:
+    return urlsplit(url).path.lower().endswith((".xml", ".xml.gz"))
+
+
+def looks_like_recipe_url(url: str, site: str) -> bool:
+    """
+    Whether a sitemap URL may be a single recipe page of a site.
+
+    Pages of other sites, the home page, listing, taxonomy and site pages,
+    and media files are ruled out. Anything else is worth a scrape; a page
+    without a recipe just fails with a 422.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or _site(parts.hostname) != site:
+        return False
+    segments = [segment for segment in parts.path.lower().split("/") if segment]
+    if not segments or any(segment in SKIPPED_SEGMENTS for segment in segments):
+        return False
+    return not segments[-1].endswith(NON_PAGE_SUFFIXES)
+
+
+async def iter_sitemap(
+    client: httpx.AsyncClient, url: str, *, max_bytes: int
+) -> AsyncGenerator[tuple[str, str], None]:
+    """
+    Stream the entries of a sitemap or sitemap index as it downloads.
+
+    Yields:
+        ("url", location) for pages and ("sitemap", location) for the
+        sitemaps listed by an index.
+
+    Raises:
+        httpx.HTTPError: If the sitemap cannot be fetched.
+        HostUnavailableError: If the host is failing or too busy.
+        SitemapError: If the sitemap is larger than max_bytes uncompressed.
+        ElementTree.ParseError: If the sitemap is not well-formed XML.
+    """
+    parser: ElementTree.XMLPullParser[ElementTree.Element] = ElementTree.XMLPullParser(
+        events=("start", "end")
+    )
+    root: ElementTree.Element | None = None
+    inflate = None
+    size = 0
+    async with host_scheduler.slot(client, url):
+        async with client.stream("GET", url) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                # Sitemaps are often served as .xml.gz files, not gzip encoded
+                if size == 0 and inflate is None and chunk.startswith(GZIP_MAGIC):
+                    inflate = zlib.decompressobj(wbits=31)
+                if inflate is not None:
+                    chunk = inflate.decompress(chunk, max_bytes - size + 1)
+                size += len(chunk)
+                if size > max_bytes:
+                    raise SitemapError(f"Sitemap is larger than {max_bytes} bytes")
+                parser.feed(chunk)
+                for event, element in parser.read_events():  # type: ignore[misc]
+                    if not isinstance(element, ElementTree.Element):
+                        continue
+                    if root is None:
+                        root = element
+                    if event != "end":
+                        continue
+                    kind = element.tag.rpartition("}")[2]
+                    if kind not in ("url", "sitemap"):
+                        continue
+                    location = (element.findtext("{*}loc") or "").strip()
+                    # Drop the entries read so far, so memory stays flat
+                    root.clear()
+                    if location:
+                        yield kind, location
+            parser.close()
+
+
+class SiteUrls:
+    """
+    Recipe URLs found in a site's sitemaps, spooled to a temporary file.
+
+    Iterate over it once to read the URLs back, and close it when done.
+    """
+
+    def __init__(self) -> None:
+        self._file = tempfile.TemporaryFile("w+", encoding="utf-8")
+        self.count = 0
+
+    def append(self, url: str) -> None:
+        self._file.write(url + "\n")
+        self.count += 1
+
+    def __iter__(self) -> Iterator[str]:
+        self._file.seek(0)
+        for line in self._file:
+            yield line.rstrip("\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _saved_urls(*, session: Session, owner_id: uuid.UUID, site: str) -> Iterator[str]:
+    statement = select(Recipe.url).where(
+        col(Recipe.owner_id) == owner_id,
+        col(Recipe.url).is_not(None),
+        col(Recipe.url).contains(site),
+    )
+    for url in session.exec(statement.execution_options(yield_per=1000)):
+        if url:
+            yield url
+
+
+async def _sitemap_roots(
+    client: httpx.AsyncClient, url: str
+) -> tuple[list[str], RobotFileParser | None]:
+    parts = urlsplit(url)
+    origin = f"{parts.scheme}://{parts.netloc}"
+    robots = await read_robots_txt(
+        client, origin, timeout=settings.SCRAPER_CONNECT_TIMEOUT
+    )
+    if is_sitemap_url(url):
+        return [url], robots
+    listed = robots.site_maps() if robots is not None else None
+    return list(listed or [f"{origin}/sitemap.xml"]), robots
+
+
+async def find_recipe_urls(
+    url: str,
+    *,
+    session: Session,
+    owner_id: uuid.UUID,
+    client: httpx.AsyncClient | None = None,
+    max_urls: int,
+    max_sitemaps: int,
+    max_sitemap_bytes: int,
+    error_rate: float,
+) -> SiteUrls:
+    """
+    Collect the recipe URLs of a site from its sitemaps.
+
+    Args:
+        url: The site's root, or one of its sitemaps.
+        session: Database session, to skip recipes the user already saved.
+        owner_id: The user importing the site.
+        client: HTTP client to use, the shared one by default.
+        max_urls: Stop after this many URLs; also sizes the seen-set.
+        max_sitemaps: Read at most this many sitemaps, indexes included.
+        max_sitemap_bytes: Size limit of one uncompressed sitemap.
+        error_rate: False positive rate of the seen-set, the fraction of
+            new URLs that may be wrongly skipped as seen.
+
+    Raises:
+        CrawlError: If none of the site's sitemaps could be read.
+    """
+    site = _site(urlsplit(url).hostname)
+    seen = BloomFilter(capacity=max_urls, error_rate=error_rate)
+    for saved in _saved_urls(session=session, owner_id=owner_id, site=site):
+        seen.add(normalize_url(saved))
+    client = client or get_http_client()
+    if client is None:
+        async with build_http_client() as temp_client:
+            return await _find_recipe_urls(
+                temp_client,
+                url,
+                site=site,
+                seen=seen,
+                max_urls=max_urls,
+                max_sitemaps=max_sitemaps,
+                max_sitemap_bytes=max_sitemap_bytes,
+            )
+    return await _find_recipe_urls(
+        client,
+        url,
+        site=site,
+        seen=seen,
+        max_urls=max_urls,
+        max_sitemaps=max_sitemaps,
+        max_sitemap_bytes=max_sitemap_bytes,
+    )
+
+
+async def _find_recipe_urls(
+    client: httpx.AsyncClient,
+    url: str,
+    *,
+    site: str,
+    seen: BloomFilter,
+    max_urls: int,
+    max_sitemaps: int,
+    max_sitemap_bytes: int,
+) -> SiteUrls:
+    roots, robots = await _sitemap_roots(client, url)
+    pending = deque(roots[:max_sitemaps])
+    queued = len(pending)
+    read = 0
+    urls = SiteUrls()
+    try:
+        while pending and urls.count < max_urls:
+            sitemap = pending.popleft()
+            # An index may list recipe sitemaps next to post and page ones
+            recipe_sitemaps: list[str] = []
+            other_sitemaps: list[str] = []
+            try:
+                entries = iter_sitemap(client, sitemap, max_bytes=max_sitemap_bytes)
+                async with aclosing(entries):
+                    async for kind, location in entries:
+                        if kind == "sitemap":
+                            name = location.rsplit("/", 1)[-1].lower()
+                            if RECIPE_NAME_RE.search(name):
+                                children = recipe_sitemaps
+                            elif not SKIPPED_SITEMAP_RE.search(name):
+                                children = other_sitemaps
+                            else:
+                                continue
+                            if len(children) < max_sitemaps:
+                                children.append(location)
+                            continue
+                        if not looks_like_recipe_url(location, site):
+                            continue
+                        if robots is not None and not robots.can_fetch(
+                            DEFAULT_HEADERS["User-Agent"], location
+                        ):
+                            continue
+                        if not seen.add(normalize_url(location)):
+                            continue
+                        urls.append(location)
+                        if urls.count >= max_urls:
+                            break
+            except (
+                httpx.HTTPError,
+                HostUnavailableError,
+                SitemapError,
+                ElementTree.ParseError,
+            ) as e:
+                logger.warning(f"Could not read sitemap {sitemap}: {e!r}")
+                continue
+            read += 1
+            for child in (recipe_sitemaps or other_sitemaps)[: max_sitemaps - queued]:
+                pending.append(child)
+                queued += 1
+    except BaseException:
+        urls.close()
+        raise
+    if not read:
+        urls.close()
+        raise CrawlError(f"Could not read a sitemap of {site}")
+    logger.info(f"Found {urls.count} recipe URLs in {read} sitemaps of {site}")
+    return urls
+
+
+def _failure(index: int, url: str, e: Exception) -> CrawlImportResult:
+    status_code, detail = describe_scrape_error(e)
+    return CrawlImportResult(
+        index=index, url=url, status_code=status_code, error=detail[:2048]
+    )
+
+
+async def _scrape_one(
+    *, session: Session, client: httpx.AsyncClient | None, url: str
+) -> ParseRecipeResponse:
+    # Full results in the scrape cache have every field a save needs
+    if settings.SCRAPE_CACHE_ENABLED:
+        cached = scrape_cache.get(session=session, url=url)
+        if cached is not None:
+            return ParseRecipeResponse.model_validate(cached[0])
+    data = await scrape_recipe_from_url(
+        url, client=client, fields=FIELD_PRESETS["save"]
+    )
+    return ParseRecipeResponse.model_validate(data)
+
+
+async def crawl_import(
+    urls: Iterator[str],
+    *,
+    session: Session,
+    owner_id: uuid.UUID,
+    concurrency: int,
+    batch_size: int,
+    client: httpx.AsyncClient | None = None,
+) -> AsyncIterator[list[CrawlImportResult]]:
+    """
+    Scrape URLs and save their recipes for a user.
+
+    ``concurrency`` workers take URLs from the iterator one at a time, so
+    only the URLs being scraped and one batch of results are in memory.
+    Recipes are saved ``batch_size`` per transaction and the results of each
+    saved batch, failures included, are yielded in completion order.
+    """
+    pending = enumerate(urls)
+    done: asyncio.Queue[tuple[int, str, ParseOutcome] | None] = asyncio.Queue(
+        maxsize=batch_size
+    )
+    stopped = False
+
+    async def work() -> None:
+        nonlocal stopped
+        # enumerate() is shared, each next() hands a URL to one worker
+        for index, url in pending:
+            if stopped:
+                break
+            outcome: ParseOutcome
+            try:
+                outcome = await _scrape_one(session=session, client=client, url=url)
+            except Exception as e:
+                if isinstance(e, HostUnavailableError) and not stopped:
+                    logger.warning(f"Stopping the crawl: {e.detail}")
+                    stopped = True
+                outcome = _failure(index, url, e)
+            await done.put((index, url, outcome))
+        await done.put(None)
+
+    workers = [asyncio.create_task(work()) for _ in range(concurrency)]
+    try:
+        running = len(workers)
+        while running:
+            group: list[tuple[int, str, ParseOutcome]] = []
+            while running and len(group) < batch_size:
+                item = await done.get()
+                if item is None:
+                    running -= 1
+                else:
+                    group.append(item)
+            if group:
+                yield _save_group(session=session, owner_id=owner_id, group=group)
+    finally:
+        for worker in workers:
+            worker.cancel()
+
+
+def _save_group(
+    *,
+    session: Session,
+    owner_id: uuid.UUID,
+    group: list[tuple[int, str, ParseOutcome]],
+) -> list[CrawlImportResult]:
+    results: list[CrawlImportResult] = []
+    to_save: list[tuple[CrawlImportResult, ParseRecipeResponse]] = []
+    for index, url, outcome in group:
+        if isinstance(outcome, CrawlImportResult):
+            results.append(outcome)
+            continue
+        result = CrawlImportResult(
+            index=index, url=url, status_code=200, title=outcome.title
+        )
+        results.append(result)
+        to_save.append((result, outcome))
+    if to_save:
+        db_recipes = crud.create_recipes(
+            session=session,
+            recipes_in=[
+                recipe_create_from_parsed(parsed, result.url)
+                for result, parsed in to_save
+            ],
+            owner_id=owner_id,
+            scraped=True,
+        )
+        for (result, _), db_recipe in zip(to_save, db_recipes, strict=True):
+            result.recipe_id = db_recipe.id
+    return results
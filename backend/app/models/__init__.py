@@ -4,7 +4,8 @@ SQLModel models package.
 This package organizes database tables and API schemas by domain:
 - auth: Authentication and utility models (Message, Token, etc.)
 - user: User management models (User table, UserCreate, UserPublic, etc.)
-- recipe: Recipe models (Recipe table, RecipeCreate, RecipePublic, etc.)
+- recipe: Recipe models (Recipe and RecipeSource tables, RecipePublic, etc.)
+- scrape: Scraper bookkeeping tables (ScrapeCacheEntry, etc.)
 
 All models are re-exported here to maintain backward compatibility with
 existing imports like: from app.models import User, Recipe
@@ -14,13 +15,31 @@ from sqlmodel import SQLModel
 
 from app.models.auth import Message, NewPassword, Token, TokenPayload
 from app.models.recipe import (
+    ArchiveImportResult,
+    CrawlImportResult,
     IngredientGroup,
     ParseRecipeResponse,
     Recipe,
+    RecipeCount,
+    RecipeCountSlot,
     RecipeCreate,
     RecipePublic,
+    RecipeSearchHit,
+    RecipeSearchResults,
+    RecipeSource,
     RecipesPublic,
+    RecipeSummariesPublic,
+    RecipeSummary,
     RecipeUpdate,
+    ScrapeBatchRequest,
+    ScrapeBatchResult,
+)
+from app.models.scrape import (
+    HtmlBlob,
+    ScrapeCacheEntry,
+    ScrapeJob,
+    ScrapeJobPublic,
+    StoredPage,
 )
 from app.models.user import (
     UpdatePassword,
@@ -56,7 +75,23 @@ __all__ = [
     "RecipeUpdate",
     "RecipePublic",
     "RecipesPublic",
+    "RecipeSummary",
+    "RecipeSummariesPublic",
+    "RecipeSearchHit",
+    "RecipeSearchResults",
+    "RecipeSource",
+    "RecipeCount",
+    "RecipeCountSlot",
     "IngredientGroup",
     "ParseRecipeResponse",
+    "ScrapeBatchRequest",
+    "ScrapeBatchResult",
+    "ArchiveImportResult",
+    "CrawlImportResult",
+    # Scraper models
+    "ScrapeCacheEntry",
+    "ScrapeJob",
+    "ScrapeJobPublic",
+    "StoredPage",
+    "HtmlBlob",
 ]
-
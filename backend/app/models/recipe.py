@@ -2,7 +2,10 @@
 Recipe models for database tables and request/response schemas.
 
 Database Tables:
+    - RecipeSource: Scraped recipe content, stored once and shared by users
     - Recipe: Recipe storage with scraped/manual data
+    - RecipeCount: Number of recipes of each user
+    - RecipeCountSlot: Number of all recipes, in parts
 
 Request Schemas:
     - RecipeCreate: Create a new recipe
@@ -11,8 +14,17 @@ Request Schemas:
 Response Schemas:
     - RecipePublic: Public recipe information
     - RecipesPublic: Paginated list of recipes
+    - RecipeSummary: Recipe list entry without the recipe's content
+    - RecipeSummariesPublic: Paginated list of recipe summaries
+    - RecipeSearchHit: Recipe summary found by a search, with its rank
+    - RecipeSearchResults: Page of search hits, best first
     - ParseRecipeResponse: Response from recipe scraper
     - IngredientGroup: Grouped ingredients with purpose
+    - ScrapeBatchResult: One streamed line of a batch scrape
+    - ArchiveImportResult: One streamed line of an archive import
+
+Request Schemas (scraper):
+    - ScrapeBatchRequest: URLs to scrape in one batch
 """
 
 from __future__ import annotations
@@ -21,7 +33,10 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING, Any
 
-from sqlalchemy import JSON, DateTime
+from pydantic import model_validator
+from sqlalchemy import Column, DateTime, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from sqlmodel import Field, Relationship, SQLModel
 
 from app.models.base import get_datetime_utc
@@ -93,39 +108,173 @@ class RecipeUpdate(SQLModel):
     nutrients: dict[str, str] | None = None
 
 
+# Content fields a scraped recipe inherits from its RecipeSource
+SHARED_FIELDS = ("ingredients", "ingredient_groups", "instructions", "nutrients")
+
+# Storage of the SHARED_FIELDS. None is stored as SQL NULL, not as a JSON
+# null, so "no value" can be told apart in SQL.
+CONTENT_JSON = JSONB(none_as_null=True)
+
+
+def _content_indexes(table: str) -> tuple[Index, ...]:
+    """GIN indexes of the content fields recipe lists are filtered on."""
+    return (
+        # jsonb_path_ops only answers containment, with a smaller index
+        Index(
+            f"ix_{table}_ingredients",
+            "ingredients",
+            postgresql_using="gin",
+            postgresql_ops={"ingredients": "jsonb_path_ops"},
+        ),
+        # The default jsonb_ops also indexes keys on their own
+        Index(f"ix_{table}_nutrients", "nutrients", postgresql_using="gin"),
+    )
+
+
+class RecipeSource(SQLModel, table=True):
+    """
+    Scraped content of a recipe page, stored once however many users save it.
+
+    Content-addressed: a row is identified by its page's normalized URL and
+    the SHA-256 of its content, so a page whose recipe changed gets a new
+    row and the old one stays with the recipes that reference it. Rows are
+    never updated.
+
+    Table name: recipesource
+    """
+
+    __table_args__ = (
+        UniqueConstraint("url_key", "content_hash"),
+        *_content_indexes("recipesource"),
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    url_key: str = Field(max_length=2048, index=True)
+    content_hash: str = Field(max_length=64)
+    url: str = Field(max_length=2048)
+    title: str = Field(max_length=255)
+    image: str | None = Field(default=None, max_length=2048)
+    site_name: str | None = Field(default=None, max_length=255)
+    ingredients: list[str] | None = Field(default=None, sa_type=CONTENT_JSON)
+    ingredient_groups: list[dict[str, Any]] | None = Field(
+        default=None, sa_type=CONTENT_JSON
+    )
+    instructions: list[str] | None = Field(default=None, sa_type=CONTENT_JSON)
+    nutrients: dict[str, str] | None = Field(default=None, sa_type=CONTENT_JSON)
+    created_at: datetime = Field(
+        default_factory=get_datetime_utc,
+        sa_type=DateTime(timezone=True),
+    )
+
+
+# Maintained by crud.update_search_vectors, and only read by searches
+_search_vector = Column("search_vector", TSVECTOR, nullable=True)
+
+
 # Database model, database table inferred from class name
 class Recipe(RecipeBase, table=True):
     """
     Recipe database table model.
 
     Stores recipe data from web scraping or manual entry.
-    JSON fields allow flexible storage of structured recipe data.
+    JSONB fields allow flexible storage of structured recipe data.
+
+    A scraped recipe references the RecipeSource it was saved from, and
+    its SHARED_FIELDS columns hold only the user's own edits: None means
+    the source's value. Use shared_values() to read them.
+
+    search_vector indexes the title, ingredients and instructions for
+    full-text search, inherited content included. It is deferred, so
+    loading a recipe does not read it.
 
     Relationships:
         - owner: Many-to-one relationship with User
+        - source: Many-to-one relationship with RecipeSource
 
     Foreign Keys:
         - owner_id: References user.id (CASCADE on delete)
+        - source_id: References recipesource.id
 
     Table name: recipe
     """
 
+    # Keyset pagination of recipe lists, see app.lib.pagination
+    __table_args__ = (
+        Index("ix_recipe_owner_id_created_at_id", "owner_id", "created_at", "id"),
+        Index("ix_recipe_created_at_id", "created_at", "id"),
+        Index("ix_recipe_search_vector", "search_vector", postgresql_using="gin"),
+        # Containment and key filters of recipe lists, see crud.recipes_with_ingredients
+        *_content_indexes("recipe"),
+    )
+    __mapper_args__ = {"properties": {"search_vector": deferred(_search_vector)}}
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     owner_id: uuid.UUID = Field(
         foreign_key="user.id", nullable=False, ondelete="CASCADE"
     )
     owner: User = Relationship(back_populates="recipes")
+    source_id: uuid.UUID | None = Field(
+        default=None, foreign_key="recipesource.id", index=True
+    )
+    # Loaded with one extra query for all the recipes of a select. Spelled
+    # out because the annotation is a string SQLModel cannot resolve.
+    source: RecipeSource | None = Relationship(
+        sa_relationship=relationship("RecipeSource", lazy="selectin")
+    )
 
-    # Override base fields to add JSON storage type
-    ingredients: list[str] | None = Field(default=None, sa_type=JSON)
-    ingredient_groups: list[dict[str, Any]] | None = Field(default=None, sa_type=JSON)
-    instructions: list[str] | None = Field(default=None, sa_type=JSON)
-    nutrients: dict[str, str] | None = Field(default=None, sa_type=JSON)
+    # Override base fields to add JSONB storage type
+    ingredients: list[str] | None = Field(default=None, sa_type=CONTENT_JSON)
+    ingredient_groups: list[dict[str, Any]] | None = Field(
+        default=None, sa_type=CONTENT_JSON
+    )
+    instructions: list[str] | None = Field(default=None, sa_type=CONTENT_JSON)
+    nutrients: dict[str, str] | None = Field(default=None, sa_type=CONTENT_JSON)
 
     created_at: datetime | None = Field(
         default_factory=get_datetime_utc,
         sa_type=DateTime(timezone=True),  # type: ignore
     )
+    search_vector: str | None = Field(
+        default=None, sa_column=_search_vector, exclude=True
+    )
+
+    def shared_values(self) -> dict[str, Any]:
+        """The SHARED_FIELDS of the recipe, edited or from its source."""
+        values = {field: getattr(self, field) for field in SHARED_FIELDS}
+        if self.source is not None:
+            for field, value in values.items():
+                if value is None:
+                    values[field] = getattr(self.source, field)
+        return values
+
+
+class RecipeCount(SQLModel, table=True):
+    """
+    Number of recipes of a user, so listings need not count them.
+
+    Changed by crud in the same transaction as the recipes it counts.
+
+    Table name: recipecount
+    """
+
+    owner_id: uuid.UUID = Field(
+        foreign_key="user.id", primary_key=True, ondelete="CASCADE"
+    )
+    count: int = 0
+
+
+class RecipeCountSlot(SQLModel, table=True):
+    """
+    Part of the number of all recipes, which is the sum of every slot.
+
+    Each change goes to a random slot, so concurrent saves by different
+    users do not all wait for the lock of a single counter row.
+
+    Table name: recipecountslot
+    """
+
+    slot: int = Field(primary_key=True)
+    count: int = 0
 
 
 # Properties to return via API, id is always required
@@ -141,16 +290,74 @@ class RecipePublic(RecipeBase):
     owner_id: uuid.UUID
     created_at: datetime | None = None
 
+    @model_validator(mode="before")
+    @classmethod
+    def _inherit_source(cls, data: Any) -> Any:
+        if isinstance(data, Recipe) and data.source_id is not None:
+            return {**data.model_dump(), **data.shared_values()}
+        return data
+
 
 class RecipesPublic(SQLModel):
     """
     Paginated list of recipes for API responses.
 
-    Used by GET /recipes/ endpoint with skip/limit pagination.
+    Used by GET /recipes/ endpoint with cursor or skip/limit pagination.
+    next_cursor is None on the last page. count is None when the caller
+    asked for no count.
     """
 
     data: list[RecipePublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
+
+
+class RecipeSummary(SQLModel):
+    """
+    What a recipe list shows of a recipe, without its content.
+
+    Returned by GET /recipes/?view=summary, which reads only these columns.
+    """
+
+    id: uuid.UUID
+    owner_id: uuid.UUID
+    title: str
+    url: str | None = None
+    image: str | None = None
+    site_name: str | None = None
+    created_at: datetime | None = None
+
+
+class RecipeSummariesPublic(SQLModel):
+    """
+    Paginated list of recipe summaries, see RecipesPublic.
+
+    Used by GET /recipes/ endpoint with view=summary.
+    """
+
+    data: list[RecipeSummary]
+    count: int | None
+    next_cursor: str | None = None
+
+
+class RecipeSearchHit(RecipeSummary):
+    """
+    Recipe found by a full-text search.
+
+    rank is the search's relevance score, higher for a better match.
+    """
+
+    rank: float
+
+
+class RecipeSearchResults(SQLModel):
+    """
+    Page of full-text search hits, best first.
+
+    Used by GET /recipes/search with skip/limit pagination.
+    """
+
+    data: list[RecipeSearchHit]
 
 
 # Recipe scraper response model
@@ -208,3 +415,67 @@ class ParseRecipeResponse(SQLModel):
     # Additional metadata
     keywords: list[str] | None = None
     links: list[dict[str, str]] | None = None
+
+
+MAX_SCRAPE_BATCH_URLS = 500
+
+
+class ScrapeBatchRequest(SQLModel):
+    """
+    Request body for scraping many recipe URLs at once.
+
+    Used by POST /recipes/scrape/batch endpoint.
+    """
+
+    urls: list[str] = Field(min_length=1, max_length=MAX_SCRAPE_BATCH_URLS)
+    save: bool = False
+
+
+class ScrapeBatchResult(SQLModel):
+    """
+    Outcome of scraping one URL in a batch.
+
+    Streamed as one NDJSON line per URL by POST /recipes/scrape/batch,
+    in completion order. Exactly one of recipe or error is set.
+    """
+
+    index: int
+    url: str
+    status_code: int
+    recipe: ParseRecipeResponse | None = None
+    error: str | None = None
+    recipe_id: uuid.UUID | None = None
+
+
+class ArchiveImportResult(SQLModel):
+    """
+    Outcome of importing one page of an uploaded HTML archive.
+
+    Streamed as one NDJSON line per page by POST /recipes/import, one saved
+    batch at a time. recipe_id is set for imported pages, error otherwise.
+    """
+
+    index: int
+    name: str
+    url: str | None = None
+    status_code: int
+    title: str | None = None
+    error: str | None = None
+    recipe_id: uuid.UUID | None = None
+
+
+class CrawlImportResult(SQLModel):
+    """
+    Outcome of importing one page found in a site's sitemaps.
+
+    Streamed as one NDJSON line per page by POST /recipes/import/sitemap,
+    one saved batch at a time. recipe_id is set for imported pages, error
+    otherwise.
+    """
+
+    index: int
+    url: str
+    status_code: int
+    title: str | None = None
+    error: str | None = None
+    recipe_id: uuid.UUID | None = None
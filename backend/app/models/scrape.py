@@ -0,0 +1,172 @@
+"""
+Scraper models for database tables.
+
+Database Tables:
+    - ScrapeCacheEntry: Persistent tier of the scrape result cache
+    - ScrapeJob: Durable queue of background scrape jobs
+    - StoredPage: Latest fetch of each scraped URL: content hash and validators
+    - HtmlBlob: Compressed HTML in the "database" HTML store backend
+
+Response Schemas:
+    - ScrapeJobPublic: Background scrape job status and result
+"""
+
+import uuid
+from datetime import datetime
+from typing import Any, Literal
+
+from sqlalchemy import JSON, DateTime, Index, LargeBinary
+from sqlmodel import Field, SQLModel
+
+from app.models.base import get_datetime_utc
+from app.models.recipe import ParseRecipeResponse
+
+ScrapeJobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+
+class ScrapeCacheEntry(SQLModel, table=True):
+    """
+    Cached scraper output for a normalized recipe URL.
+
+    Shared by all workers and kept across restarts. Rows past expires_at
+    are treated as misses, overwritten on the next scrape and deleted by the
+    scrape worker's periodic purge.
+
+    Table name: scrapecacheentry
+    """
+
+    url_key: str = Field(primary_key=True, max_length=2048)
+    url: str = Field(max_length=2048)
+    data: dict[str, Any] = Field(sa_type=JSON)
+    created_at: datetime = Field(
+        default_factory=get_datetime_utc,
+        sa_type=DateTime(timezone=True),
+    )
+    expires_at: datetime = Field(
+        sa_type=DateTime(timezone=True),
+        index=True,
+    )
+
+
+class StoredPage(SQLModel, table=True):
+    """
+    The latest fetch of a recipe URL, for offline re-parsing and refreshes.
+
+    Written by the scraper after every download. digest is the SHA-256 of
+    the page, or None when the download stopped early at a JSON-LD recipe.
+    With SCRAPER_HTML_STORE enabled the page itself is kept in the HTML
+    store, once however many URLs or scrapes it comes from. etag and
+    last_modified are the response's validators, sent back by the recipe
+    refresh in conditional requests; checked_at is when the URL was last
+    fetched or revalidated.
+
+    Table name: storedpage
+    """
+
+    url_key: str = Field(primary_key=True, max_length=2048)
+    url: str = Field(max_length=2048)
+    digest: str | None = Field(default=None, max_length=64, index=True)
+    # Character encoding the page was served with
+    encoding: str = Field(max_length=40)
+    etag: str | None = Field(default=None, max_length=512)
+    last_modified: str | None = Field(default=None, max_length=64)
+    fetched_at: datetime = Field(
+        default_factory=get_datetime_utc,
+        sa_type=DateTime(timezone=True),
+    )
+    checked_at: datetime = Field(
+        default_factory=get_datetime_utc,
+        sa_type=DateTime(timezone=True),
+        index=True,
+    )
+
+
+class HtmlBlob(SQLModel, table=True):
+    """
+    Compressed page HTML, addressed by the SHA-256 of the uncompressed page.
+
+    Only used by the "database" HTML store backend, see app.lib.html_store.
+
+    Table name: htmlblob
+    """
+
+    digest: str = Field(primary_key=True, max_length=64)
+    codec: str = Field(max_length=10)
+    size: int
+    data: bytes = Field(sa_type=LargeBinary)
+    created_at: datetime = Field(
+        default_factory=get_datetime_utc,
+        sa_type=DateTime(timezone=True),
+    )
+
+
+# Database model, database table inferred from class name
+class ScrapeJob(SQLModel, table=True):
+    """
+    Background scrape job table model.
+
+    Jobs are created by POST /recipes/scrape?background=true and claimed by
+    ``python -m app.worker`` processes with FOR UPDATE SKIP LOCKED.
+    Failed attempts that can be retried go back to "queued" with a later
+    run_after.
+
+    Foreign Keys:
+        - owner_id: References user.id (CASCADE on delete)
+
+    Table name: scrapejob
+    """
+
+    __table_args__ = (Index("ix_scrapejob_status_run_after", "status", "run_after"),)
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    owner_id: uuid.UUID = Field(
+        foreign_key="user.id", nullable=False, ondelete="CASCADE"
+    )
+    url: str = Field(max_length=2048)
+    save: bool = False
+    status: str = Field(default="queued", max_length=20)
+    attempts: int = 0
+    max_attempts: int = 3
+    run_after: datetime = Field(
+        default_factory=get_datetime_utc,
+        sa_type=DateTime(timezone=True),
+    )
+    locked_at: datetime | None = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+    )
+    result: dict[str, Any] | None = Field(default=None, sa_type=JSON)
+    error: str | None = Field(default=None, max_length=2048)
+    status_code: int | None = None
+    recipe_id: uuid.UUID | None = None
+    created_at: datetime = Field(
+        default_factory=get_datetime_utc,
+        sa_type=DateTime(timezone=True),
+    )
+    updated_at: datetime = Field(
+        default_factory=get_datetime_utc,
+        sa_type=DateTime(timezone=True),
+    )
+
+
+# Properties to return via API, id is always required
+class ScrapeJobPublic(SQLModel):
+    """
+    Background scrape job returned by API endpoints.
+
+    result holds the parsed recipe once status is "succeeded"; error and
+    status_code describe the last failure.
+    Used by the /recipes/scrape/jobs endpoints.
+    """
+
+    id: uuid.UUID
+    url: str
+    save: bool
+    status: ScrapeJobStatus
+    attempts: int
+    result: ParseRecipeResponse | None = None
+    error: str | None = None
+    status_code: int | None = None
+    recipe_id: uuid.UUID | None = None
+    created_at: datetime
+    updated_at: datetime
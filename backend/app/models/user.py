@@ -18,10 +18,10 @@ Response Schemas:
 
 import uuid
 from datetime import datetime
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Literal
 
 from pydantic import EmailStr
-from sqlalchemy import DateTime
+from sqlalchemy import DateTime, Index
 from sqlmodel import Field, Relationship, SQLModel
 
 from app.models.base import get_datetime_utc
@@ -29,6 +29,25 @@ from app.models.base import get_datetime_utc
 if TYPE_CHECKING:
     from app.models.recipe import Recipe
 
+# Postgres text search configurations a user can search their recipes in
+SearchLanguage = Literal[
+    "simple",
+    "danish",
+    "dutch",
+    "english",
+    "finnish",
+    "french",
+    "german",
+    "hungarian",
+    "italian",
+    "norwegian",
+    "portuguese",
+    "romanian",
+    "russian",
+    "spanish",
+    "swedish",
+    "turkish",
+]
 
 # Shared properties
 class UserBase(SQLModel):
@@ -92,6 +111,7 @@ class UserUpdateMe(SQLModel):
     
     full_name: str | None = Field(default=None, max_length=255)
     email: EmailStr | None = Field(default=None, max_length=255)
+    search_language: SearchLanguage | None = None
 
 
 class UpdatePassword(SQLModel):
@@ -119,8 +139,13 @@ class User(UserBase, table=True):
     Table name: user
     """
     
+    # Keyset pagination of the user list, see app.lib.pagination
+    __table_args__ = (Index("ix_user_created_at_id", "created_at", "id"),)
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     hashed_password: str
+    # Text search configuration of the user's recipes, see SearchLanguage
+    search_language: str = Field(default="simple", max_length=32)
     created_at: datetime | None = Field(
         default_factory=get_datetime_utc,
         sa_type=DateTime(timezone=True),  # type: ignore
@@ -139,15 +164,18 @@ class UserPublic(UserBase):
     
     id: uuid.UUID
     created_at: datetime | None = None
+    search_language: SearchLanguage = "simple"
 
 
 class UsersPublic(SQLModel):
     """
     Paginated list of users for API responses.
     
-    Used by /users/ endpoint with skip/limit pagination.
+    Used by /users/ endpoint with cursor or skip/limit pagination.
+    next_cursor is None on the last page.
     """
     
     data: list[UserPublic]
     count: int
+    next_cursor: str | None = None
 
@@ -0,0 +1,73 @@
+"""Re-parse saved recipes from the HTML store.
+
+Run with ``python -m app.reparse_recipes`` after upgrading
+``recipe-scrapers``. The ingredients, ingredient groups, instructions and
+nutrients of every recipe whose page is in the HTML store are regenerated
+on a process pool, without network access, and saved in batches. See
+``app.lib.recipe_reparse``.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine
+from app.lib.html_store import get_html_store
+from app.lib.parse_executor import close_parse_executor, init_parse_executor
+from app.lib.recipe_reparse import reparse_recipes
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def run(*, batch_size: int, concurrency: int) -> int:
+    store = get_html_store()
+    if store is None:
+        logger.error("SCRAPER_HTML_STORE is off, there are no pages to re-parse")
+        return 1
+
+    init_parse_executor()
+    try:
+        with Session(engine) as session:
+            progress = None
+            async for progress in reparse_recipes(
+                session=session,
+                store=store,
+                batch_size=batch_size,
+                concurrency=concurrency,
+            ):
+                logger.info(
+                    f"Scanned {progress.scanned} recipes: {progress.updated} updated, "
+                    f"{progress.missing} without a stored page, {progress.failed} failed"
+                )
+    finally:
+        close_parse_executor()
+    if progress is None:
+        logger.info("No recipes to re-parse")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.REPARSE_BATCH_SIZE,
+        help="Recipes updated per transaction",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.REPARSE_CONCURRENCY,
+        help="Pages parsed at a time",
+    )
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(batch_size=args.batch_size, concurrency=args.concurrency)))
+
+
+if __name__ == "__main__":
+    main()
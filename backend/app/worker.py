@@ -0,0 +1,208 @@
+"""Background scrape worker.
+
+Run with ``python -m app.worker``. Each process claims queued ScrapeJob rows
+with FOR UPDATE SKIP LOCKED, scrapes them with ``scrape_recipe_from_url``
+and writes the result (and optionally the saved recipe) back. Scraping
+throughput scales by running more worker processes. Workers also purge
+expired rows from the shared scrape cache and, with RECIPE_REFRESH_ENABLED,
+revalidate the pages of saved recipes (see ``app.lib.recipe_refresh``).
+"""
+
+import asyncio
+import logging
+import random
+import signal
+from datetime import timedelta
+
+import httpx
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.core.db import engine
+from app.lib.host_scheduler import HostUnavailableError
+from app.lib.http_client import close_http_client, init_http_client
+from app.lib.parse_executor import (
+    ParseTimeoutError,
+    close_parse_executor,
+    init_parse_executor,
+)
+from app.lib.recipe_refresh import refresh_due_pages
+from app.lib.recipe_scraper import (
+    describe_scrape_error,
+    recipe_create_from_parsed,
+    scrape_recipe_from_url,
+)
+from app.lib.scrape_cache import scrape_cache
+from app.models import ParseRecipeResponse, ScrapeJob
+from app.models.base import get_datetime_utc
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def is_retryable(e: Exception) -> bool:
+    """Whether a failed scrape may succeed if attempted again later."""
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code == 429 or e.response.status_code >= 500
+    return isinstance(
+        e, httpx.RequestError | HostUnavailableError | ParseTimeoutError | TimeoutError
+    )
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter for the next attempt of a job."""
+    delay = settings.SCRAPE_JOB_RETRY_BASE_DELAY * 2 ** (attempts - 1)
+    return float(delay * random.uniform(0.5, 1.5))
+
+
+def record_failure(job: ScrapeJob, e: Exception) -> None:
+    """Requeue a failed job with backoff, or mark it failed for good."""
+    status_code, detail = describe_scrape_error(e)
+    job.error = detail[:2048]
+    job.status_code = status_code
+    if is_retryable(e) and job.attempts < job.max_attempts:
+        job.status = "queued"
+        job.run_after = get_datetime_utc() + timedelta(
+            seconds=retry_delay(job.attempts)
+        )
+        logger.info(f"Job {job.id} attempt {job.attempts} failed, retrying: {detail}")
+    else:
+        job.status = "failed"
+        logger.info(f"Job {job.id} failed: {detail}")
+
+
+async def run_job(session: Session, job: ScrapeJob) -> None:
+    """Scrape a claimed job and record its outcome."""
+    try:
+        # Bounded below the lock timeout so no other worker reclaims the job
+        recipe_data = await asyncio.wait_for(
+            scrape_recipe_from_url(url=job.url), timeout=settings.SCRAPE_JOB_TIMEOUT
+        )
+        parsed = ParseRecipeResponse(**recipe_data)
+    except Exception as e:
+        record_failure(job, e)
+    else:
+        if settings.SCRAPE_CACHE_ENABLED:
+            scrape_cache.set(session=session, url=job.url, data=parsed)
+        if job.save:
+            recipe = crud.create_recipe(
+                session=session,
+                recipe_in=recipe_create_from_parsed(parsed, job.url),
+                owner_id=job.owner_id,
+                scraped=True,
+            )
+            job.recipe_id = recipe.id
+        job.result = parsed.model_dump(mode="json")
+        job.error = None
+        job.status_code = 200
+        job.status = "succeeded"
+        logger.info(f"Job {job.id} succeeded")
+
+    job.locked_at = None
+    job.updated_at = get_datetime_utc()
+    session.add(job)
+    session.commit()
+
+
+async def work(stop: asyncio.Event) -> None:
+    """Claim and run jobs one at a time until stop is set."""
+    with Session(engine) as session:
+        while not stop.is_set():
+            job = crud.claim_scrape_job(
+                session=session, lock_timeout=settings.SCRAPE_JOB_LOCK_TIMEOUT
+            )
+            if job is None:
+                try:
+                    await asyncio.wait_for(
+                        stop.wait(), timeout=settings.SCRAPE_JOB_POLL_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await run_job(session, job)
+            except Exception as e:
+                logger.exception(f"Job {job.id} crashed")
+                session.rollback()
+                try:
+                    session.refresh(job)
+                    record_failure(job, e)
+                    job.locked_at = None
+                    job.updated_at = get_datetime_utc()
+                    session.add(job)
+                    session.commit()
+                except Exception:
+                    # The job stays "running" and is reclaimed after the lock timeout
+                    logger.exception(f"Could not record the failure of job {job.id}")
+                    session.rollback()
+
+
+async def purge_scrape_cache(stop: asyncio.Event) -> None:
+    """Delete expired scrape cache rows every purge interval until stop is set."""
+    while not stop.is_set():
+        try:
+            with Session(engine) as session:
+                purged = scrape_cache.purge_expired(session=session)
+            if purged:
+                logger.info(f"Purged {purged} expired scrape cache entries")
+        except Exception:
+            logger.exception("Purging the scrape cache failed")
+        try:
+            await asyncio.wait_for(
+                stop.wait(), timeout=settings.SCRAPE_CACHE_PURGE_INTERVAL_SECONDS
+            )
+        except asyncio.TimeoutError:
+            pass
+
+
+async def refresh_recipes(stop: asyncio.Event) -> None:
+    """Revalidate a batch of saved recipe pages every refresh interval until stop is set."""
+    while not stop.is_set():
+        try:
+            with Session(engine) as session:
+                outcomes = await refresh_due_pages(
+                    session=session,
+                    limit=settings.RECIPE_REFRESH_BATCH_SIZE,
+                    max_age=settings.RECIPE_REFRESH_MAX_AGE_SECONDS,
+                    concurrency=settings.RECIPE_REFRESH_CONCURRENCY,
+                )
+            if outcomes:
+                logger.info(f"Refreshed recipe pages: {dict(outcomes)}")
+        except Exception:
+            logger.exception("Refreshing recipe pages failed")
+        try:
+            await asyncio.wait_for(
+                stop.wait(), timeout=settings.RECIPE_REFRESH_INTERVAL_SECONDS
+            )
+        except asyncio.TimeoutError:
+            pass
+
+
+async def main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await init_http_client()
+    init_parse_executor()
+    logger.info(
+        f"Scrape worker started with {settings.SCRAPE_WORKER_CONCURRENCY} slots"
+    )
+    tasks = [purge_scrape_cache(stop)]
+    if settings.RECIPE_REFRESH_ENABLED:
+        tasks.append(refresh_recipes(stop))
+    try:
+        await asyncio.gather(
+            *tasks,
+            *(work(stop) for _ in range(settings.SCRAPE_WORKER_CONCURRENCY)),
+        )
+    finally:
+        close_parse_executor()
+        await close_http_client()
+        logger.info("Scrape worker stopped")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,144 @@
+"""Micro-benchmark of turning scraper output into a saved row and a response.
+
+``POST /recipes/scrape?save=true`` used to validate the same recipe several
+times: as ``ParseRecipeResponse``, again as ``RecipeCreate``, again in
+``Recipe.model_validate`` and once more against the response model on the
+way out. It now validates it once. This compares both paths on the parsed
+pages of a corpus and on synthetic recipes with many ingredient groups:
+
+- ``legacy``: the old path, with the response model validating a dumped
+  copy of the response as FastAPI does for returned models
+- ``single_pass``: ``ParseRecipeResponse.model_validate``, then
+  ``recipe_create_from_parsed``, ``crud.build_recipe`` and one
+  ``model_dump_json``
+
+Run from ``backend/``::
+
+    python -m benchmarks.conversion --iterations 2000
+"""
+
+import argparse
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+from app import crud
+from app.lib.recipe_parser import parse_recipe_html
+from app.lib.recipe_scraper import recipe_create_from_parsed
+from app.models import ParseRecipeResponse, Recipe, RecipeCreate
+from benchmarks.scraper import DEFAULT_CORPUS, load_corpus
+
+OWNER_ID = uuid.UUID(int=0)
+
+
+def legacy_convert(data: dict[str, Any], url: str) -> tuple[Recipe, str]:
+    """The conversion before single-pass validation, for comparison."""
+    parsed = ParseRecipeResponse(**data)
+    ingredient_groups = None
+    if parsed.ingredient_groups:
+        ingredient_groups = [g.model_dump() for g in parsed.ingredient_groups]
+    recipe_in = RecipeCreate(
+        title=parsed.title or "Untitled Recipe",
+        url=url,
+        image=parsed.image,
+        site_name=parsed.site_name,
+        ingredients=parsed.ingredients,
+        ingredient_groups=ingredient_groups,
+        instructions=parsed.instruction_list or [],
+        nutrients=parsed.nutrients,
+    )
+    row = Recipe.model_validate(recipe_in, update={"owner_id": OWNER_ID})
+    response = ParseRecipeResponse.model_validate(parsed.model_dump())
+    return row, response.model_dump_json()
+
+
+def single_pass_convert(data: dict[str, Any], url: str) -> tuple[Recipe, str]:
+    """The conversion of the scrape route, validating every field once."""
+    parsed = ParseRecipeResponse.model_validate(data)
+    row = crud.build_recipe(
+        recipe_in=recipe_create_from_parsed(parsed, url), owner_id=OWNER_ID
+    )
+    return row, parsed.model_dump_json()
+
+
+CONVERTERS = {"legacy": legacy_convert, "single_pass": single_pass_convert}
+
+
+def large_recipe(groups: int, per_group: int) -> dict[str, Any]:
+    """Scraper output of a recipe with many ingredient groups."""
+    ingredient_groups = [
+        {
+            "purpose": f"Part {g}",
+            "ingredients": [f"{i} g ingredient {g}.{i}" for i in range(per_group)],
+        }
+        for g in range(groups)
+    ]
+    return {
+        "title": "Large recipe",
+        "site_name": "bench.example",
+        "ingredients": [i for group in ingredient_groups for i in group["ingredients"]],
+        "ingredient_groups": ingredient_groups,
+        "instructions": "\n".join(f"Step {s}" for s in range(40)),
+        "instruction_list": [f"Step {s}" for s in range(40)],
+        "nutrients": {f"nutrient{n}": f"{n} g" for n in range(15)},
+        "keywords": [f"keyword{k}" for k in range(20)],
+        "total_time": 90,
+        "yields": "8 servings",
+    }
+
+
+def load_inputs(corpus: Path) -> dict[str, tuple[dict[str, Any], str]]:
+    """Scraper output to convert, by name, with the URL it came from."""
+    inputs = {
+        page.path.name: (parse_recipe_html(page.html, page.url), page.url)
+        for page in load_corpus(corpus)
+    }
+    url = "https://bench.example/recipes/large"
+    inputs["large-5x20"] = (large_recipe(5, 20), url)
+    inputs["large-20x30"] = (large_recipe(20, 30), url)
+    return inputs
+
+
+def run_benchmark(corpus: Path, *, iterations: int) -> dict[str, dict[str, float]]:
+    """
+    Time both conversions of every input.
+
+    Returns:
+        Microseconds per conversion by input and converter, with the
+        speedup of the single-pass path.
+    """
+    results = {}
+    for name, (data, url) in load_inputs(corpus).items():
+        timings = {}
+        for converter_name, convert in CONVERTERS.items():
+            convert(data, url)
+            started = time.perf_counter()
+            for _ in range(iterations):
+                convert(data, url)
+            elapsed = time.perf_counter() - started
+            timings[converter_name] = round(elapsed / iterations * 1e6, 2)
+        timings["speedup"] = round(timings["legacy"] / timings["single_pass"], 2)
+        results[name] = timings
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.corpus, iterations=args.iterations)
+    print(f"  {'input':<24} {'legacy':>10} {'single_pass':>12} {'speedup':>8}")
+    for name, timings in results.items():
+        print(
+            f"  {name:<24} {timings['legacy']:>8.1f}us "
+            f"{timings['single_pass']:>10.1f}us {timings['speedup']:>7.2f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""Local mock recipe site for load tests of the scraper.
+
+Serves a corpus of recipe pages for every site they came from, so
+``POST /recipes/scrape`` can be load-tested on an isolated machine with
+realistic network behaviour but without touching real websites. Each
+response waits a lognormally distributed time before its headers, streams
+its body at a fixed bandwidth and fails with a server error at a given
+rate, all seeded for repeatable runs.
+
+The corpus is a directory of saved pages (``*.html`` with ``urls.json`` or
+canonical links, as for ``benchmarks.scraper``) and/or a cassette
+directory recorded with ``SCRAPER_TRANSPORT=record``. Pages are looked up
+by the request's Host header and path, so run the API with::
+
+    SCRAPER_TRANSPORT=mock_site SCRAPER_MOCK_SITE_URL=http://127.0.0.1:8900
+
+and it scrapes the pages' real URLs while every request goes here. Run
+from ``backend/``, e.g.::
+
+    python -m benchmarks.mock_site --cassettes /app/data/cassettes \\
+        --latency-ms 80 --latency-sigma 0.6 --bandwidth-kbps 2000 --error-rate 0.01
+
+``benchmarks.scrape_load`` then drives the API and reports its throughput
+and tail latency.
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import sys
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+from app.lib.http_transport import DROPPED_HEADERS, CassetteStore
+from benchmarks.scraper import DEFAULT_CORPUS, load_corpus
+
+CHUNK_SIZE = 16 * 1024
+
+
+@dataclass
+class SiteProfile:
+    """
+    Network behaviour of the mock site.
+
+    Attributes:
+        latency: Median seconds before the response headers are sent.
+        latency_sigma: Spread of the lognormal latency, 0 for a fixed one.
+        bandwidth: Bytes per second per response, 0 for unlimited.
+        error_rate: Fraction of requests answered with one of error_statuses.
+        error_statuses: Status codes to fail with, picked at random.
+        seed: Random seed, for the same latencies and errors on every run.
+    """
+
+    latency: float = 0.0
+    latency_sigma: float = 0.0
+    bandwidth: float = 0.0
+    error_rate: float = 0.0
+    error_statuses: tuple[int, ...] = (500, 502, 503, 429)
+    seed: int | None = None
+
+
+@dataclass
+class MockPage:
+    url: str
+    status_code: int
+    headers: list[tuple[str, str]]
+    body: bytes
+
+
+def page_key(url: str) -> str:
+    """Host, path and query of a URL, as the mock site looks pages up."""
+    parts = urlsplit(url)
+    key = f"{parts.netloc.lower()}{parts.path or '/'}"
+    return f"{key}?{parts.query}" if parts.query else key
+
+
+def load_pages(
+    corpus: Path | None = None, cassettes: Path | None = None
+) -> dict[str, MockPage]:
+    """Load the pages to serve, recorded responses taking precedence."""
+    pages = {}
+    if corpus is not None:
+        for page in load_corpus(corpus):
+            pages[page_key(page.url)] = MockPage(
+                page.url,
+                200,
+                [("Content-Type", "text/html; charset=utf-8")],
+                page.html.encode(),
+            )
+    if cassettes is not None:
+        for cassette in CassetteStore(cassettes):
+            if cassette.method == "GET":
+                pages[page_key(cassette.url)] = MockPage(
+                    cassette.url, cassette.status_code, cassette.headers, cassette.body
+                )
+    return pages
+
+
+def build_mock_site(pages: dict[str, MockPage], profile: SiteProfile) -> Starlette:
+    """Build the ASGI app serving ``pages`` with the given network behaviour."""
+    rng = random.Random(profile.seed)
+
+    async def stream(body: bytes) -> AsyncIterator[bytes]:
+        for start in range(0, len(body), CHUNK_SIZE):
+            chunk = body[start : start + CHUNK_SIZE]
+            if profile.bandwidth:
+                await asyncio.sleep(len(chunk) / profile.bandwidth)
+            yield chunk
+
+    async def serve(request: Request) -> Response:
+        if profile.latency:
+            delay = profile.latency
+            if profile.latency_sigma:
+                delay = rng.lognormvariate(math.log(delay), profile.latency_sigma)
+            await asyncio.sleep(delay)
+        if profile.error_rate and rng.random() < profile.error_rate:
+            return Response(status_code=rng.choice(profile.error_statuses))
+        # Match the URL as it was recorded, before any percent-decoding
+        path = request.scope.get("raw_path", b"").decode() or request.url.path
+        query = request.url.query
+        path = f"{path}?{query}" if query else path
+        page = pages.get(f"{request.headers.get('host', '').lower()}{path}")
+        if page is None:
+            return Response(status_code=404)
+        headers = {
+            name: value
+            for name, value in page.headers
+            if name.lower() not in DROPPED_HEADERS
+        }
+        return StreamingResponse(
+            stream(page.body), status_code=page.status_code, headers=headers
+        )
+
+    return Starlette(routes=[Route("/{path:path}", serve)])
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--corpus",
+        type=Path,
+        help=f"Directory of saved pages, {DEFAULT_CORPUS} if no cassettes are given",
+    )
+    parser.add_argument("--cassettes", type=Path, help="Cassette directory to serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument(
+        "--latency-sigma",
+        type=float,
+        default=0.5,
+        help="Lognormal spread of the latency, 0 for a fixed latency",
+    )
+    parser.add_argument(
+        "--bandwidth-kbps",
+        type=float,
+        default=0.0,
+        help="Kilobytes per second per response, 0 for unlimited",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    corpus = args.corpus
+    if corpus is None and args.cassettes is None:
+        corpus = DEFAULT_CORPUS
+    pages = load_pages(corpus, args.cassettes)
+    if not pages:
+        raise SystemExit("No pages to serve")
+    profile = SiteProfile(
+        latency=args.latency_ms / 1000,
+        latency_sigma=args.latency_sigma,
+        bandwidth=args.bandwidth_kbps * 1024,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    print(f"Serving {len(pages)} pages on http://{args.host}:{args.port}")
+
+    # Only needed to run the server, the app itself is plain ASGI
+    import uvicorn
+
+    uvicorn.run(
+        build_mock_site(pages, profile),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""Load test of ``POST /recipes/scrape`` against the local mock recipe site.
+
+Sends a fixed number of scrape requests at a fixed concurrency to a
+running API, cycling through the URLs of a corpus, and reports the
+request rate, the status codes and latency percentiles up to p99.9.
+
+Start the mock site (``benchmarks.mock_site``) and an API whose scraper
+sends its requests there, then run from ``backend/``, e.g.::
+
+    SCRAPER_TRANSPORT=mock_site fastapi run app/main.py &
+    python -m benchmarks.mock_site --cassettes /app/data/cassettes &
+    python -m benchmarks.scrape_load --cassettes /app/data/cassettes \\
+        --requests 2000 --concurrency 64 --output load.json
+
+Every request bypasses the scrape cache with ``force_refresh`` unless
+``--use-cache`` is given. The URLs come from the same corpus and cassette
+directories the mock site serves.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from app.core.config import settings
+from benchmarks.mock_site import load_pages
+from benchmarks.scraper import DEFAULT_CORPUS, percentiles
+
+TAIL_PERCENTILES = (50, 95, 99, 99.9)
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> None:
+    """Log in and send the access token with every later request."""
+    response = await client.post(
+        "/login/access-token", data={"username": email, "password": password}
+    )
+    response.raise_for_status()
+    client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    urls: list[str],
+    *,
+    requests: int,
+    concurrency: int,
+    params: dict[str, str] | None = None,
+) -> dict[str, Any]:
+    """
+    Scrape ``requests`` URLs with ``concurrency`` requests in flight.
+
+    Args:
+        client: Client for the API, logged in, with its base URL set.
+        urls: URLs to scrape, repeated in order as needed.
+        requests: Number of requests to send.
+        concurrency: Number of requests in flight at any time.
+        params: Extra query parameters of every request.
+
+    Returns:
+        The status counts (exception names for failed requests), the request
+        rate and latency percentiles in milliseconds, overall and of the
+        successful requests.
+    """
+    # Workers share one iterator so exactly ``requests`` requests are sent
+    work = iter(itertools.islice(itertools.cycle(urls), requests))
+    statuses: Counter[str] = Counter()
+    latencies: list[float] = []
+    ok_latencies: list[float] = []
+
+    async def worker() -> None:
+        for url in work:
+            started = time.perf_counter()
+            try:
+                response = await client.post(
+                    "/recipes/scrape", params={"url": url, **(params or {})}
+                )
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            else:
+                status = str(response.status_code)
+            elapsed = time.perf_counter() - started
+            statuses[status] += 1
+            latencies.append(elapsed)
+            if status == "200":
+                ok_latencies.append(elapsed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "requests": requests,
+            "concurrency": concurrency,
+            "urls": len(urls),
+            "params": params or {},
+        },
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(requests / elapsed, 2),
+        "statuses": dict(statuses.most_common()),
+        "latency": percentiles(latencies, TAIL_PERCENTILES) if latencies else {},
+        "ok_latency": (
+            percentiles(ok_latencies, TAIL_PERCENTILES) if ok_latencies else {}
+        ),
+    }
+
+
+def print_report(results: dict[str, Any]) -> None:
+    meta = results["meta"]
+    print(
+        f"{meta['requests']} requests over {meta['urls']} URLs at concurrency "
+        f"{meta['concurrency']} in {results['seconds']}s, "
+        f"{results['requests_per_second']} requests/s"
+    )
+    print("  " + ", ".join(f"{k}: {v}" for k, v in results["statuses"].items()))
+    for name in ("latency", "ok_latency"):
+        values = results[name]
+        print(f"  {name:<10} " + " ".join(f"{k} {v:.1f}ms" for k, v in values.items()))
+
+
+async def run(args: argparse.Namespace, urls: list[str]) -> dict[str, Any]:
+    params = {} if args.use_cache else {"force_refresh": "true"}
+    if args.fields:
+        params["fields"] = args.fields
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=args.api_url, limits=limits, timeout=args.timeout
+    ) as client:
+        await login(client, args.email, args.password)
+        return await run_load(
+            client,
+            urls,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            params=params,
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--api-url", default=f"http://localhost:8000{settings.API_V1_STR}"
+    )
+    parser.add_argument("--email", default=settings.FIRST_SUPERUSER)
+    parser.add_argument("--password", default=settings.FIRST_SUPERUSER_PASSWORD)
+    parser.add_argument(
+        "--corpus",
+        type=Path,
+        help=f"Directory of saved pages, {DEFAULT_CORPUS} if no cassettes are given",
+    )
+    parser.add_argument("--cassettes", type=Path, help="Cassette directory")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--fields", help="Fields to request, as for the API")
+    parser.add_argument(
+        "--use-cache",
+        action="store_true",
+        help="Let the API answer from its scrape cache",
+    )
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", type=Path, help="Save the results as JSON")
+    args = parser.parse_args(argv)
+
+    corpus = args.corpus
+    if corpus is None and args.cassettes is None:
+        corpus = DEFAULT_CORPUS
+    urls = [
+        page.url
+        for page in load_pages(corpus, args.cassettes).values()
+        if page.status_code == 200 and not page.url.endswith("/robots.txt")
+    ]
+    if not urls:
+        raise SystemExit("No pages to scrape")
+
+    results = asyncio.run(run(args, urls))
+    print_report(results)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Results saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
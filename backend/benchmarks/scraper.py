@@ -0,0 +1,320 @@
+"""Offline benchmark of the recipe scraper pipeline.
+
+Runs every stage of ``POST /recipes/scrape`` after the download against a
+directory of saved recipe pages, so parser changes and ``recipe-scrapers``
+upgrades can be measured without the network:
+
+- ``jsonld``: the JSON-LD fast path (``extract_jsonld_recipe``)
+- ``scrape_html``: building the site scraper and its DOM
+- ``to_json``: extracting the recipe fields
+- ``validate``: ``ParseRecipeResponse`` validation
+- ``convert``: the ``RecipeCreate`` conversion used when saving
+
+Reports per-page latency percentiles per stage, peak RSS, peak traced
+allocations per page and full-pipeline pages per second per core. Results
+can be saved as a JSON baseline and later runs compared against it.
+
+Run from ``backend/`` with the app's settings available, e.g.::
+
+    python -m benchmarks.scraper --save-baseline benchmarks/baseline.json
+    python -m benchmarks.scraper --compare benchmarks/baseline.json
+
+Pages are ``*.html`` files. Their URL, which picks the site scraper, is read
+from an optional ``urls.json`` in the same directory mapping file names to
+URLs, or else from the page's canonical link.
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import resource
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from importlib.metadata import version
+from pathlib import Path
+from statistics import median
+from typing import Any
+
+from recipe_scrapers import scrape_html
+
+from app.lib.recipe_jsonld import extract_jsonld_recipe
+from app.lib.recipe_scraper import recipe_create_from_parsed
+from app.models import ParseRecipeResponse
+
+DEFAULT_CORPUS = Path(__file__).parent.parent / "tests" / "test_data"
+STAGES = ("jsonld", "scrape_html", "to_json", "validate", "convert")
+PERCENTILES = (50, 90, 99)
+
+CANONICAL_RE = re.compile(
+    r"<link[^>]+rel=[\"']canonical[\"'][^>]*href=[\"']([^\"']+)", re.IGNORECASE
+)
+
+
+class Page:
+    """A saved recipe page and the URL it was fetched from."""
+
+    def __init__(self, path: Path, url: str) -> None:
+        self.path = path
+        self.url = url
+        self.html = path.read_text(errors="replace")
+
+
+def load_corpus(directory: Path) -> list[Page]:
+    """Load the saved pages of a corpus directory."""
+    manifest_path = directory / "urls.json"
+    manifest: dict[str, str] = {}
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text())
+    pages = []
+    for path in sorted(directory.glob("*.html")):
+        url = manifest.get(path.name)
+        if url is None:
+            match = CANONICAL_RE.search(path.read_text(errors="replace"))
+            if match is None:
+                print(f"Skipping {path.name}: no URL in urls.json or canonical link")
+                continue
+            url = match.group(1)
+        pages.append(Page(path, url))
+    return pages
+
+
+def run_pipeline(html: str, url: str, timings: dict[str, float] | None = None) -> None:
+    """Run every pipeline stage once, adding each stage's seconds to timings."""
+
+    def timed(stage: str, fn: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        result = fn()
+        if timings is not None:
+            timings[stage] = time.perf_counter() - started
+        return result
+
+    timed("jsonld", lambda: extract_jsonld_recipe(html.encode(), url))
+    scraper = timed("scrape_html", lambda: scrape_html(html, url))
+    data = timed("to_json", scraper.to_json)
+    data["instruction_list"] = data.pop("instructions_list", None)
+    parsed = timed("validate", lambda: ParseRecipeResponse(**data))
+    timed("convert", lambda: recipe_create_from_parsed(parsed, url))
+
+
+def percentiles(
+    samples: list[float], points: tuple[float, ...] = PERCENTILES
+) -> dict[str, float]:
+    """Nearest-rank percentiles of a list of seconds, in milliseconds."""
+    ordered = sorted(samples)
+    result = {}
+    for p in points:
+        index = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered)) - 1))
+        result[f"p{p}"] = round(ordered[index] * 1000, 3)
+    return result
+
+
+def measure_latency(pages: list[Page], iterations: int, warmup: int) -> dict[str, Any]:
+    """Time every stage for every page and summarize per stage and per page."""
+    samples: dict[str, list[float]] = {stage: [] for stage in (*STAGES, "total")}
+    per_page = {}
+    for page in pages:
+        for _ in range(warmup):
+            run_pipeline(page.html, page.url)
+        totals = []
+        for _ in range(iterations):
+            timings: dict[str, float] = {}
+            run_pipeline(page.html, page.url, timings)
+            for stage, seconds in timings.items():
+                samples[stage].append(seconds)
+            total = sum(timings.values())
+            samples["total"].append(total)
+            totals.append(total)
+        per_page[page.path.name] = {
+            "url": page.url,
+            "bytes": len(page.html.encode()),
+            "median_ms": round(median(totals) * 1000, 3),
+        }
+    return {
+        "stages": {stage: percentiles(values) for stage, values in samples.items()},
+        "pages": per_page,
+    }
+
+
+def measure_allocations(pages: list[Page]) -> dict[str, int]:
+    """Peak bytes allocated by Python while running the pipeline on each page."""
+    peaks = {}
+    tracemalloc.start()
+    try:
+        for page in pages:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            run_pipeline(page.html, page.url)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks[page.path.name] = peak - before
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def _throughput_worker(pages: list[tuple[str, str]], iterations: int) -> int:
+    for _ in range(iterations):
+        for html, url in pages:
+            run_pipeline(html, url)
+    return len(pages) * iterations
+
+
+def measure_throughput(
+    pages: list[Page], iterations: int, processes: int
+) -> dict[str, float]:
+    """Pages per second with every process running the whole corpus."""
+    work = [(page.html, page.url) for page in pages]
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        # Start the workers and import the scrapers before the clock starts
+        list(pool.map(_throughput_worker, [work] * processes, [1] * processes))
+        started = time.perf_counter()
+        done = sum(
+            pool.map(_throughput_worker, [work] * processes, [iterations] * processes)
+        )
+        elapsed = time.perf_counter() - started
+    pages_per_second = done / elapsed
+    return {
+        "processes": processes,
+        "pages_per_second": round(pages_per_second, 2),
+        "pages_per_second_per_core": round(pages_per_second / processes, 2),
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def run_benchmark(
+    corpus: Path, *, iterations: int, warmup: int, processes: int
+) -> dict[str, Any]:
+    """Run every measurement on a corpus and return the results."""
+    pages = load_corpus(corpus)
+    if not pages:
+        raise SystemExit(f"No pages with a known URL in {corpus}")
+    results: dict[str, Any] = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "recipe_scrapers": version("recipe-scrapers"),
+            "corpus": str(corpus),
+            "pages": len(pages),
+            "iterations": iterations,
+        },
+    }
+    results["latency"] = measure_latency(pages, iterations, warmup)
+    results["peak_rss_mb"] = peak_rss_mb()
+    results["peak_alloc_bytes"] = measure_allocations(pages)
+    if processes:
+        results["throughput"] = measure_throughput(pages, iterations, processes)
+    return results
+
+
+def compare(
+    results: dict[str, Any], baseline: dict[str, Any], max_regression: float
+) -> list[str]:
+    """
+    Compare stage latencies and throughput against a baseline.
+
+    Returns:
+        A description of every metric that regressed by more than
+        ``max_regression`` (a fraction, 0.1 for 10%).
+    """
+    regressions = []
+    base_stages = baseline.get("latency", {}).get("stages", {})
+    for stage, current in results["latency"]["stages"].items():
+        for key, value in current.items():
+            before = base_stages.get(stage, {}).get(key)
+            if not before:
+                continue
+            change = (value - before) / before
+            print(
+                f"  {stage:<12} {key:<4} {before:>10.2f} -> {value:>10.2f} ms ({change:+.1%})"
+            )
+            if change > max_regression:
+                regressions.append(f"{stage} {key} is {change:.1%} slower")
+    before_pps = baseline.get("throughput", {}).get("pages_per_second_per_core")
+    current_pps = results.get("throughput", {}).get("pages_per_second_per_core")
+    if before_pps and current_pps:
+        change = (current_pps - before_pps) / before_pps
+        print(
+            f"  pages/s/core      {before_pps:>10.2f} -> {current_pps:>10.2f} ({change:+.1%})"
+        )
+        if -change > max_regression:
+            regressions.append(f"pages per second per core dropped {-change:.1%}")
+    return regressions
+
+
+def print_report(results: dict[str, Any]) -> None:
+    meta = results["meta"]
+    print(
+        f"{meta['pages']} pages x {meta['iterations']} iterations, "
+        f"recipe-scrapers {meta['recipe_scrapers']}, Python {meta['python']}"
+    )
+    print(f"  {'stage':<12} " + " ".join(f"{f'p{p}':>10}" for p in PERCENTILES))
+    for stage, values in results["latency"]["stages"].items():
+        print(f"  {stage:<12} " + " ".join(f"{v:>10.2f}" for v in values.values()))
+    print(f"  peak RSS {results['peak_rss_mb']} MiB")
+    for name, peak in results["peak_alloc_bytes"].items():
+        print(f"  {name}: peak allocations {peak / 1024 / 1024:.1f} MiB")
+    if throughput := results.get("throughput"):
+        print(
+            f"  {throughput['pages_per_second']} pages/s on "
+            f"{throughput['processes']} processes, "
+            f"{throughput['pages_per_second_per_core']} pages/s per core"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes for the throughput run, 0 to skip it",
+    )
+    parser.add_argument("--save-baseline", type=Path)
+    parser.add_argument("--compare", type=Path)
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.1,
+        help="Fail --compare when a metric is worse by more than this fraction",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(
+        args.corpus,
+        iterations=args.iterations,
+        warmup=args.warmup,
+        processes=args.processes,
+    )
+    print_report(results)
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline saved to {args.save_baseline}")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        print(f"Compared with {args.compare} ({baseline['meta']['created_at']}):")
+        regressions = compare(results, baseline, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+
+
+def test_metrics_disabled_without_token(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    r = client.get("/metrics/")
+    assert r.status_code == 404
+
+
+def test_metrics_require_token(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+    assert client.get("/metrics/").status_code == 401
+    r = client.get("/metrics/", headers={"Authorization": "Bearer wrong"})
+    assert r.status_code == 401
+
+    r = client.get("/metrics/", headers={"Authorization": "Bearer s3cret"})
+    assert r.status_code == 200
+    assert "recipe_parse_seconds" in r.text
@@ -1,12 +1,23 @@
+import asyncio
+import io
+import json
+import uuid
+import zipfile
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import httpx
 import pytest
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlmodel import Session, delete, select
 
+from app import crud
 from app.core.config import settings
+from app.lib.scrape_cache import scrape_cache
+from app.lib.sitemap_crawl import CrawlError, SiteUrls
+from app.models import Recipe, ScrapeJob
+from app.worker import run_job, work
+from tests.utils.user import create_random_user
 
 
 @pytest.fixture
@@ -182,6 +193,55 @@ def test_parse_recipe_with_save_true_authenticated(
     # and returning 200 OK
 
 
+def test_parse_recipe_save_resolves_saved_source(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    superuser_token_headers: dict[str, str],
+    db: Session,
+) -> None:
+    """Test saving a page another user saved reuses its content without a fetch."""
+    test_url = f"https://example.com/recipe/{uuid.uuid4()}"
+    mock_scrape = AsyncMock(
+        return_value={
+            "title": "Shared Recipe",
+            "author": "Someone",
+            "ingredients": ["flour", "eggs"],
+            "instruction_list": ["Mix", "Bake"],
+        }
+    )
+
+    with patch("app.api.routes.recipes.scrape_recipe_from_url", mock_scrape):
+        first = client.post(
+            f"{settings.API_V1_STR}/recipes/scrape",
+            params={"url": test_url, "save": "true"},
+            headers=normal_user_token_headers,
+        )
+        scrape_cache.clear(session=db)
+        second = client.post(
+            f"{settings.API_V1_STR}/recipes/scrape",
+            params={"url": test_url, "save": "true"},
+            headers=superuser_token_headers,
+        )
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert mock_scrape.await_count == 1
+    assert second.headers["X-Cache-Tier"] == "source"
+    assert second.json()["ingredients"] == ["flour", "eggs"]
+    assert second.json()["instruction_list"] == ["Mix", "Bake"]
+    # Only the saved fields are kept
+    assert second.json()["author"] is None
+    recipes = db.exec(select(Recipe).where(Recipe.url == test_url)).all()
+    assert len(recipes) == 2
+    assert recipes[0].source_id is not None
+    assert recipes[0].source_id == recipes[1].source_id
+    saved = client.get(
+        f"{settings.API_V1_STR}/recipes/{recipes[0].id}",
+        headers=superuser_token_headers,
+    )
+    assert saved.json()["ingredients"] == ["flour", "eggs"]
+
+
 def test_parse_recipe_with_save_false_default(
     client: TestClient,
     normal_user_token_headers: dict[str, str],
@@ -265,3 +325,387 @@ def test_parse_recipe_response_includes_all_fields(
     assert content["cook_time"] == 30
     assert content["ratings"] == 4.5
 
+
+def test_parse_recipe_served_from_cache(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+) -> None:
+    """Test a repeated scrape is served from the scrape cache."""
+    test_url = "https://example.com/recipe/cached?utm_source=newsletter"
+    mock_scrape = AsyncMock(return_value={"title": "Cached Recipe"})
+
+    with patch("app.api.routes.recipes.scrape_recipe_from_url", mock_scrape):
+        first = client.post(
+            f"{settings.API_V1_STR}/recipes/scrape",
+            params={"url": test_url},
+            headers=normal_user_token_headers,
+        )
+        second = client.post(
+            f"{settings.API_V1_STR}/recipes/scrape",
+            params={"url": "https://EXAMPLE.com/recipe/cached#comments"},
+            headers=normal_user_token_headers,
+        )
+        refreshed = client.post(
+            f"{settings.API_V1_STR}/recipes/scrape",
+            params={"url": test_url, "force_refresh": "true"},
+            headers=normal_user_token_headers,
+        )
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.headers["X-Cache-Tier"] == "memory"
+    assert "cache;dur=" in second.headers["Server-Timing"]
+    assert "total;dur=" in first.headers["Server-Timing"]
+    assert second.json()["title"] == "Cached Recipe"
+    assert refreshed.headers["X-Cache"] == "MISS"
+    assert mock_scrape.await_count == 2
+
+
+def test_parse_recipe_selected_fields(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+) -> None:
+    """Test only the requested fields are scraped, and partial results are not cached."""
+    test_url = "https://example.com/recipe/selected-fields"
+    mock_scrape = AsyncMock(
+        return_value={"title": "Partial Recipe", "description": "Short"}
+    )
+
+    with patch("app.api.routes.recipes.scrape_recipe_from_url", mock_scrape):
+        preview = client.post(
+            f"{settings.API_V1_STR}/recipes/scrape",
+            params={"url": test_url, "fields": "preview"},
+            headers=normal_user_token_headers,
+        )
+        again = client.post(
+            f"{settings.API_V1_STR}/recipes/scrape",
+            params={"url": test_url, "fields": "preview"},
+            headers=normal_user_token_headers,
+        )
+        links = client.post(
+            f"{settings.API_V1_STR}/recipes/scrape",
+            params={"url": test_url, "fields": "title,links"},
+            headers=normal_user_token_headers,
+        )
+        unknown = client.post(
+            f"{settings.API_V1_STR}/recipes/scrape",
+            params={"url": test_url, "fields": "title,flavour"},
+            headers=normal_user_token_headers,
+        )
+
+    assert preview.status_code == 200
+    assert preview.json()["title"] == "Partial Recipe"
+    assert preview.headers["X-Cache"] == "MISS"
+    assert again.headers["X-Cache"] == "MISS"
+    assert links.headers["X-Cache"] == "MISS"
+    assert unknown.status_code == 422
+    assert "flavour" in unknown.json()["detail"]
+    requested = [call.kwargs["fields"] for call in mock_scrape.await_args_list]
+    assert "ingredients" not in requested[0]
+    assert "description" in requested[0]
+    assert requested[2] == {"title", "links"}
+
+
+def test_parse_recipe_invalid_output_not_cached(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+) -> None:
+    """Test scraper output that fails validation is rejected and not cached."""
+    test_url = "https://example.com/recipe/invalid-output"
+    mock_scrape = AsyncMock(return_value={"title": "Bad Recipe", "ingredients": "flour"})
+
+    with patch("app.api.routes.recipes.scrape_recipe_from_url", mock_scrape):
+        for _ in range(2):
+            response = client.post(
+                f"{settings.API_V1_STR}/recipes/scrape",
+                params={"url": test_url},
+                headers=normal_user_token_headers,
+            )
+            assert response.status_code == 422
+
+    assert mock_scrape.await_count == 2
+
+
+def test_scrape_batch_streams_results(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+) -> None:
+    """Test batch scraping streams one NDJSON line per URL, errors included."""
+    urls = [
+        "https://example.com/recipe/batch-1",
+        "https://example.com/recipe/batch-2",
+        "https://other.example.com/missing",
+    ]
+
+    async def mock_scrape(url: str, **_kwargs):
+        if "missing" in url:
+            response = httpx.Response(404, text="Not Found")
+            request = httpx.Request("GET", url)
+            raise httpx.HTTPStatusError("404", request=request, response=response)
+        return {"title": f"Recipe {url[-1]}", "ingredients": ["flour"]}
+
+    with patch("app.api.routes.recipes.scrape_recipe_from_url", side_effect=mock_scrape):
+        response = client.post(
+            f"{settings.API_V1_STR}/recipes/scrape/batch",
+            json={"urls": urls, "save": True},
+            headers=normal_user_token_headers,
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    results = {line["url"]: line for line in lines}
+    assert set(results) == set(urls)
+    assert results[urls[0]]["recipe"]["title"] == "Recipe 1"
+    assert results[urls[0]]["recipe_id"]
+    assert results[urls[2]]["status_code"] == 404
+    assert results[urls[2]]["recipe_id"] is None
+
+    saved = client.get(
+        f"{settings.API_V1_STR}/recipes/{results[urls[1]]['recipe_id']}",
+        headers=normal_user_token_headers,
+    )
+    assert saved.status_code == 200
+    assert saved.json()["url"] == urls[1]
+
+
+def test_scrape_batch_rejects_empty_list(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/recipes/scrape/batch",
+        json={"urls": []},
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 422
+
+
+def test_scrape_background_job(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    db: Session,
+) -> None:
+    """Test background=true queues a job that the worker completes."""
+    test_url = "https://example.com/recipe/background"
+    response = client.post(
+        f"{settings.API_V1_STR}/recipes/scrape",
+        params={"url": test_url, "save": "true", "background": "true"},
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    assert response.json()["status"] == "queued"
+
+    job = db.get(ScrapeJob, uuid.UUID(job_id))
+    assert job
+    mock_scrape = AsyncMock(
+        return_value={"title": "Background Recipe", "ingredients": ["rice"]}
+    )
+    with patch("app.worker.scrape_recipe_from_url", mock_scrape):
+        asyncio.run(run_job(db, job))
+
+    response = client.get(
+        f"{settings.API_V1_STR}/recipes/scrape/jobs/{job_id}",
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["status"] == "succeeded"
+    assert content["result"]["title"] == "Background Recipe"
+    assert content["recipe_id"]
+
+    events = client.get(
+        f"{settings.API_V1_STR}/recipes/scrape/jobs/{job_id}/events",
+        headers=normal_user_token_headers,
+    )
+    assert events.headers["content-type"].startswith("text/event-stream")
+    assert events.text.startswith("event: succeeded\n")
+
+
+def test_scrape_background_job_retries_then_fails(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    db: Session,
+) -> None:
+    """Test retryable errors requeue the job until attempts run out."""
+    response = client.post(
+        f"{settings.API_V1_STR}/recipes/scrape",
+        params={"url": "https://example.com/recipe/flaky", "background": "true"},
+        headers=normal_user_token_headers,
+    )
+    job = db.get(ScrapeJob, uuid.UUID(response.json()["id"]))
+    assert job
+    mock_scrape = AsyncMock(side_effect=httpx.ConnectError("Connection refused"))
+
+    with patch("app.worker.scrape_recipe_from_url", mock_scrape):
+        job.attempts = 1
+        asyncio.run(run_job(db, job))
+        assert job.status == "queued"
+        job.attempts = job.max_attempts
+        asyncio.run(run_job(db, job))
+
+    assert job.status == "failed"
+    assert job.status_code == 500
+
+
+def test_scrape_background_job_times_out(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    db: Session,
+) -> None:
+    """Test a job that runs past SCRAPE_JOB_TIMEOUT is requeued."""
+    response = client.post(
+        f"{settings.API_V1_STR}/recipes/scrape",
+        params={"url": "https://example.com/recipe/slow", "background": "true"},
+        headers=normal_user_token_headers,
+    )
+    job = db.get(ScrapeJob, uuid.UUID(response.json()["id"]))
+    assert job
+
+    async def slow_scrape(**_kwargs):
+        await asyncio.sleep(5)
+
+    with (
+        patch("app.worker.scrape_recipe_from_url", side_effect=slow_scrape),
+        patch.object(settings, "SCRAPE_JOB_TIMEOUT", 0.05),
+    ):
+        job.attempts = 1
+        asyncio.run(run_job(db, job))
+
+    assert job.status == "queued"
+    assert job.status_code == 504
+    assert job.locked_at is None
+
+
+def test_scrape_worker_records_crashed_job(db: Session) -> None:
+    """Test a job whose run raises is marked failed instead of left running."""
+    db.exec(delete(ScrapeJob))  # type: ignore[call-overload]
+    db.commit()
+    user = create_random_user(db)
+    job = crud.create_scrape_job(
+        session=db,
+        url="https://example.com/recipe/crash",
+        save=False,
+        owner_id=user.id,
+        max_attempts=1,
+    )
+    stop = asyncio.Event()
+
+    async def crash(*_args):
+        stop.set()
+        raise RuntimeError("boom")
+
+    with patch("app.worker.run_job", side_effect=crash):
+        asyncio.run(work(stop))
+
+    db.refresh(job)
+    assert job.status == "failed"
+    assert job.locked_at is None
+    assert job.error == "Failed to parse recipe: boom"
+
+
+def test_read_scrape_job_of_other_user(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    db: Session,
+) -> None:
+    other_user = create_random_user(db)
+    job = crud.create_scrape_job(
+        session=db,
+        url="https://example.com/recipe/private",
+        save=False,
+        owner_id=other_user.id,
+        max_attempts=1,
+    )
+    response = client.get(
+        f"{settings.API_V1_STR}/recipes/scrape/jobs/{job.id}",
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 403
+
+
+def test_import_archive_streams_results(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    test_recipe_html: str,
+) -> None:
+    """Test an uploaded zip of saved pages is imported with one NDJSON line per page."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("saved/recipe.html", test_recipe_html)
+        archive.writestr("saved/empty.html", "<html></html>")
+
+    response = client.post(
+        f"{settings.API_V1_STR}/recipes/import",
+        files={"file": ("pages.zip", buffer.getvalue(), "application/zip")},
+        headers=normal_user_token_headers,
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = {
+        line["name"]: line for line in map(json.loads, response.text.splitlines())
+    }
+    assert set(results) == {"saved/recipe.html", "saved/empty.html"}
+    assert results["saved/empty.html"]["recipe_id"] is None
+    saved = client.get(
+        f"{settings.API_V1_STR}/recipes/{results['saved/recipe.html']['recipe_id']}",
+        headers=normal_user_token_headers,
+    )
+    assert saved.status_code == 200
+    assert saved.json()["url"].startswith("https://dagelijksekost.vrt.be/")
+
+
+def test_import_archive_rejects_other_files(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/recipes/import",
+        files={"file": ("pages.txt", b"not an archive", "text/plain")},
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 400
+
+
+def test_import_sitemap_streams_results(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+) -> None:
+    """Test the recipes found in a site's sitemaps are imported with one NDJSON line each."""
+    urls = SiteUrls()
+    urls.append("https://example.com/recipes/crawled")
+    mock_find = AsyncMock(return_value=urls)
+    mock_scrape = AsyncMock(return_value={"title": "Crawled", "ingredients": ["salt"]})
+
+    with (
+        patch("app.api.routes.recipes.find_recipe_urls", mock_find),
+        patch("app.lib.sitemap_crawl.scrape_recipe_from_url", mock_scrape),
+    ):
+        response = client.post(
+            f"{settings.API_V1_STR}/recipes/import/sitemap",
+            params={"url": "https://example.com"},
+            headers=normal_user_token_headers,
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    [result] = map(json.loads, response.text.splitlines())
+    assert result["url"] == "https://example.com/recipes/crawled"
+    assert result["recipe_id"]
+    assert mock_find.await_args.args == ("https://example.com",)
+
+
+def test_import_sitemap_without_sitemaps(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+) -> None:
+    mock_find = AsyncMock(side_effect=CrawlError("Could not read a sitemap"))
+    with patch("app.api.routes.recipes.find_recipe_urls", mock_find):
+        response = client.post(
+            f"{settings.API_V1_STR}/recipes/import/sitemap",
+            params={"url": "https://example.com"},
+            headers=normal_user_token_headers,
+        )
+    assert response.status_code == 400
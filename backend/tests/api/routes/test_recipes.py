@@ -0,0 +1,229 @@
+from typing import Any
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, text
+
+from app import crud
+from app.core.config import settings
+from app.core.db import engine
+from app.models import RecipeCreate, RecipeUpdate, UserCreate
+from tests.utils.user import user_authentication_headers
+from tests.utils.utils import random_email, random_lower_string
+
+
+def _user_headers(client: TestClient, db: Session) -> tuple[dict[str, str], UserCreate]:
+    user_in = UserCreate(email=random_email(), password=random_lower_string())
+    user = crud.create_user(session=db, user_create=user_in)
+    crud.create_recipes(
+        session=db,
+        recipes_in=[RecipeCreate(title=f"Recipe {i}") for i in range(5)],
+        owner_id=user.id,
+    )
+    headers = user_authentication_headers(
+        client=client, email=user_in.email, password=user_in.password
+    )
+    return headers, user_in
+
+
+def test_read_recipes_count_modes(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    headers, _ = _user_headers(client, db)
+    url = f"{settings.API_V1_STR}/recipes/"
+
+    r = client.get(url, headers=headers, params={"limit": 2})
+    page = r.json()
+    assert page["count"] == 5
+    assert [recipe["title"] for recipe in page["data"]] == ["Recipe 4", "Recipe 3"]
+    assert (
+        client.get(url, headers=headers, params={"count": "none"}).json()["count"]
+        is None
+    )
+
+    deleted = client.delete(f"{url}{page['data'][0]['id']}", headers=headers)
+    assert deleted.status_code == 200
+    r = client.get(url, headers=headers, params={"count": "estimated"})
+    assert r.json()["count"] == 4
+
+    db.execute(text("ANALYZE recipe"))
+    r = client.get(url, headers=superuser_token_headers, params={"count": "estimated"})
+    assert r.json()["count"] >= 4
+    r = client.get(url, headers=superuser_token_headers, params={"count": "bogus"})
+    assert r.status_code == 422
+
+
+def test_read_recipes_by_cursor(client: TestClient, db: Session) -> None:
+    headers, _ = _user_headers(client, db)
+    url = f"{settings.API_V1_STR}/recipes/"
+
+    first = client.get(url, headers=headers, params={"limit": 3}).json()
+    assert first["next_cursor"]
+    second = client.get(
+        url, headers=headers, params={"limit": 3, "cursor": first["next_cursor"]}
+    ).json()
+    titles = [recipe["title"] for recipe in first["data"] + second["data"]]
+    assert titles == [f"Recipe {i}" for i in range(4, -1, -1)]
+    assert second["next_cursor"] is None
+
+
+def test_read_recipes_summary_skips_content(client: TestClient, db: Session) -> None:
+    headers, user_in = _user_headers(client, db)
+    user = crud.get_user_by_email(session=db, email=user_in.email)
+    assert user is not None
+    crud.create_recipe(
+        session=db,
+        recipe_in=RecipeCreate(
+            title="Large",
+            url="https://example.com/recipe/large",
+            ingredients=[f"ingredient {i}" for i in range(200)],
+            instructions=[f"step {i}" for i in range(50)],
+        ),
+        owner_id=user.id,
+        scraped=True,
+    )
+    url = f"{settings.API_V1_STR}/recipes/"
+    statements: list[str] = []
+
+    def record(*args: Any) -> None:
+        statements.append(args[2])
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        summary = client.get(url, headers=headers, params={"view": "summary"})
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert summary.status_code == 200
+    entries = summary.json()["data"]
+    assert entries[0]["title"] == "Large"
+    assert set(entries[0]) == {
+        "id",
+        "owner_id",
+        "title",
+        "url",
+        "image",
+        "site_name",
+        "created_at",
+    }
+    assert summary.json()["count"] == 6
+    page_query = next(s for s in statements if "FROM recipe" in s)
+    assert "ingredients" not in page_query
+    assert "recipesource" not in " ".join(statements)
+
+
+def test_search_recipes(client: TestClient, db: Session) -> None:
+    headers, user_in = _user_headers(client, db)
+    user = crud.get_user_by_email(session=db, email=user_in.email)
+    assert user
+    crud.create_recipes(
+        session=db,
+        recipes_in=[
+            RecipeCreate(
+                title="Garlic bread",
+                url="https://example.com/garlic-bread",
+                ingredients=["1 baguette", "3 cloves garlic"],
+                instructions=["Bake the bread"],
+            ),
+            RecipeCreate(
+                title="Tomato soup",
+                ingredients=["6 tomatoes", "1 clove garlic"],
+                instructions=["Simmer the soup"],
+            ),
+        ],
+        owner_id=user.id,
+        scraped=True,
+    )
+    other = crud.create_user(
+        session=db,
+        user_create=UserCreate(email=random_email(), password=random_lower_string()),
+    )
+    crud.create_recipe(
+        session=db, recipe_in=RecipeCreate(title="Garlic soup"), owner_id=other.id
+    )
+    url = f"{settings.API_V1_STR}/recipes/search"
+
+    # Title matches rank first, and inherited content is indexed too
+    hits = client.get(url, headers=headers, params={"q": "garlic"}).json()["data"]
+    assert [hit["title"] for hit in hits] == ["Garlic bread", "Tomato soup"]
+    assert hits[0]["rank"] > hits[1]["rank"]
+    assert "ingredients" not in hits[0]
+    hits = client.get(url, headers=headers, params={"q": "soup -tomato"}).json()
+    assert hits["data"] == []
+    r = client.get(url, headers=headers, params={"q": "garlic", "skip": 1})
+    assert [hit["title"] for hit in r.json()["data"]] == ["Tomato soup"]
+
+    # Words are stemmed once the user picks a language
+    r = client.get(url, headers=headers, params={"q": "simmering"})
+    assert r.json()["data"] == []
+    r = client.patch(
+        f"{settings.API_V1_STR}/users/me",
+        headers=headers,
+        json={"search_language": "english"},
+    )
+    assert r.json()["search_language"] == "english"
+    hits = client.get(url, headers=headers, params={"q": "simmering"}).json()["data"]
+    assert [hit["title"] for hit in hits] == ["Tomato soup"]
+
+    recipe_id = hits[0]["id"]
+    r = client.put(
+        f"{settings.API_V1_STR}/recipes/{recipe_id}",
+        headers=headers,
+        json={"title": "Gazpacho"},
+    )
+    assert r.status_code == 200
+    hits = client.get(url, headers=headers, params={"q": "gazpacho"}).json()["data"]
+    assert [hit["id"] for hit in hits] == [recipe_id]
+    assert client.get(url, headers=headers, params={"q": ""}).status_code == 422
+
+
+def test_read_recipes_filtered_by_content(client: TestClient, db: Session) -> None:
+    headers, user_in = _user_headers(client, db)
+    user = crud.get_user_by_email(session=db, email=user_in.email)
+    assert user
+    shared, edited = (
+        crud.create_recipe(
+            session=db,
+            recipe_in=RecipeCreate(
+                title="Aioli",
+                url=f"https://example.com/aioli/{user.id}",
+                ingredients=["garlic", "olive oil"],
+                nutrients={"calories": "900 kcal"},
+            ),
+            owner_id=user.id,
+            scraped=True,
+        )
+        for _ in range(2)
+    )
+    crud.create_recipe(
+        session=db,
+        recipe_in=RecipeCreate(
+            title="Garlic soup", ingredients=["garlic"], nutrients={"fat": "2 g"}
+        ),
+        owner_id=user.id,
+    )
+    assert shared.source_id == edited.source_id
+    crud.update_recipe(
+        session=db,
+        db_recipe=edited,
+        recipe_in=RecipeUpdate(
+            title="Edited aioli", ingredients=["olive oil"], nutrients={}
+        ),
+    )
+    url = f"{settings.API_V1_STR}/recipes/"
+
+    def titles(**params: Any) -> tuple[list[str], int]:
+        page = client.get(url, headers=headers, params=params).json()
+        return [recipe["title"] for recipe in page["data"]], page["count"]
+
+    # Inherited content matches, unless the user's own edit replaced it
+    assert titles(ingredient="garlic") == (["Garlic soup", "Aioli"], 2)
+    assert titles(ingredient=["garlic", "olive oil"]) == (["Aioli"], 1)
+    assert titles(ingredient="olive oil", view="summary") == (
+        ["Edited aioli", "Aioli"],
+        2,
+    )
+    assert titles(nutrient="calories") == (["Aioli"], 1)
+    assert titles(nutrient=["fat"], ingredient="garlic") == (["Garlic soup"], 1)
+    assert titles(nutrient="protein") == ([], 0)
+    assert titles(ingredient="garlic", count="none") == (["Garlic soup", "Aioli"], None)
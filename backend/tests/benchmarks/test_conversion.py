@@ -0,0 +1,27 @@
+from app.models import RecipeCreate
+from benchmarks.conversion import (
+    DEFAULT_CORPUS,
+    legacy_convert,
+    load_inputs,
+    run_benchmark,
+    single_pass_convert,
+)
+
+SAVED_FIELDS = [*RecipeCreate.model_fields, "owner_id"]
+
+
+def test_single_pass_matches_legacy_conversion() -> None:
+    for data, url in load_inputs(DEFAULT_CORPUS).values():
+        legacy_row, legacy_json = legacy_convert(data, url)
+        row, response_json = single_pass_convert(data, url)
+        assert response_json == legacy_json
+        for field in SAVED_FIELDS:
+            assert getattr(row, field) == getattr(legacy_row, field), field
+        assert row.id != legacy_row.id
+        assert row.created_at is not None
+
+
+def test_run_benchmark_reports_speedup() -> None:
+    results = run_benchmark(DEFAULT_CORPUS, iterations=2)
+    assert set(results) >= {"test-recipe.html", "large-20x30"}
+    assert set(results["large-20x30"]) == {"legacy", "single_pass", "speedup"}
@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.lib.http_transport import MockSiteTransport
+from app.lib.recipe_scraper import scrape_recipe_from_url
+from benchmarks.mock_site import SiteProfile, build_mock_site, load_pages
+from benchmarks.scrape_load import run_load
+from benchmarks.scraper import DEFAULT_CORPUS
+
+PAGES = load_pages(DEFAULT_CORPUS)
+URL = next(iter(PAGES.values())).url
+
+
+def mock_site_client(profile: SiteProfile) -> httpx.AsyncClient:
+    site = httpx.ASGITransport(app=build_mock_site(PAGES, profile))
+    return httpx.AsyncClient(transport=MockSiteTransport(site, "http://mock-site"))
+
+
+def test_scrape_from_mock_site() -> None:
+    async def run() -> tuple[dict, float]:
+        async with mock_site_client(SiteProfile(latency=0.05)) as client:
+            started = time.perf_counter()
+            data = await scrape_recipe_from_url(URL, client=client)
+            return data, time.perf_counter() - started
+
+    data, elapsed = asyncio.run(run())
+    assert data["title"]
+    assert data["ingredients"]
+    # robots.txt and the page itself each waited for the latency
+    assert elapsed >= 0.1
+
+
+def test_mock_site_errors() -> None:
+    async def run() -> None:
+        async with mock_site_client(SiteProfile(error_rate=1.0, seed=1)) as client:
+            await scrape_recipe_from_url(URL, client=client)
+
+    with pytest.raises(httpx.HTTPStatusError) as exc_info:
+        asyncio.run(run())
+    assert exc_info.value.response.status_code in SiteProfile.error_statuses
+
+
+def test_run_load_reports_statuses_and_percentiles() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        url = request.url.params["url"]
+        assert request.url.params["force_refresh"] == "true"
+        return httpx.Response(500 if url.endswith("bad") else 200)
+
+    async def run() -> dict:
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(handler), base_url="http://api"
+        ) as client:
+            return await run_load(
+                client,
+                ["https://a.example/good", "https://a.example/bad"],
+                requests=9,
+                concurrency=3,
+                params={"force_refresh": "true"},
+            )
+
+    results = asyncio.run(run())
+    assert results["statuses"] == {"200": 5, "500": 4}
+    assert set(results["latency"]) == {"p50", "p95", "p99", "p99.9"}
+    assert results["requests_per_second"] > 0
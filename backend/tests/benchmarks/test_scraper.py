@@ -0,0 +1,28 @@
+from typing import Any
+
+from benchmarks.scraper import DEFAULT_CORPUS, compare, percentiles, run_benchmark
+
+
+def test_percentiles_nearest_rank() -> None:
+    samples = [i / 1000 for i in range(1, 101)]
+    assert percentiles(samples) == {"p50": 50.0, "p90": 90.0, "p99": 99.0}
+
+
+def test_compare_flags_regressions() -> None:
+    def results(p50: float, pps: float) -> dict[str, Any]:
+        return {
+            "latency": {"stages": {"total": {"p50": p50}}},
+            "throughput": {"pages_per_second_per_core": pps},
+        }
+
+    assert compare(results(105, 9.5), results(100, 10), 0.1) == []
+    regressions = compare(results(120, 8), results(100, 10), 0.1)
+    assert len(regressions) == 2
+
+
+def test_run_benchmark_on_test_corpus() -> None:
+    results = run_benchmark(DEFAULT_CORPUS, iterations=1, warmup=0, processes=0)
+    assert results["meta"]["pages"] == 1
+    assert set(results["latency"]["stages"]) >= {"scrape_html", "to_json", "total"}
+    assert results["peak_alloc_bytes"]["test-recipe.html"] > 0
+    assert results["peak_rss_mb"] > 0
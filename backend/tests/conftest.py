@@ -6,8 +6,18 @@ from sqlmodel import Session, SQLModel, delete
 
 from app.core.config import settings
 from app.core.db import engine, init_db
+from app.lib.fetch_policy import fetch_policy
+from app.lib.host_scheduler import host_scheduler
+from app.lib.scrape_cache import scrape_cache
 from app.main import app
-from app.models import User
+from app.models import (
+    HtmlBlob,
+    RecipeCountSlot,
+    RecipeSource,
+    ScrapeCacheEntry,
+    StoredPage,
+    User,
+)
 from tests.utils.user import authentication_token_from_email
 from tests.utils.utils import get_superuser_token_headers
 
@@ -17,15 +27,39 @@ def db() -> Generator[Session, None, None]:
     # Create all tables (in case migrations haven't been run)
     # This is safe for testing since we have Alembic migrations for production
     SQLModel.metadata.create_all(engine)
-    
+
     with Session(engine) as session:
         init_db(session)
         yield session
         statement = delete(User)
         session.execute(statement)
+        statement = delete(RecipeSource)
+        session.execute(statement)
+        statement = delete(RecipeCountSlot)
+        session.execute(statement)
+        statement = delete(ScrapeCacheEntry)
+        session.execute(statement)
+        statement = delete(StoredPage)
+        session.execute(statement)
+        statement = delete(HtmlBlob)
+        session.execute(statement)
         session.commit()
 
 
+@pytest.fixture(autouse=True)
+def clear_scrape_cache(db: Session) -> None:
+    # Tests reuse the same URLs with different mocked scraper output
+    scrape_cache.clear(session=db)
+
+
+@pytest.fixture(autouse=True)
+def reset_host_scheduler() -> None:
+    # Rate limits, open circuits and spent retry budget must not leak
+    # between tests
+    host_scheduler.reset()
+    fetch_policy.reset()
+
+
 @pytest.fixture(scope="module")
 def client() -> Generator[TestClient, None, None]:
     with TestClient(app) as c:
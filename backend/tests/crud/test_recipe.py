@@ -0,0 +1,113 @@
+import uuid
+
+from sqlmodel import Session
+
+from app import crud
+from app.models import RecipeCreate, RecipePublic, RecipeUpdate
+from tests.utils.user import create_random_user
+
+
+def _scraped(url: str, **fields: object) -> RecipeCreate:
+    values: dict = {
+        "title": "Rijsttaart",
+        "url": url,
+        "ingredients": ["rijst", "melk"],
+        "instructions": ["Kook de rijst"],
+    }
+    values.update(fields)
+    return RecipeCreate(**values)
+
+
+def test_scraped_recipes_share_source(db: Session) -> None:
+    url = f"https://example.com/recipe/{uuid.uuid4()}"
+    first = crud.create_recipe(
+        session=db,
+        recipe_in=_scraped(url),
+        owner_id=create_random_user(db).id,
+        scraped=True,
+    )
+    [second, changed] = crud.create_recipes(
+        session=db,
+        recipes_in=[
+            _scraped(url + "?utm_source=feed"),
+            _scraped(url, ingredients=["rijst"]),
+        ],
+        owner_id=create_random_user(db).id,
+        scraped=True,
+    )
+
+    assert first.source_id is not None
+    assert second.source_id == first.source_id
+    assert changed.source_id not in (None, first.source_id)
+    assert first.ingredients is None
+    public = RecipePublic.model_validate(first)
+    assert public.ingredients == ["rijst", "melk"]
+    assert public.instructions == ["Kook de rijst"]
+    own = crud.create_recipe(
+        session=db, recipe_in=_scraped(url), owner_id=first.owner_id
+    )
+    assert own.source_id is None
+    assert own.ingredients == ["rijst", "melk"]
+
+
+def test_update_copies_edited_fields_only(db: Session) -> None:
+    url = f"https://example.com/recipe/{uuid.uuid4()}"
+    mine, theirs = (
+        crud.create_recipe(
+            session=db,
+            recipe_in=_scraped(url),
+            owner_id=create_random_user(db).id,
+            scraped=True,
+        )
+        for _ in range(2)
+    )
+
+    crud.update_recipe(
+        session=db,
+        db_recipe=mine,
+        recipe_in=RecipeUpdate(ingredients=["rijst", "havermelk"], instructions=None),
+    )
+    assert mine.source_id == theirs.source_id
+    assert mine.ingredients == ["rijst", "havermelk"]
+    assert mine.instructions == []
+    assert RecipePublic.model_validate(theirs).ingredients == ["rijst", "melk"]
+
+    # Setting a field back to the source's value shares it again
+    crud.update_recipe(
+        session=db,
+        db_recipe=mine,
+        recipe_in=RecipeUpdate(ingredients=["rijst", "melk"]),
+    )
+    assert mine.ingredients is None
+
+    crud.update_recipe(
+        session=db,
+        db_recipe=theirs,
+        recipe_in=RecipeUpdate(url="https://example.com/recipe/elsewhere"),
+    )
+    assert theirs.source_id is None
+    assert theirs.ingredients == ["rijst", "melk"]
+
+
+def test_recipe_counts_follow_saves_and_deletes(db: Session) -> None:
+    user = create_random_user(db)
+    total = crud.get_recipe_count(session=db)
+
+    recipes = crud.create_recipes(
+        session=db,
+        recipes_in=[RecipeCreate(title="One"), RecipeCreate(title="Two")],
+        owner_id=user.id,
+    )
+    crud.create_recipe(
+        session=db, recipe_in=RecipeCreate(title="Three"), owner_id=user.id
+    )
+    assert crud.get_recipe_count(session=db, owner_id=user.id) == 3
+    assert crud.get_recipe_count(session=db) == total + 3
+
+    crud.delete_recipe(session=db, db_recipe=recipes[0])
+    assert crud.get_recipe_count(session=db, owner_id=user.id) == 2
+    assert crud.get_recipe_count(session=db) == total + 2
+
+    crud.delete_user(session=db, db_user=user)
+    assert crud.get_recipe_count(session=db, owner_id=user.id) == 0
+    assert crud.get_recipe_count(session=db) == total
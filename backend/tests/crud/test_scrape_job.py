@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from sqlmodel import Session, delete
+
+from app import crud
+from app.models import ScrapeJob
+from app.models.base import get_datetime_utc
+from tests.utils.user import create_random_user
+
+
+def test_claim_scrape_job(db: Session) -> None:
+    db.exec(delete(ScrapeJob))  # type: ignore[call-overload]
+    db.commit()
+    user = create_random_user(db)
+    job = crud.create_scrape_job(
+        session=db,
+        url="https://example.com/recipe/queued",
+        save=False,
+        owner_id=user.id,
+        max_attempts=3,
+    )
+    assert job.status == "queued"
+
+    claimed = crud.claim_scrape_job(session=db, lock_timeout=300)
+    assert claimed
+    assert claimed.id == job.id
+    assert claimed.status == "running"
+    assert claimed.attempts == 1
+    assert crud.claim_scrape_job(session=db, lock_timeout=300) is None
+
+
+def test_claim_scrape_job_skips_future_and_reclaims_stale(db: Session) -> None:
+    db.exec(delete(ScrapeJob))  # type: ignore[call-overload]
+    db.commit()
+    user = create_random_user(db)
+    now = get_datetime_utc()
+    future = ScrapeJob(
+        url="https://example.com/recipe/later",
+        owner_id=user.id,
+        run_after=now + timedelta(minutes=5),
+    )
+    stale = ScrapeJob(
+        url="https://example.com/recipe/stale",
+        owner_id=user.id,
+        status="running",
+        attempts=1,
+        locked_at=now - timedelta(minutes=10),
+    )
+    db.add_all([future, stale])
+    db.commit()
+
+    claimed = crud.claim_scrape_job(session=db, lock_timeout=60)
+    assert claimed
+    assert claimed.url == "https://example.com/recipe/stale"
+    assert claimed.attempts == 2
+    assert crud.claim_scrape_job(session=db, lock_timeout=60) is None
+
+
+def test_claim_scrape_job_fails_exhausted_stale_job(db: Session) -> None:
+    db.exec(delete(ScrapeJob))  # type: ignore[call-overload]
+    db.commit()
+    user = create_random_user(db)
+    exhausted = ScrapeJob(
+        url="https://example.com/recipe/exhausted",
+        owner_id=user.id,
+        status="running",
+        attempts=3,
+        max_attempts=3,
+        locked_at=get_datetime_utc() - timedelta(minutes=10),
+    )
+    db.add(exhausted)
+    db.commit()
+
+    assert crud.claim_scrape_job(session=db, lock_timeout=60) is None
+    db.refresh(exhausted)
+    assert exhausted.status == "failed"
+    assert exhausted.attempts == 3
+    assert exhausted.locked_at is None
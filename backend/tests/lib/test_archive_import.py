@@ -0,0 +1,135 @@
+import asyncio
+import io
+import json
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+from sqlmodel import Session
+
+from app.lib.archive_import import (
+    ArchiveError,
+    ArchivePage,
+    import_archive,
+    open_archive,
+    page_url,
+)
+from app.models import ArchiveImportResult, Recipe
+from tests.utils.user import create_random_user
+
+RECIPE_HTML = (
+    Path(__file__).parent.parent / "test_data" / "test-recipe.html"
+).read_text()
+RECIPE_URL = (
+    "https://dagelijksekost.vrt.be/gerechten/rijsttaart-met-crumble-van-blonde-suiker"
+)
+
+
+def make_zip(files: dict[str, str]) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+def make_tar(files: dict[str, str]) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, content in files.items():
+            data = content.encode()
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    buffer.seek(0)
+    return buffer
+
+
+def test_page_url_sources() -> None:
+    manifest = {"a.html": "https://example.com/a"}
+    assert page_url("a.html", RECIPE_HTML, manifest) == "https://example.com/a"
+    assert page_url("b.html", RECIPE_HTML, manifest) == RECIPE_URL
+    saved = "<!-- saved from url=(0025)https://example.com/saved -->\n<html></html>"
+    assert page_url("c.html", saved, {}) == "https://example.com/saved"
+    assert page_url("d.html", "<html></html>", {}) is None
+
+
+@pytest.mark.parametrize("make_archive", [make_zip, make_tar])
+def test_open_archive_reads_pages(make_archive) -> None:
+    files = {
+        "urls.json": json.dumps({"pages/one.html": "https://example.com/one"}),
+        "pages/one.html": "<html>one</html>",
+        "pages/two.htm": RECIPE_HTML,
+        "pages/image.png": "not a page",
+        "pages/big.html": "x" * 100,
+    }
+    pages = list(
+        open_archive(
+            make_archive(files), max_pages=10, max_page_bytes=len(RECIPE_HTML.encode())
+        )
+    )
+
+    assert [page.name for page in pages] == [
+        "pages/one.html",
+        "pages/two.htm",
+        "pages/big.html",
+    ]
+    assert [page.index for page in pages] == [0, 1, 2]
+    assert pages[0].url == "https://example.com/one"
+    assert pages[1].url == RECIPE_URL
+    assert pages[2].html is not None
+
+    small = list(open_archive(make_archive(files), max_pages=10, max_page_bytes=50))
+    assert small[2].html is None
+    assert small[2].error == "Page is larger than 50 bytes"
+
+
+def test_open_archive_limits_pages() -> None:
+    files = {f"{i}.html": "<html></html>" for i in range(5)}
+    pages = list(open_archive(make_zip(files), max_pages=3, max_page_bytes=1024))
+    assert len(pages) == 4
+    assert pages[3].html is None
+    assert pages[3].error == "Archive has more than 3 pages"
+
+
+def test_open_archive_rejects_other_files() -> None:
+    with pytest.raises(ArchiveError):
+        open_archive(io.BytesIO(b"just some text"), max_pages=3, max_page_bytes=1024)
+
+
+def test_import_archive_saves_batches(db: Session) -> None:
+    user = create_random_user(db)
+    pages = iter(
+        [
+            ArchivePage(0, "one.html", RECIPE_HTML, RECIPE_URL),
+            ArchivePage(1, "two.html", "<html>no recipe</html>", None),
+            ArchivePage(2, "three.html", RECIPE_HTML, None),
+            ArchivePage(3, "big.html", None, None, "Page is larger than 10 bytes"),
+        ]
+    )
+
+    async def run() -> list[list[ArchiveImportResult]]:
+        return [
+            group
+            async for group in import_archive(
+                pages, session=db, owner_id=user.id, concurrency=2, batch_size=2
+            )
+        ]
+
+    groups = asyncio.run(run())
+
+    assert [len(group) for group in groups] == [2, 2]
+    results = {result.name: result for group in groups for result in group}
+    assert results["two.html"].recipe_id is None
+    assert results["two.html"].status_code == 422
+    assert results["big.html"].status_code == 413
+    assert results["big.html"].error == "Page is larger than 10 bytes"
+    for name in ("one.html", "three.html"):
+        assert results[name].status_code == 200
+        recipe = db.get(Recipe, results[name].recipe_id)
+        assert recipe is not None
+        assert recipe.owner_id == user.id
+        assert recipe.ingredients
+    assert results["one.html"].url == RECIPE_URL
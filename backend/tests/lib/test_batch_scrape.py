@@ -0,0 +1,40 @@
+import asyncio
+from collections import Counter
+
+from app.lib.batch_scrape import scrape_concurrently
+
+
+def test_scrape_concurrently_respects_limits() -> None:
+    urls = [f"https://site{i % 3}.example.com/recipe/{i}" for i in range(30)]
+    in_flight: Counter[str] = Counter()
+    peak_total = 0
+    peak_per_host: Counter[str] = Counter()
+
+    async def scrape(url: str) -> str:
+        nonlocal peak_total
+        host = url.split("/")[2]
+        in_flight[host] += 1
+        peak_total = max(peak_total, sum(in_flight.values()))
+        peak_per_host[host] = max(peak_per_host[host], in_flight[host])
+        await asyncio.sleep(0.001)
+        in_flight[host] -= 1
+        if url.endswith("/7"):
+            raise ValueError("broken page")
+        return url
+
+    async def run() -> list[tuple[str, object, object]]:
+        outcomes = []
+        async for group in scrape_concurrently(
+            urls, scrape, concurrency=4, per_host_concurrency=2, max_group_size=5
+        ):
+            assert 1 <= len(group) <= 5
+            outcomes.extend((o.url, o.result, o.error) for o in group)
+        return outcomes
+
+    outcomes = asyncio.run(run())
+    assert sorted(url for url, _, _ in outcomes) == sorted(urls)
+    assert peak_total <= 4
+    assert max(peak_per_host.values()) <= 2
+    failed = [(url, error) for url, _, error in outcomes if error is not None]
+    assert len(failed) == 1
+    assert isinstance(failed[0][1], ValueError)
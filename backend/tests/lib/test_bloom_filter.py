@@ -0,0 +1,32 @@
+import pytest
+
+from app.lib.bloom_filter import BloomFilter
+
+
+def test_bloom_filter_has_no_false_negatives() -> None:
+    seen = BloomFilter(capacity=1000, error_rate=0.01)
+    urls = [f"https://example.com/recipes/{i}" for i in range(1000)]
+    assert all(seen.add(url) for url in urls[:10])
+    for url in urls:
+        seen.add(url)
+    assert all(url in seen for url in urls)
+    assert not seen.add(urls[0])
+
+
+def test_bloom_filter_error_rate() -> None:
+    seen = BloomFilter(capacity=10_000, error_rate=0.01)
+    for i in range(10_000):
+        seen.add(f"https://example.com/recipes/{i}")
+    false_positives = sum(
+        f"https://example.com/other/{i}" in seen for i in range(10_000)
+    )
+    assert false_positives < 200
+    # About 1.2 bytes per item at 1%, instead of a set's ~100
+    assert seen.size_bytes < 13_000
+
+
+def test_bloom_filter_rejects_bad_sizes() -> None:
+    with pytest.raises(ValueError):
+        BloomFilter(capacity=0, error_rate=0.01)
+    with pytest.raises(ValueError):
+        BloomFilter(capacity=10, error_rate=1.0)
@@ -0,0 +1,118 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from pathlib import Path
+
+import httpx
+import pytest
+
+from app.lib.fetch_policy import (
+    FetchPolicy,
+    RetryBudget,
+    fetch_policy,
+    parse_retry_after,
+)
+from app.lib.host_scheduler import host_scheduler
+from app.lib.recipe_scraper import scrape_recipe_from_url
+from app.lib.scrape_trace import ScrapeTrace
+
+PAGE = (Path(__file__).parent.parent / "test_data" / "test-recipe.html").read_text()
+URL = "https://dagelijksekost.vrt.be/gerechten/rijsttaart-met-crumble-van-blonde-suiker"
+
+
+def status_error(status: int, headers: dict[str, str] | None = None) -> Exception:
+    request = httpx.Request("GET", URL)
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+def policy(**kwargs: object) -> FetchPolicy:
+    options: dict = {
+        "max_attempts": 3,
+        "base_delay": 0.1,
+        "max_delay": 2.0,
+        "budget": RetryBudget(ratio=0.1, burst=10),
+        "hedge": False,
+        "hedge_min_samples": 5,
+    }
+    options.update(kwargs)
+    return FetchPolicy(**options)
+
+
+def test_parse_retry_after() -> None:
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), True)
+    assert 25 < (parse_retry_after(later) or 0) <= 30
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_retry_delay_decisions() -> None:
+    retry = policy()
+    assert 0.05 <= (retry.retry_delay(status_error(503), 1) or 0) <= 0.1
+    assert 0.1 <= (retry.retry_delay(httpx.ConnectError("refused"), 2) or 0) <= 0.2
+    assert retry.retry_delay(status_error(503), 3) is None
+    assert retry.retry_delay(status_error(404), 1) is None
+    assert retry.retry_delay(httpx.ReadTimeout("slow"), 1) is None
+    # 429 is only retried when it says when
+    assert retry.retry_delay(status_error(429), 1) is None
+    assert retry.retry_delay(status_error(429, {"Retry-After": "1"}), 1) == 1.0
+    assert retry.retry_delay(status_error(429, {"Retry-After": "60"}), 1) is None
+
+
+def test_retry_budget_caps_retries() -> None:
+    retry = policy(budget=RetryBudget(ratio=0.5, burst=1))
+    assert retry.retry_delay(status_error(502), 1) is not None
+    assert retry.retry_delay(status_error(502), 1) is None
+    retry.budget.deposit()
+    retry.budget.deposit()
+    assert retry.retry_delay(status_error(502), 1) is not None
+
+
+def test_scrape_retries_failed_connect() -> None:
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        if request.url.path == "/robots.txt":
+            return httpx.Response(404)
+        calls += 1
+        if calls == 1:
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200, html=PAGE)
+
+    async def run(trace: ScrapeTrace) -> dict:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await scrape_recipe_from_url(URL, client=client, trace=trace)
+
+    trace = ScrapeTrace(URL)
+    assert asyncio.run(run(trace))["ingredients"]
+    assert calls == 2
+    assert trace.phases["retry"] > 0
+
+
+def test_slow_request_is_hedged(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(fetch_policy, "hedge", True)
+    for _ in range(fetch_policy.hedge_min_samples):
+        host_scheduler.record_header_latency(URL, 0.01)
+    calls = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        if request.url.path == "/robots.txt":
+            return httpx.Response(404)
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(5)
+        return httpx.Response(200, html=PAGE)
+
+    async def run() -> dict:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await scrape_recipe_from_url(URL, client=client)
+
+    started = time.perf_counter()
+    assert asyncio.run(run())["ingredients"]
+    assert time.perf_counter() - started < 2
+    assert calls == 2
@@ -0,0 +1,223 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator
+
+import httpx
+import pytest
+
+from app.lib.host_scheduler import (
+    ROBOTS_MAX_BYTES,
+    CircuitBreaker,
+    HostScheduler,
+    HostUnavailableError,
+    RobotsCache,
+    TokenBucket,
+)
+
+
+def make_scheduler(
+    *,
+    rate: float = 100.0,
+    burst: int = 10,
+    max_wait: float = 5.0,
+    failure_threshold: int = 2,
+    robots: RobotsCache | None = None,
+) -> HostScheduler:
+    return HostScheduler(
+        rate=rate,
+        burst=burst,
+        max_wait=max_wait,
+        failure_threshold=failure_threshold,
+        cooldown=60.0,
+        robots=robots,
+    )
+
+
+def state(breaker: CircuitBreaker) -> str:
+    # Read through a function so mypy does not narrow the attribute
+    return breaker.state
+
+
+def test_token_bucket_allows_burst_then_paces() -> None:
+    bucket = TokenBucket(rate=10.0, burst=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    wait = bucket.reserve()
+    assert wait is not None and 0.05 < wait <= 0.1
+    # Reservations queue up behind each other
+    wait = bucket.reserve()
+    assert wait is not None and 0.15 < wait <= 0.2
+
+
+def test_token_bucket_refuses_past_max_wait() -> None:
+    bucket = TokenBucket(rate=1.0, burst=1)
+    assert bucket.reserve(max_wait=0.5) == 0
+    tokens = bucket.tokens
+    assert bucket.reserve(max_wait=0.5) is None
+    # A refused reservation does not take a token
+    assert bucket.tokens == pytest.approx(tokens, abs=0.01)
+
+
+def test_circuit_opens_after_threshold() -> None:
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=60.0)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert state(breaker) == "closed"
+    assert breaker.allow()
+    breaker.record_failure()
+    assert state(breaker) == "open"
+    assert not breaker.allow()
+
+
+def test_circuit_success_resets_failures() -> None:
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=60.0)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert state(breaker) == "closed"
+
+
+def test_circuit_half_open_allows_single_probe() -> None:
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.01)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.02)
+    assert breaker.allow()
+    assert state(breaker) == "half_open"
+    assert not breaker.allow()
+
+    # A failed probe opens the circuit again
+    breaker.record_failure()
+    assert state(breaker) == "open"
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.record_success()
+    assert state(breaker) == "closed"
+    assert breaker.allow()
+
+
+def _client(transport: httpx.MockTransport) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=transport)
+
+
+def test_slot_opens_circuit_on_host_failures() -> None:
+    scheduler = make_scheduler()
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        raise httpx.ConnectError("refused", request=request)
+
+    async def scrape(client: httpx.AsyncClient) -> None:
+        async with scheduler.slot(client, "https://down.example/recipe"):
+            await client.get("https://down.example/recipe")
+
+    async def run() -> None:
+        async with _client(httpx.MockTransport(handler)) as client:
+            for _ in range(2):
+                with pytest.raises(httpx.ConnectError):
+                    await scrape(client)
+            with pytest.raises(HostUnavailableError):
+                await scrape(client)
+
+    asyncio.run(run())
+    assert calls == 2
+    assert scheduler.circuit_state("down.example") == "open"
+
+
+def test_slot_ignores_errors_unrelated_to_host() -> None:
+    scheduler = make_scheduler(failure_threshold=1)
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(404)
+
+    async def run() -> None:
+        async with _client(httpx.MockTransport(handler)) as client:
+            with pytest.raises(httpx.HTTPStatusError):
+                async with scheduler.slot(client, "https://example.com/missing"):
+                    response = await client.get("https://example.com/missing")
+                    response.raise_for_status()
+
+    asyncio.run(run())
+    assert scheduler.circuit_state("example.com") == "closed"
+
+
+def test_slot_rejects_when_queue_is_too_long() -> None:
+    scheduler = make_scheduler(rate=1.0, burst=1, max_wait=0.5)
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200)
+
+    async def run() -> None:
+        async with _client(httpx.MockTransport(handler)) as client:
+            async with scheduler.slot(client, "https://example.com/a"):
+                pass
+            with pytest.raises(HostUnavailableError):
+                async with scheduler.slot(client, "https://example.com/b"):
+                    pass
+
+    asyncio.run(run())
+
+
+def test_crawl_delay_lowers_host_rate() -> None:
+    robots = RobotsCache(ttl=60.0, timeout=1.0, max_delay=30.0)
+    scheduler = make_scheduler(robots=robots)
+    robots_fetches = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal robots_fetches
+        if request.url.path == "/robots.txt":
+            robots_fetches += 1
+            return httpx.Response(200, text="User-agent: *\nCrawl-delay: 10\n")
+        return httpx.Response(200)
+
+    async def run() -> None:
+        async with _client(httpx.MockTransport(handler)) as client:
+            async with scheduler.slot(client, "https://slow.example/a"):
+                pass
+            with pytest.raises(HostUnavailableError):
+                async with scheduler.slot(client, "https://slow.example/b"):
+                    pass
+
+    asyncio.run(run())
+    assert robots_fetches == 1
+    assert scheduler._hosts["slow.example"].bucket.rate == pytest.approx(0.1)
+
+
+def test_robots_read_is_capped() -> None:
+    robots = RobotsCache(ttl=60.0, timeout=5.0, max_delay=30.0)
+    chunks_sent = 0
+
+    async def body() -> AsyncIterator[bytes]:
+        nonlocal chunks_sent
+        yield b"User-agent: *\nCrawl-delay: 2\n"
+        while True:
+            chunks_sent += 1
+            yield b"# padding\n" * 1000
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200, content=body(), headers={"Content-Type": "text/plain"}
+        )
+
+    async def run() -> float | None:
+        async with _client(httpx.MockTransport(handler)) as client:
+            return await robots.crawl_delay(client, "https://endless.example/a")
+
+    assert asyncio.run(run()) == 2.0
+    assert chunks_sent * 10_000 < ROBOTS_MAX_BYTES + 10_000
+
+
+def test_robots_ignores_non_text_responses() -> None:
+    robots = RobotsCache(ttl=60.0, timeout=5.0, max_delay=30.0)
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, html="<p>Crawl-delay: 10</p>")
+
+    async def run() -> float | None:
+        async with _client(httpx.MockTransport(handler)) as client:
+            return await robots.crawl_delay(client, "https://example.com/a")
+
+    assert asyncio.run(run()) is None
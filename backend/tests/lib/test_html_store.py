@@ -0,0 +1,104 @@
+import asyncio
+from pathlib import Path
+
+import httpx
+import pytest
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.lib.html_store import (
+    DatabaseHtmlStore,
+    DiskHtmlStore,
+    content_digest,
+    get_html_store,
+    record_page,
+)
+from app.lib.recipe_scraper import scrape_recipe_from_url
+from app.lib.scrape_cache import normalize_url
+from app.models import HtmlBlob, StoredPage
+
+TEST_DATA = Path(__file__).parent.parent / "test_data"
+PAGE = (TEST_DATA / "test-recipe.html").read_bytes()
+
+
+@pytest.mark.parametrize("codec", ["zstd", "gzip"])
+def test_disk_store_round_trip(db: Session, tmp_path: Path, codec) -> None:
+    store = DiskHtmlStore(root=tmp_path, codec=codec)
+    digest = store.put(session=db, content=PAGE)
+
+    assert digest == content_digest(PAGE)
+    path = store.path(digest, codec)
+    assert path.exists()
+    assert path.stat().st_size < len(PAGE) / 4
+    assert store.get(session=db, digest=digest) == PAGE
+    assert store.get(session=db, digest="0" * 64) is None
+
+    # Stored once, and readable after switching codecs
+    other = DiskHtmlStore(root=tmp_path, codec="gzip" if codec == "zstd" else "zstd")
+    assert other.put(session=db, content=PAGE) == digest
+    assert len(list(tmp_path.rglob("*.*"))) == 1
+    assert other.get(session=db, digest=digest) == PAGE
+
+
+def test_database_store_saves_pages_once(
+    db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "SCRAPER_HTML_STORE", "database")
+    first = record_page(
+        session=db,
+        url="https://example.com/recipe?utm_source=x",
+        content=PAGE,
+        encoding="utf-8",
+        etag='"v1"',
+    )
+    second = record_page(
+        session=db, url="https://example.com/other", content=PAGE, encoding="utf-8"
+    )
+
+    assert first is not None
+    assert first == second
+    blob = db.get(HtmlBlob, first)
+    assert blob is not None
+    assert blob.size == len(PAGE)
+    assert len(blob.data) < len(PAGE) / 4
+    assert DatabaseHtmlStore(codec="gzip").get(session=db, digest=first) == PAGE
+    page = db.get(StoredPage, normalize_url("https://example.com/recipe"))
+    assert page is not None
+    assert page.digest == first
+    assert page.etag == '"v1"'
+
+    # A partly read page is recorded without a digest
+    record_page(
+        session=db, url="https://example.com/other", content=None, encoding="utf-8"
+    )
+    changed = db.get(StoredPage, normalize_url("https://example.com/other"))
+    assert changed is not None
+    db.refresh(changed)
+    assert changed.digest is None
+
+
+def test_scraper_stores_whole_page(
+    db: Session, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "SCRAPER_HTML_STORE", "disk")
+    monkeypatch.setattr(settings, "SCRAPER_HTML_STORE_DIR", str(tmp_path))
+    url = "https://dagelijksekost.vrt.be/gerechten/stored"
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/robots.txt":
+            return httpx.Response(404)
+        return httpx.Response(200, content=PAGE, headers={"Content-Type": "text/html"})
+
+    async def run() -> dict[str, object]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await scrape_recipe_from_url(url, client=client)
+
+    data = asyncio.run(run())
+
+    assert data["title"]
+    page = db.get(StoredPage, normalize_url(url))
+    assert page is not None
+    store = get_html_store()
+    assert store is not None
+    # The JSON-LD recipe is found early, but the whole page is kept
+    assert store.get(session=db, digest=page.digest) == PAGE
@@ -0,0 +1,96 @@
+import asyncio
+import gzip
+from pathlib import Path
+
+import httpx
+import pytest
+
+from app.lib.http_transport import (
+    CassetteMissError,
+    CassetteStore,
+    MockSiteTransport,
+    RecordingTransport,
+    ReplayTransport,
+)
+
+PAGE = b"<html><body>" + b"<p>stew</p>" * 2000 + b"</body></html>"
+URL = "https://cassette.example/recipes/stew?id=1"
+
+
+def test_record_then_replay(tmp_path: Path) -> None:
+    store = CassetteStore(tmp_path)
+    calls: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(str(request.url))
+        return httpx.Response(
+            200,
+            content=gzip.compress(PAGE),
+            headers={"Content-Encoding": "gzip", "ETag": '"v1"'},
+        )
+
+    async def record() -> bytes:
+        transport = RecordingTransport(
+            httpx.MockTransport(handler), store, max_bytes=1024 * 1024
+        )
+        async with httpx.AsyncClient(transport=transport) as client:
+            async with client.stream("GET", URL) as response:
+                # Stop early, like the scraper at a JSON-LD recipe
+                async for chunk in response.aiter_bytes():
+                    return chunk
+        return b""
+
+    async def replay(url: str) -> httpx.Response:
+        async with httpx.AsyncClient(transport=ReplayTransport(store)) as client:
+            response = await client.get(url)
+            await response.aread()
+            return response
+
+    assert asyncio.run(record())
+    cassette = store.load("GET", URL)
+    assert cassette is not None
+    assert gzip.decompress(cassette.body) == PAGE
+
+    response = asyncio.run(replay(URL))
+    assert response.status_code == 200
+    assert response.content == PAGE
+    assert response.headers["ETag"] == '"v1"'
+    assert calls == [URL]
+
+    with pytest.raises(CassetteMissError):
+        asyncio.run(replay("https://cassette.example/recipes/soup"))
+
+
+def test_record_skips_oversized_bodies(tmp_path: Path) -> None:
+    store = CassetteStore(tmp_path)
+    transport = RecordingTransport(
+        httpx.MockTransport(lambda _: httpx.Response(200, content=PAGE)),
+        store,
+        max_bytes=1024,
+    )
+
+    async def run() -> bytes:
+        async with httpx.AsyncClient(transport=transport) as client:
+            return (await client.get(URL)).content
+
+    assert asyncio.run(run()) == PAGE
+    assert list(store) == []
+
+
+def test_mock_site_transport_keeps_host() -> None:
+    seen: list[tuple[str, str]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append((str(request.url), request.headers["Host"]))
+        return httpx.Response(204)
+
+    transport = MockSiteTransport(httpx.MockTransport(handler), "http://127.0.0.1:8900")
+
+    async def run() -> None:
+        async with httpx.AsyncClient(transport=transport) as client:
+            await client.get(URL)
+
+    asyncio.run(run())
+    assert seen == [
+        ("http://127.0.0.1:8900/recipes/stew?id=1", "cassette.example"),
+    ]
@@ -0,0 +1,47 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+from sqlmodel import Session, select
+
+from app.lib.pagination import decode_cursor, encode_cursor, paginate
+from app.models import Recipe
+from app.models.base import get_datetime_utc
+from tests.utils.user import create_random_user
+
+
+def test_cursor_round_trip() -> None:
+    now = get_datetime_utc()
+    id = uuid.uuid4()
+    assert decode_cursor(encode_cursor(now, id)) == (now, id)
+    assert decode_cursor(encode_cursor(None, id)) == (None, id)
+    for cursor in ("", "not-a-cursor", encode_cursor(now, id)[:-4]):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+
+def test_paginate_ties_and_missing_created_at(db: Session) -> None:
+    owner = create_random_user(db)
+    now = get_datetime_utc()
+    # Equal and missing creation times are ordered by id
+    created = [None, None, now, now, now, now - timedelta(seconds=1)]
+    db.add_all(
+        Recipe(title=f"Recipe {i}", owner_id=owner.id, created_at=created_at)
+        for i, created_at in enumerate(created)
+    )
+    db.commit()
+    statement = select(Recipe).where(Recipe.owner_id == owner.id)
+    expected, _ = paginate(db, statement, Recipe, cursor=None, skip=0, limit=10)
+    assert len(expected) == len(created)
+
+    for limit in (1, 2, 4):
+        seen: list[Recipe] = []
+        cursor = None
+        while True:
+            page, cursor = paginate(
+                db, statement, Recipe, cursor=cursor, skip=0, limit=limit
+            )
+            seen += page
+            if cursor is None:
+                break
+        assert [recipe.id for recipe in seen] == [recipe.id for recipe in expected]
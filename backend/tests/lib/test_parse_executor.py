@@ -0,0 +1,90 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from app.lib.parse_executor import ParseExecutor, ParseTimeoutError
+
+TEST_DATA = Path(__file__).parent.parent / "test_data"
+TEST_URL = (
+    "https://dagelijksekost.vrt.be/gerechten/rijsttaart-met-crumble-van-blonde-suiker"
+)
+
+
+@pytest.mark.parametrize("kind", ["thread", "process"])
+def test_parse_executor_parses_html(kind: str) -> None:
+    html = (TEST_DATA / "test-recipe.html").read_text()
+    executor = ParseExecutor(kind=kind, max_workers=1, max_memory_mb=1024, timeout=60)  # type: ignore[arg-type]
+    try:
+        data = asyncio.run(executor.parse(html, TEST_URL))
+    finally:
+        executor.shutdown()
+    assert data["title"]
+    assert data["ingredients"]
+
+
+def test_parse_executor_recycles_pool() -> None:
+    executor = ParseExecutor(kind="thread", max_workers=1, max_tasks_per_worker=2)
+
+    async def run() -> list[object]:
+        pools: list[object] = []
+        for _ in range(5):
+            await executor.run(sum, [1, 2])
+            if executor._pool not in pools:
+                pools.append(executor._pool)
+        return pools
+
+    try:
+        assert len(asyncio.run(run())) == 3
+    finally:
+        executor.shutdown()
+
+
+def test_parse_executor_timeout() -> None:
+    executor = ParseExecutor(kind="thread", max_workers=1, timeout=0.05)
+    try:
+        with pytest.raises(ParseTimeoutError):
+            asyncio.run(executor.run(time.sleep, 0.5))
+        assert executor._pool is None
+    finally:
+        executor.shutdown()
+
+
+def test_parse_executor_timeout_spares_other_tasks() -> None:
+    executor = ParseExecutor(kind="process", max_workers=2, timeout=1.0)
+
+    async def run() -> list[object]:
+        return await asyncio.gather(
+            executor.run(time.sleep, 5),
+            executor.run(time.sleep, 0.6),
+            # Still running when the slow task times out at 1s
+            executor.run(time.sleep, 0.6),
+            return_exceptions=True,
+        )
+
+    try:
+        slow, first, second = asyncio.run(run())
+    finally:
+        executor.shutdown()
+    assert isinstance(slow, ParseTimeoutError)
+    assert first is None
+    # Killed along with the slow task's pool, then re-run on a fresh one
+    assert second is None
+
+
+def test_parse_executor_deadline_excludes_queue_time() -> None:
+    executor = ParseExecutor(kind="process", max_workers=1, timeout=1.0)
+
+    async def run() -> list[object]:
+        return await asyncio.gather(
+            executor.run(time.sleep, 0.8),
+            executor.run(time.sleep, 0.8),
+            executor.run(time.sleep, 0.1),
+            return_exceptions=True,
+        )
+
+    try:
+        assert asyncio.run(run()) == [None] * 3
+    finally:
+        executor.shutdown()
@@ -0,0 +1,112 @@
+import asyncio
+import json
+from pathlib import Path
+
+import httpx
+from prometheus_client import REGISTRY
+
+from app.lib.recipe_jsonld import extract_jsonld_recipe
+from app.lib.recipe_parser import parse_recipe_html
+from app.lib.recipe_scraper import scrape_recipe_from_url
+
+TEST_DATA = Path(__file__).parent.parent / "test_data"
+TEST_URL = (
+    "https://dagelijksekost.vrt.be/gerechten/rijsttaart-met-crumble-van-blonde-suiker"
+)
+
+
+def page(*blocks: object) -> bytes:
+    scripts = "".join(
+        f'<script type="application/ld+json">{json.dumps(b)}</script>' for b in blocks
+    )
+    return f"<html><head>{scripts}</head><body></body></html>".encode()
+
+
+RECIPE = {
+    "@type": "Recipe",
+    "name": "Pancakes",
+    "recipeIngredient": ["200 g flour", "2 eggs", " 300 ml  milk "],
+    "recipeInstructions": [
+        {"@type": "HowToStep", "text": "Mix everything."},
+        {
+            "@type": "HowToSection",
+            "name": "Baking",
+            "itemListElement": [{"@type": "HowToStep", "text": "Fry in butter."}],
+        },
+    ],
+    "prepTime": "PT10M",
+    "cookTime": "PT20M",
+    "recipeYield": "4",
+    "image": [{"@type": "ImageObject", "url": "https://example.com/p.jpg"}],
+    "author": [{"@type": "Person", "name": "Jane"}],
+    "keywords": "breakfast, sweet",
+}
+
+
+def test_extract_recipe_from_graph() -> None:
+    html = page(
+        {
+            "@context": "https://schema.org",
+            "@graph": [{"@type": "WebSite", "name": "Example Kitchen"}, RECIPE],
+        }
+    )
+    data = extract_jsonld_recipe(html, "https://example.com/pancakes")
+    assert data is not None
+    assert data["title"] == "Pancakes"
+    assert data["ingredients"] == ["200 g flour", "2 eggs", "300 ml milk"]
+    assert data["instruction_list"] == ["Mix everything.", "Fry in butter."]
+    assert data["total_time"] == 30
+    assert data["yields"] == "4 servings"
+    assert data["image"] == "https://example.com/p.jpg"
+    assert data["author"] == "Jane"
+    assert data["keywords"] == ["breakfast", "sweet"]
+    assert data["site_name"] == "Example Kitchen"
+    assert data["host"] == "example.com"
+
+
+def test_extract_skips_invalid_blocks() -> None:
+    html = b'<script type="application/ld+json">{not json</script>' + page(RECIPE)
+    data = extract_jsonld_recipe(html, "https://example.com/pancakes")
+    assert data is not None
+    assert data["title"] == "Pancakes"
+
+
+def test_extract_returns_none_without_complete_recipe() -> None:
+    assert extract_jsonld_recipe(b"<html></html>", "https://example.com/") is None
+    incomplete = {k: v for k, v in RECIPE.items() if k != "recipeInstructions"}
+    assert extract_jsonld_recipe(page(incomplete), "https://example.com/") is None
+
+
+def test_extract_matches_full_scraper() -> None:
+    content = (TEST_DATA / "test-recipe.html").read_bytes()
+    fast = extract_jsonld_recipe(content, TEST_URL)
+    full = parse_recipe_html(content.decode(), TEST_URL)
+    assert fast is not None
+    for field in ("title", "ingredients", "instruction_list", "total_time", "yields"):
+        assert fast[field] == full[field]
+
+
+def _parse_count(path: str) -> float:
+    value = REGISTRY.get_sample_value("recipe_parse_seconds_count", {"path": path})
+    return value or 0.0
+
+
+def test_scrape_records_parse_path() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/pancakes":
+            return httpx.Response(200, content=page(RECIPE))
+        return httpx.Response(200, content=b"<html><body>No recipe</body></html>")
+
+    async def run(url: str) -> dict[str, object]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await scrape_recipe_from_url(url, client=client)
+
+    jsonld_before = _parse_count("jsonld")
+    data = asyncio.run(run("https://example.com/pancakes"))
+    assert data["title"] == "Pancakes"
+    assert _parse_count("jsonld") == jsonld_before + 1
+
+    full_before = _parse_count("full")
+    data = asyncio.run(run("https://dagelijksekost.vrt.be/gerechten/no-recipe"))
+    assert not data.get("ingredients")
+    assert _parse_count("full") == full_before + 1
@@ -0,0 +1,125 @@
+import asyncio
+from collections import Counter
+from collections.abc import Callable
+from pathlib import Path
+
+import httpx
+from sqlmodel import Session, col, delete, func, select
+
+from app import crud
+from app.lib.html_store import record_page
+from app.lib.recipe_refresh import RefreshOutcome, refresh_due_pages
+from app.models import Recipe, RecipeCreate, RecipeUpdate, StoredPage
+from tests.utils.user import create_random_user
+
+PAGE = (Path(__file__).parent.parent / "test_data" / "test-recipe.html").read_bytes()
+URL = "https://dagelijksekost.vrt.be/gerechten/rijsttaart-met-crumble-van-blonde-suiker"
+
+
+def _saved_recipe(db: Session, content: bytes) -> Recipe:
+    db.exec(delete(StoredPage))  # type: ignore[call-overload]
+    db.commit()
+    record_page(session=db, url=URL, content=content, encoding="utf-8", etag='"v1"')
+    user = create_random_user(db)
+    return crud.create_recipe(
+        session=db,
+        recipe_in=RecipeCreate(title="Rijsttaart", url=URL, ingredients=["old"]),
+        owner_id=user.id,
+    )
+
+
+def _refresh_with(
+    db: Session, handler: Callable[[httpx.Request], httpx.Response]
+) -> Counter[RefreshOutcome]:
+    def serve(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/robots.txt":
+            return httpx.Response(404)
+        return handler(request)
+
+    async def run() -> Counter[RefreshOutcome]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(serve)) as client:
+            return await refresh_due_pages(
+                session=db, limit=10, max_age=0, concurrency=2, client=client
+            )
+
+    return asyncio.run(run())
+
+
+def test_refresh_sends_validators_and_skips_not_modified(db: Session) -> None:
+    recipe = _saved_recipe(db, PAGE)
+    seen: list[str | None] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers.get("If-None-Match"))
+        return httpx.Response(304)
+
+    assert _refresh_with(db, handler) == Counter(not_modified=1)
+    assert seen == ['"v1"']
+    db.refresh(recipe)
+    assert recipe.ingredients == ["old"]
+
+
+def test_refresh_skips_parsing_unchanged_page(db: Session) -> None:
+    recipe = _saved_recipe(db, PAGE)
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=PAGE, headers={"ETag": '"v2"'})
+
+    assert _refresh_with(db, handler) == Counter(unchanged=1)
+    db.refresh(recipe)
+    assert recipe.ingredients == ["old"]
+    page = db.exec(select(StoredPage).where(StoredPage.url == URL)).one()
+    db.refresh(page)
+    assert page.etag == '"v2"'
+
+
+def test_refresh_updates_recipes_from_changed_page(db: Session) -> None:
+    recipe = _saved_recipe(db, b"<html><body>An older version</body></html>")
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=PAGE, headers={"ETag": '"v2"'})
+
+    assert _refresh_with(db, handler) == Counter(updated=1)
+    db.refresh(recipe)
+    assert recipe.ingredients is not None
+    assert "1 vel bladerdeeg" in recipe.ingredients
+    # The page was just checked, so it is not due again
+    assert crud.claim_pages_to_refresh(session=db, limit=10, max_age=60) == []
+
+
+def test_refresh_moves_shared_recipes_to_new_source(db: Session) -> None:
+    db.exec(delete(StoredPage))  # type: ignore[call-overload]
+    db.commit()
+    record_page(
+        session=db, url=URL, content=b"<html>An older version</html>", encoding="utf-8"
+    )
+    recipe_in = RecipeCreate(title="Rijsttaart", url=URL, ingredients=["old"])
+    mine, theirs = crud.create_recipes(
+        session=db,
+        recipes_in=[recipe_in, recipe_in],
+        owner_id=create_random_user(db).id,
+        scraped=True,
+    )
+    crud.update_recipe(
+        session=db, db_recipe=mine, recipe_in=RecipeUpdate(ingredients=["mine"])
+    )
+    old_source_id = theirs.source_id
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=PAGE)
+
+    assert _refresh_with(db, handler) == Counter(updated=1)
+    db.refresh(mine)
+    db.refresh(theirs)
+    assert theirs.source_id != old_source_id
+    assert mine.source_id == theirs.source_id
+    assert "1 vel bladerdeeg" in theirs.shared_values()["ingredients"]
+    assert mine.shared_values()["ingredients"] == ["mine"]
+    # Search finds the new ingredients of the recipe that inherits them
+    found = db.exec(
+        select(Recipe.id).where(
+            col(Recipe.id).in_([mine.id, theirs.id]),
+            col(Recipe.search_vector).bool_op("@@")(func.to_tsquery("bladerdeeg")),
+        )
+    ).all()
+    assert found == [theirs.id]
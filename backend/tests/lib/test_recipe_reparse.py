@@ -0,0 +1,80 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.lib.html_store import get_html_store, record_page
+from app.lib.recipe_reparse import ReparseProgress, reparse_recipes
+from app.models import RecipeCreate
+from tests.utils.user import create_random_user
+
+PAGE = (Path(__file__).parent.parent / "test_data" / "test-recipe.html").read_bytes()
+URL = "https://dagelijksekost.vrt.be/gerechten/rijsttaart-met-crumble-van-blonde-suiker"
+
+
+def test_reparse_updates_recipes_from_stored_pages(
+    db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "SCRAPER_HTML_STORE", "database")
+    store = get_html_store()
+    assert store is not None
+    record_page(session=db, url=URL, content=PAGE, encoding="utf-8")
+    user = create_random_user(db)
+    stale = [
+        crud.create_recipe(
+            session=db,
+            recipe_in=RecipeCreate(
+                title="Rijsttaart", url=f"{URL}?utm_source=x", ingredients=["old"]
+            ),
+            owner_id=user.id,
+        )
+        for _ in range(3)
+    ]
+    shared = crud.create_recipes(
+        session=db,
+        recipes_in=[RecipeCreate(title="Rijsttaart", url=URL, ingredients=["old"])] * 2,
+        owner_id=user.id,
+        scraped=True,
+    )
+    old_source_id = shared[0].source_id
+    unstored = crud.create_recipe(
+        session=db,
+        recipe_in=RecipeCreate(
+            title="Elsewhere", url="https://example.com/not-stored", ingredients=["old"]
+        ),
+        owner_id=user.id,
+    )
+
+    async def run() -> list[ReparseProgress]:
+        return [
+            progress
+            async for progress in reparse_recipes(
+                session=db, store=store, batch_size=2, concurrency=2
+            )
+        ]
+
+    progress = asyncio.run(run())
+
+    assert len(progress) >= 2
+    assert progress[-1].updated >= 5
+    assert progress[-1].missing >= 1
+    for recipe in stale:
+        db.refresh(recipe)
+        assert recipe.ingredients is not None
+        assert "1 vel bladerdeeg" in recipe.ingredients
+        assert recipe.instructions
+        assert recipe.title == "Rijsttaart"
+    for recipe in shared:
+        db.refresh(recipe)
+        assert recipe.source_id not in (None, old_source_id)
+        assert recipe.ingredients is None
+        assert "1 vel bladerdeeg" in recipe.shared_values()["ingredients"]
+    assert shared[0].source_id == shared[1].source_id
+    db.refresh(unstored)
+    assert unstored.ingredients == ["old"]
+
+    # A second run finds nothing left to change
+    assert all(p.updated == 0 for p in asyncio.run(run()))
@@ -0,0 +1,204 @@
+import asyncio
+import json
+from collections.abc import AsyncIterator, Callable
+from pathlib import Path
+from typing import Any
+
+import httpx
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.lib import http_client
+from app.lib.recipe_parser import (
+    FIELD_PRESETS,
+    RECIPE_FIELDS,
+    parse_recipe_fields,
+    parse_recipe_html,
+    resolve_fields,
+)
+from app.lib.recipe_scraper import (
+    PageRejectedError,
+    recipe_create_from_parsed,
+    scrape_recipe_from_url,
+)
+from app.lib.scrape_trace import ScrapeTrace
+from app.models import ParseRecipeResponse
+
+TEST_DATA = Path(__file__).parent.parent / "test_data"
+
+
+def test_scrape_recipe_uses_given_client() -> None:
+    html = (TEST_DATA / "test-recipe.html").read_text()
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(f"{request.url.host}{request.url.path}")
+        if request.url.path == "/robots.txt":
+            return httpx.Response(404)
+        return httpx.Response(200, html=html)
+
+    async def run() -> dict[str, object]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await scrape_recipe_from_url(
+                "https://dagelijksekost.vrt.be/gerechten/rijsttaart-met-crumble-van-blonde-suiker",
+                client=client,
+            )
+
+    data = asyncio.run(run())
+    assert seen == [
+        "dagelijksekost.vrt.be/robots.txt",
+        "dagelijksekost.vrt.be/gerechten/rijsttaart-met-crumble-van-blonde-suiker",
+    ]
+    assert data["title"]
+
+
+def test_shared_client_lifecycle() -> None:
+    async def run() -> None:
+        assert http_client.get_http_client() is None
+        client = await http_client.init_http_client()
+        assert http_client.get_http_client() is client
+        assert await http_client.init_http_client() is client
+        await http_client.close_http_client()
+        assert http_client.get_http_client() is None
+        assert client.is_closed
+
+    asyncio.run(run())
+
+
+def _scrape_with(handler: Callable[[httpx.Request], httpx.Response]) -> dict[str, Any]:
+    async def run() -> dict[str, Any]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await scrape_recipe_from_url(
+                "https://dagelijksekost.vrt.be/gerechten/test", client=client
+            )
+
+    return asyncio.run(run())
+
+
+def test_scrape_rejects_non_html() -> None:
+    def handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200, content=b"%PDF-1.7", headers={"Content-Type": "application/pdf"}
+        )
+
+    with pytest.raises(PageRejectedError) as exc_info:
+        _scrape_with(handler)
+    assert exc_info.value.status_code == 415
+
+
+def test_scrape_rejects_oversized_page(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "SCRAPER_MAX_PAGE_BYTES", 1024)
+
+    async def body() -> AsyncIterator[bytes]:
+        while True:
+            yield b"<p>" + b"x" * 256 + b"</p>"
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200, content=body(), headers={"Content-Type": "text/html"}
+        )
+
+    with pytest.raises(PageRejectedError) as exc_info:
+        _scrape_with(handler)
+    assert exc_info.value.status_code == 413
+
+
+def test_scrape_stops_reading_after_jsonld_recipe() -> None:
+    recipe = {
+        "@type": "Recipe",
+        "name": "Pancakes",
+        "recipeIngredient": ["200 g flour"],
+        "recipeInstructions": "Mix.\nFry.",
+    }
+    head = (
+        f'<html><head><script type="application/ld+json">{json.dumps(recipe)}</script>'
+    )
+    chunks_sent = 0
+
+    async def body() -> AsyncIterator[bytes]:
+        nonlocal chunks_sent
+        # Split the script tag across chunks
+        for chunk in (head[:20].encode(), head[20:].encode()):
+            chunks_sent += 1
+            yield chunk
+        while True:
+            chunks_sent += 1
+            yield b"<div>" + b"x" * 1024 + b"</div>"
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200, content=body(), headers={"Content-Type": "text/html; charset=utf-8"}
+        )
+
+    data = _scrape_with(handler)
+    assert data["title"] == "Pancakes"
+    assert data["instruction_list"] == ["Mix.", "Fry."]
+    assert chunks_sent == 2
+
+
+def test_resolve_fields() -> None:
+    assert resolve_fields(["save"]) == FIELD_PRESETS["save"]
+    assert resolve_fields(["preview", "links"]) == FIELD_PRESETS["preview"] | {"links"}
+    assert "links" not in FIELD_PRESETS["full"]
+    assert set(RECIPE_FIELDS) == set(ParseRecipeResponse.model_fields)
+    with pytest.raises(ValueError):
+        resolve_fields(["title", "flavour"])
+
+
+def test_parse_recipe_fields_computes_only_requested_fields() -> None:
+    html = (TEST_DATA / "test-recipe.html").read_text()
+    url = "https://dagelijksekost.vrt.be/gerechten/test"
+    data, seconds = parse_recipe_fields(html, url, {"title", "instruction_list"})
+
+    assert set(data) == {"title", "instruction_list"}
+    assert set(seconds) == {"title", "instruction_list"}
+    assert (
+        parse_recipe_html(html, url)
+        == parse_recipe_fields(html, url, FIELD_PRESETS["full"])[0]
+    )
+
+
+def test_scrape_selected_fields() -> None:
+    html = (TEST_DATA / "test-recipe.html").read_text()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/robots.txt":
+            return httpx.Response(404)
+        return httpx.Response(200, html=html)
+
+    async def run(fields: set[str]) -> tuple[dict[str, Any], ScrapeTrace]:
+        url = "https://dagelijksekost.vrt.be/gerechten/test"
+        trace = ScrapeTrace(url)
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            data = await scrape_recipe_from_url(
+                url, client=client, trace=trace, fields=fields
+            )
+        return data, trace
+
+    data, trace = asyncio.run(run({"title", "image"}))
+    assert trace.path == "jsonld"
+    assert set(data) == {"title", "image"}
+
+    # JSON-LD has no links, so the full scraper runs and times each field
+    data, trace = asyncio.run(run({"title", "links"}))
+    assert trace.path == "full"
+    assert set(data) == {"title", "links"}
+    assert set(trace.fields) == {"title", "links"}
+
+
+def test_recipe_create_from_parsed_checks_limits_once() -> None:
+    parsed = ParseRecipeResponse(
+        title="Stew",
+        ingredient_groups=[{"purpose": "Base", "ingredients": ["1 onion"]}],
+        instruction_list=["Cook"],
+    )
+    recipe_in = recipe_create_from_parsed(parsed, "https://stew.example/")
+    assert recipe_in.title == "Stew"
+    assert recipe_in.ingredient_groups == [
+        {"purpose": "Base", "ingredients": ["1 onion"]}
+    ]
+    assert recipe_in.instructions == ["Cook"]
+
+    with pytest.raises(ValidationError):
+        recipe_create_from_parsed(ParseRecipeResponse(title="x" * 300), None)
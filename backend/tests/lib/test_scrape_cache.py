@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+from sqlmodel import Session
+
+from app.lib.scrape_cache import LRUCache, ScrapeCache, normalize_url
+from app.models import ParseRecipeResponse, ScrapeCacheEntry
+from app.models.base import get_datetime_utc
+
+
+def test_normalize_url_strips_tracking_and_fragment() -> None:
+    url = (
+        "HTTPS://Www.Example.COM:443/Recipe/Pasta?utm_source=x&b=2&fbclid=y&a=1#step-3"
+    )
+    assert normalize_url(url) == "https://www.example.com/Recipe/Pasta?a=1&b=2"
+
+
+def test_normalize_url_keeps_non_default_port_and_root_path() -> None:
+    assert normalize_url("http://example.com:8080") == "http://example.com:8080/"
+
+
+def test_lru_cache_evicts_least_recently_used() -> None:
+    cache = LRUCache(max_entries=2, max_bytes=10_000, ttl=60)
+    cache.set("a", {"title": "A"})
+    cache.set("b", {"title": "B"})
+    assert cache.get("a") == {"title": "A"}
+    cache.set("c", {"title": "C"})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_lru_cache_evicts_by_size() -> None:
+    cache = LRUCache(max_entries=100, max_bytes=60, ttl=60)
+    cache.set("a", {"title": "x" * 20})
+    cache.set("b", {"title": "y" * 20})
+    assert len(cache) == 1
+    assert cache.get("b") is not None
+    assert cache.total_bytes <= 60
+
+
+def test_lru_cache_expires_entries() -> None:
+    cache = LRUCache(max_entries=10, max_bytes=10_000, ttl=0)
+    cache.set("a", {"title": "A"})
+    assert cache.get("a") is None
+    assert cache.total_bytes == 0
+
+
+def test_scrape_cache_stores_validated_output(db: Session) -> None:
+    cache = ScrapeCache(
+        memory=LRUCache(max_entries=10, max_bytes=10_000, ttl=60), db_ttl=60
+    )
+    url = "https://example.com/recipe/validated"
+    cache.set(
+        session=db, url=url, data=ParseRecipeResponse(title="Validated", yields=None)
+    )
+    cache.memory.clear()
+
+    cached = cache.get(session=db, url=url)
+    assert cached == ({"title": "Validated"}, "db")
+
+
+def test_scrape_cache_purges_expired_rows(db: Session) -> None:
+    cache = ScrapeCache(
+        memory=LRUCache(max_entries=10, max_bytes=10_000, ttl=60), db_ttl=60
+    )
+    now = get_datetime_utc()
+    for i in range(3):
+        db.add(
+            ScrapeCacheEntry(
+                url_key=f"https://example.com/recipe/expired-{i}",
+                url=f"https://example.com/recipe/expired-{i}",
+                data={"title": "Expired"},
+                expires_at=now - timedelta(seconds=1),
+            )
+        )
+    db.commit()
+    fresh_url = "https://example.com/recipe/fresh"
+    cache.set(session=db, url=fresh_url, data=ParseRecipeResponse(title="Fresh"))
+
+    assert cache.purge_expired(session=db, batch_size=2) == 3
+    assert db.get(ScrapeCacheEntry, "https://example.com/recipe/expired-0") is None
+    assert db.get(ScrapeCacheEntry, normalize_url(fresh_url)) is not None
@@ -0,0 +1,82 @@
+import asyncio
+from pathlib import Path
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core.config import settings
+from app.lib import metrics
+from app.lib.recipe_scraper import scrape_recipe_from_url
+from app.lib.scrape_trace import ScrapeTrace
+
+TEST_DATA = Path(__file__).parent.parent / "test_data"
+
+
+def test_trace_times_connection_phases() -> None:
+    trace = ScrapeTrace("https://Example.com/recipe")
+    events = [
+        "connection.connect_tcp.started",
+        "connection.connect_tcp.complete",
+        "connection.start_tls.started",
+        "connection.start_tls.complete",
+        "http11.send_request_headers.started",
+        "http11.send_request_headers.complete",
+        "http11.receive_response_headers.started",
+        "http11.receive_response_headers.complete",
+    ]
+
+    async def run() -> None:
+        for event in events:
+            await trace.on_http_event(event, {})
+
+    asyncio.run(run())
+    assert trace.host == "example.com"
+    assert set(trace.phases) == {"connect", "tls", "ttfb"}
+
+
+def test_trace_server_timing() -> None:
+    trace = ScrapeTrace("https://example.com/recipe")
+    trace.add("download", 0.0125)
+    trace.add("parse", 0.002)
+    trace.add("parse", 0.001)
+    trace.path = "jsonld"
+    assert trace.server_timing(total=0.02) == (
+        'download;dur=12.5, parse;dur=3.0;desc="jsonld", total;dur=20.0'
+    )
+
+
+def test_host_label_is_bounded(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(metrics, "_labelled_hosts", set())
+    monkeypatch.setattr(settings, "SCRAPER_METRICS_MAX_HOSTS", 2)
+    assert metrics.host_label("a.example.com") == "a.example.com"
+    assert metrics.host_label("b.example.com") == "b.example.com"
+    assert metrics.host_label("c.example.com") == "other"
+    assert metrics.host_label("a.example.com") == "a.example.com"
+    assert metrics.host_label("") == "unknown"
+
+
+def test_scrape_records_phases() -> None:
+    html = (TEST_DATA / "test-recipe.html").read_text()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/robots.txt":
+            return httpx.Response(404)
+        return httpx.Response(200, html=html)
+
+    trace = ScrapeTrace("https://dagelijksekost.vrt.be/gerechten/rijsttaart")
+
+    async def run() -> None:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            await scrape_recipe_from_url(
+                "https://dagelijksekost.vrt.be/gerechten/rijsttaart",
+                client=client,
+                trace=trace,
+            )
+
+    asyncio.run(run())
+    assert {"queue", "download", "parse"} <= set(trace.phases)
+    assert trace.response_bytes > 0
+    assert trace.path in ("jsonld", "full")
+    labels = {"host": "dagelijksekost.vrt.be", "path": trace.path, "outcome": "ok"}
+    assert REGISTRY.get_sample_value("scrapes_total", labels)
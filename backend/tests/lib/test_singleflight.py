@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from app.lib.singleflight import SingleFlight, advisory_lock_id, pg_advisory_lock
+
+
+def test_single_flight_shares_result() -> None:
+    flight: SingleFlight[str] = SingleFlight()
+    calls = 0
+
+    async def fetch() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "recipe"
+
+    async def run() -> list[str]:
+        results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(10)))
+        assert "key" not in flight
+        return results
+
+    assert asyncio.run(run()) == ["recipe"] * 10
+    assert calls == 1
+
+
+def test_single_flight_shares_error() -> None:
+    flight: SingleFlight[str] = SingleFlight()
+    calls = 0
+
+    async def fetch() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run() -> list[BaseException | str]:
+        return await asyncio.gather(
+            *(flight.do("key", fetch) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert calls == 1
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_single_flight_survives_leader_cancellation() -> None:
+    flight: SingleFlight[str] = SingleFlight()
+
+    async def fetch() -> str:
+        await asyncio.sleep(0.02)
+        return "recipe"
+
+    async def run() -> str:
+        leader = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(run()) == "recipe"
+
+
+def test_advisory_lock_id_is_stable_signed_bigint() -> None:
+    lock_id = advisory_lock_id("https://example.com/recipe")
+    assert lock_id == advisory_lock_id("https://example.com/recipe")
+    assert -(2**63) <= lock_id < 2**63
+
+
+def test_pg_advisory_lock_excludes_second_holder() -> None:
+    key = "https://example.com/recipe/locked"
+
+    async def run() -> list[bool]:
+        held = asyncio.Event()
+        release = asyncio.Event()
+        results = []
+
+        async def leader() -> None:
+            async with pg_advisory_lock(key, timeout=1) as acquired:
+                results.append(acquired)
+                held.set()
+                await release.wait()
+
+        task = asyncio.create_task(leader())
+        await held.wait()
+        # The leader holds the lock on another connection, so this times out
+        async with pg_advisory_lock(key, timeout=0.3, poll_interval=0.05) as acquired:
+            results.append(acquired)
+        release.set()
+        await task
+        async with pg_advisory_lock(key, timeout=1) as acquired:
+            results.append(acquired)
+        return results
+
+    assert asyncio.run(run()) == [True, False, True]
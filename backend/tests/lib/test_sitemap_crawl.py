@@ -0,0 +1,207 @@
+import asyncio
+import gzip
+import tracemalloc
+from collections.abc import AsyncIterator, Callable
+from pathlib import Path
+
+import httpx
+from sqlmodel import Session
+
+from app import crud
+from app.lib.sitemap_crawl import (
+    SiteUrls,
+    crawl_import,
+    find_recipe_urls,
+    iter_sitemap,
+    looks_like_recipe_url,
+)
+from app.models import CrawlImportResult, Recipe, RecipeCreate
+from tests.utils.user import create_random_user
+
+RECIPE_HTML = (
+    Path(__file__).parent.parent / "test_data" / "test-recipe.html"
+).read_text()
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def urlset(urls: list[str]) -> str:
+    entries = "".join(f"<url><loc>{url}</loc></url>" for url in urls)
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset {NS}>{entries}</urlset>'
+
+
+def sitemap_index(urls: list[str]) -> str:
+    entries = "".join(f"<sitemap><loc>{url}</loc></sitemap>" for url in urls)
+    return f"<sitemapindex {NS}>{entries}</sitemapindex>"
+
+
+def site(pages: dict[str, httpx.Response]) -> httpx.AsyncClient:
+    """A client for a mock site serving fixed responses by path."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return pages.get(request.url.path) or httpx.Response(404)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_looks_like_recipe_url() -> None:
+    site_name = "food.example"
+    assert looks_like_recipe_url("https://food.example/banana-bread/", site_name)
+    assert looks_like_recipe_url("https://www.food.example/r/stew", site_name)
+    assert not looks_like_recipe_url("https://food.example/", site_name)
+    assert not looks_like_recipe_url("https://food.example/tag/bread/", site_name)
+    assert not looks_like_recipe_url("https://food.example/page/2/", site_name)
+    assert not looks_like_recipe_url("https://food.example/img/a.jpg", site_name)
+    assert not looks_like_recipe_url("https://other.example/stew", site_name)
+
+
+def test_find_recipe_urls_follows_sitemaps(db: Session) -> None:
+    user = create_random_user(db)
+    crud.create_recipe(
+        session=db,
+        recipe_in=RecipeCreate(title="Saved", url="https://crawl.example/recipes/saved"),
+        owner_id=user.id,
+    )
+    recipes = urlset(
+        [
+            "https://crawl.example/recipes/stew",
+            "https://crawl.example/recipes/stew?utm_source=feed",
+            "https://crawl.example/recipes/saved",
+            "https://crawl.example/recipes/secret",
+            "https://crawl.example/tag/stews/",
+            "https://elsewhere.example/recipes/soup",
+            "https://crawl.example/recipes/cake",
+        ]
+    )
+    client = site(
+        {
+            "/robots.txt": httpx.Response(
+                200,
+                text="User-agent: *\nDisallow: /recipes/secret\n"
+                "Sitemap: https://crawl.example/sitemap_index.xml\n",
+            ),
+            "/sitemap_index.xml": httpx.Response(
+                200,
+                text=sitemap_index(
+                    [
+                        "https://crawl.example/post-sitemap.xml",
+                        "https://crawl.example/wprm_recipe-sitemap.xml.gz",
+                        "https://crawl.example/category-sitemap.xml",
+                    ]
+                ),
+            ),
+            "/wprm_recipe-sitemap.xml.gz": httpx.Response(
+                200, content=gzip.compress(recipes.encode())
+            ),
+        }
+    )
+
+    async def run() -> list[str]:
+        async with client:
+            urls = await find_recipe_urls(
+                "https://crawl.example",
+                session=db,
+                owner_id=user.id,
+                client=client,
+                max_urls=100,
+                max_sitemaps=10,
+                max_sitemap_bytes=1024 * 1024,
+                error_rate=0.001,
+            )
+        try:
+            return list(urls)
+        finally:
+            urls.close()
+
+    assert asyncio.run(run()) == [
+        "https://crawl.example/recipes/stew",
+        "https://crawl.example/recipes/cake",
+    ]
+
+
+def test_iter_sitemap_keeps_memory_flat() -> None:
+    count = 50_000
+
+    async def body() -> AsyncIterator[bytes]:
+        yield f"<urlset {NS}>".encode()
+        for start in range(0, count, 500):
+            yield "".join(
+                f"<url><loc>https://big.example/recipes/recipe-{i}</loc>"
+                "<lastmod>2024-01-01</lastmod></url>"
+                for i in range(start, start + 500)
+            ).encode()
+        yield b"</urlset>"
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=body())
+
+    async def run() -> int:
+        seen = 0
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            async for kind, _ in iter_sitemap(
+                client, "https://big.example/sitemap.xml", max_bytes=10 * 1024 * 1024
+            ):
+                assert kind == "url"
+                seen += 1
+        return seen
+
+    tracemalloc.start()
+    try:
+        assert asyncio.run(run()) == count
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # The sitemap is over 4 MB, holding it or its entries would show up here
+    assert peak < 1024 * 1024
+
+
+def _crawl(
+    db: Session, urls: list[str], handler: Callable[[httpx.Request], httpx.Response]
+) -> list[list[CrawlImportResult]]:
+    user = create_random_user(db)
+    spooled = SiteUrls()
+    for url in urls:
+        spooled.append(url)
+
+    async def run() -> list[list[CrawlImportResult]]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return [
+                group
+                async for group in crawl_import(
+                    iter(spooled),
+                    session=db,
+                    owner_id=user.id,
+                    concurrency=2,
+                    batch_size=2,
+                    client=client,
+                )
+            ]
+
+    try:
+        return asyncio.run(run())
+    finally:
+        spooled.close()
+
+
+def test_crawl_import_saves_batches(db: Session) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.startswith("/gerechten/"):
+            return httpx.Response(200, html=RECIPE_HTML)
+        return httpx.Response(404)
+
+    urls = [
+        "https://dagelijksekost.vrt.be/gerechten/one",
+        "https://dagelijksekost.vrt.be/missing",
+        "https://dagelijksekost.vrt.be/gerechten/two",
+    ]
+    groups = _crawl(db, urls, handler)
+
+    assert [len(group) for group in groups] == [2, 1]
+    results = {result.url: result for group in groups for result in group}
+    assert results[urls[1]].status_code == 404
+    assert results[urls[1]].recipe_id is None
+    for url in (urls[0], urls[2]):
+        recipe = db.get(Recipe, results[url].recipe_id)
+        assert recipe is not None
+        assert recipe.url == url
+        assert recipe.source_id is not None
+        assert recipe.shared_values()["ingredients"]